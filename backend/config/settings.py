@@ -2,6 +2,7 @@ import os
 from pathlib import Path
 from decouple import config
 import dj_database_url
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -41,13 +42,17 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware', # Deve ser o primeiro para lidar com Headers antes de tudo
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware', # <--- NOVO: Logo após Security
+    'core.middleware.StaticFilesMiddleware', # WhiteNoise (ver core/middleware.py): Logo após Security
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
+    'core.middleware.ConcurrencyLimitMiddleware',
+    'core.middleware.SlowQueryLogMiddleware',
+    'core.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -94,6 +99,20 @@ else:
         }
     }
 
+# RÉPLICA DE LEITURA (opcional): GETs das listagens marcadas com replica_reads
+# leem dela (ver core/db_router.py). Para testar localmente, aponte para uma
+# segunda base (ex.: cópia do SQLite ou outro banco no mesmo PostgreSQL).
+DATABASE_REPLICA_URL = config('DATABASE_REPLICA_URL', default='')
+if DATABASE_REPLICA_URL:
+    DATABASES['replica'] = dj_database_url.parse(DATABASE_REPLICA_URL, conn_max_age=600)
+    # Nos testes a "réplica" é o próprio banco de teste do primário
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['core.db_router.PrimaryReplicaRouter']
+# Por quantos segundos quem gravou continua lendo do primário.
+# Com vários processos, o cache precisa ser compartilhado (CACHES, ex.: Redis).
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=5, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -155,6 +174,9 @@ CORS_ALLOWED_ORIGINS = [
 # mas lembre-se de comentar novamente e usar a lista acima para segurança depois.
 CORS_ALLOW_ALL_ORIGINS = True 
 
+# O SPA manda Idempotency-Key nos POSTs de dinheiro (core/idempotency.py)
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+
 CORS_ALLOW_METHODS = [
     "DELETE",
     "GET",
@@ -164,6 +186,13 @@ CORS_ALLOW_METHODS = [
     "PUT",
 ]
 
+# --- LIMITES DAS ROTAS CARAS (core/throttling.py) ---
+# Desligue (False / 0) para testes de carga como o compare_async
+THROTTLING_ENABLED = config('THROTTLING_ENABLED', default=True, cast=bool)
+# Requisições pesadas simultâneas por processo; as demais recebem 429 na hora
+HEAVY_REQUESTS_PER_WORKER = config('HEAVY_REQUESTS_PER_WORKER', default=4, cast=int)
+HEAVY_REQUESTS_RETRY_AFTER = config('HEAVY_REQUESTS_RETRY_AFTER', default=2, cast=int)
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.TokenAuthentication',
@@ -171,6 +200,20 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Taxas por rota (throttle_scope da view, ver core/throttling.py):
+    # '<escopo>' vale por usuário e '<escopo>_house' para a casa inteira
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.UserScopedThrottle',
+        'core.throttling.HouseScopedThrottle',
+    ] if THROTTLING_ENABLED else [],
+    'DEFAULT_THROTTLE_RATES': {
+        'history': config('THROTTLE_HISTORY', default='60/min'),
+        'history_house': config('THROTTLE_HISTORY_HOUSE', default='120/min'),
+        'shopping-list': config('THROTTLE_SHOPPING_LIST', default='120/min'),
+        'shopping-list_house': config('THROTTLE_SHOPPING_LIST_HOUSE', default='240/min'),
+        'export': config('THROTTLE_EXPORT', default='10/min'),
+        'export_house': config('THROTTLE_EXPORT_HOUSE', default='20/min'),
+    },
 }
 
 AUTHENTICATION_BACKENDS = [
@@ -182,4 +225,91 @@ AUTHENTICATION_BACKENDS = [
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # --- E-MAIL ---
-EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
\ No newline at end of file
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+
+# --- LOG DE QUERIES LENTAS ---
+# Queries acima do limite vão para um arquivo JSON-lines rotativo.
+# Resumo: python manage.py slow_query_report
+SLOW_QUERY_LOG_ENABLED = config('SLOW_QUERY_LOG_ENABLED', default=True, cast=bool)
+SLOW_QUERY_THRESHOLD_MS = config('SLOW_QUERY_THRESHOLD_MS', default=500, cast=int)
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = config('SLOW_QUERY_EXPLAIN_SAMPLE_RATE', default=0.1, cast=float) # Só PostgreSQL
+SLOW_QUERY_LOG_FILE = config('SLOW_QUERY_LOG_FILE', default=os.path.join(BASE_DIR, 'slow_queries.jsonl'))
+
+# --- PERFIS SOB DEMANDA (cProfile) ---
+# Staff envia 'X-Profile: 1' e recebe o id do perfil no header X-Profile-Id
+PROFILING_ENABLED = config('PROFILING_ENABLED', default=True, cast=bool)
+PROFILING_DIR = config('PROFILING_DIR', default=os.path.join(BASE_DIR, 'profiles'))
+PROFILING_MAX_BYTES = config('PROFILING_MAX_BYTES', default=200 * 1024 * 1024, cast=int)
+
+# --- BATCH (/api/batch/) ---
+BATCH_MAX_OPERATIONS = config('BATCH_MAX_OPERATIONS', default=50, cast=int)
+# Linhas por PATCH /inventory/bulk/ e /shopping-list/bulk/
+BULK_UPDATE_MAX_ITEMS = config('BULK_UPDATE_MAX_ITEMS', default=500, cast=int)
+# Transações por POST /transactions/bulk-delete/ (fora as demais parcelas das séries)
+BULK_DELETE_MAX_ITEMS = config('BULK_DELETE_MAX_ITEMS', default=500, cast=int)
+# Admin: acima de N linhas (estimadas) a paginação usa a estimativa do
+# PostgreSQL no lugar do COUNT(*) exato (core/pagination.py)
+ESTIMATED_COUNT_THRESHOLD = config('ESTIMATED_COUNT_THRESHOLD', default=100000, cast=int)
+# Meses à frente aceitos em /projection/?months=
+PROJECTION_MAX_MONTHS = config('PROJECTION_MAX_MONTHS', default=60, cast=int)
+# Extrato de fatura paga no cache (core/statements.py); as versões antigas vencem
+STATEMENT_CACHE_SECONDS = config('STATEMENT_CACHE_SECONDS', default=24 * 60 * 60, cast=int)
+
+# --- IDEMPOTÊNCIA (header Idempotency-Key, core/idempotency.py) ---
+# Por quanto tempo uma chave devolve a resposta gravada (depois:
+# manage.py expire_idempotency_keys) e respostas recentes em memória por processo
+IDEMPOTENCY_KEY_TTL_HOURS = config('IDEMPOTENCY_KEY_TTL_HOURS', default=24, cast=int)
+IDEMPOTENCY_CACHE_SIZE = config('IDEMPOTENCY_CACHE_SIZE', default=1000, cast=int)
+
+# --- SINCRONIZAÇÃO (/api/sync/) ---
+# Entradas por resposta e por quantos dias o log de alterações é mantido
+SYNC_MAX_ENTRIES = config('SYNC_MAX_ENTRIES', default=1000, cast=int)
+CHANGELOG_RETENTION_DAYS = config('CHANGELOG_RETENTION_DAYS', default=30, cast=int)
+
+# --- EVENTOS EM TEMPO REAL (/api/events/, SSE via ASGI) ---
+# Vazio: PostgresBroker (LISTEN/NOTIFY) no PostgreSQL, InMemoryBroker nos demais
+EVENTS_BROKER = config('EVENTS_BROKER', default='')
+EVENTS_HEARTBEAT_SECONDS = config('EVENTS_HEARTBEAT_SECONDS', default=20, cast=int)
+EVENTS_QUEUE_SIZE = config('EVENTS_QUEUE_SIZE', default=100, cast=int)
+
+# --- PARTICIONAMENTO DE TRANSAÇÕES (só PostgreSQL 15+) ---
+# 'month' ou 'year' particiona core_transaction e core_transactionitem por data
+# (manage.py partition_transactions convert); vazio: tabelas comuns.
+# Partições futuras: manage.py partition_transactions create (agendar mensalmente)
+TRANSACTION_PARTITIONING = config('TRANSACTION_PARTITIONING', default='')
+TRANSACTION_PARTITIONS_AHEAD = config('TRANSACTION_PARTITIONS_AHEAD', default=3, cast=int)
+
+# --- ARQUIVO FRIO (manage.py archive_transactions) ---
+# Transações com mais de N meses saem das tabelas quentes (totais mensais ficam)
+ARCHIVE_AFTER_MONTHS = config('ARCHIVE_AFTER_MONTHS', default=36, cast=int)
+
+# --- EXCLUSÃO DE CASAS (core/purge.py) ---
+# Expurgo numa thread após o commit; False: só pelo manage.py purge_houses (cron)
+HOUSE_PURGE_IN_BACKGROUND = config('HOUSE_PURGE_IN_BACKGROUND', default=True, cast=bool)
+HOUSE_PURGE_BATCH_SIZE = config('HOUSE_PURGE_BATCH_SIZE', default=5000, cast=int)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'raw': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_queries_file': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG_FILE,
+            'maxBytes': config('SLOW_QUERY_LOG_MAX_BYTES', default=20 * 1024 * 1024, cast=int),
+            'backupCount': config('SLOW_QUERY_LOG_BACKUPS', default=5, cast=int),
+            'formatter': 'raw',
+            'encoding': 'utf-8',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'core.slow_queries': {
+            'handlers': ['slow_queries_file'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
@@ -1,13 +1,118 @@
 from django.contrib import admin
-from .models import House, HouseMember, Account, CreditCard, Invoice, Transaction, Product, InventoryItem, ShoppingList
+from .models import (
+    House, HouseMember, Category, Account, CreditCard, Invoice, RecurringBill, Transaction, TransactionItem,
+    Product, InventoryItem, ShoppingList,
+)
+from .pagination import EstimatedCountPaginator
 
 # Isso permite ver e editar essas tabelas em http://localhost:8000/admin
-admin.site.register(House)
-admin.site.register(HouseMember)
-admin.site.register(Account)
-admin.site.register(CreditCard)
-admin.site.register(Invoice)
-admin.site.register(Transaction)
-admin.site.register(Product)
-admin.site.register(InventoryItem)
-admin.site.register(ShoppingList)
\ No newline at end of file
+#
+# Tabelas grandes: list_select_related para o __str__ e as colunas não
+# consultarem a FK linha a linha, FKs com autocomplete (o <select> carregaria
+# a tabela inteira) e contagem estimada na paginação (core/pagination.py), sem
+# o COUNT(*) extra do total geral. Filtro por casa pela URL, no índice da FK:
+# /admin/core/transaction/?house=3
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ('-id',)  # pela chave primária: LIMIT sem ordenar a tabela
+
+
+@admin.register(House)
+class HouseAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'created_at', 'deletion_requested_at')
+    search_fields = ('name',)
+
+
+@admin.register(HouseMember)
+class HouseMemberAdmin(admin.ModelAdmin):
+    list_display = ('user', 'house', 'role')
+    list_select_related = ('user', 'house')
+    list_filter = ('role',)
+    search_fields = ('user__username', 'house__name')
+    autocomplete_fields = ('user', 'house')
+
+
+@admin.register(Category)
+class CategoryAdmin(admin.ModelAdmin):
+    list_display = ('name', 'type', 'house')
+    list_select_related = ('house',)
+    search_fields = ('name',)
+    autocomplete_fields = ('house',)
+
+
+@admin.register(Account)
+class AccountAdmin(admin.ModelAdmin):
+    list_display = ('name', 'house', 'owner', 'balance', 'is_shared')
+    list_select_related = ('house', 'owner')
+    search_fields = ('name',)
+    autocomplete_fields = ('house', 'owner')
+
+
+@admin.register(CreditCard)
+class CreditCardAdmin(admin.ModelAdmin):
+    list_display = ('name', 'house', 'owner', 'limit_total', 'limit_available')
+    list_select_related = ('house', 'owner')
+    search_fields = ('name',)
+    autocomplete_fields = ('house', 'owner')
+
+
+@admin.register(Invoice)
+class InvoiceAdmin(LargeTableAdmin):
+    list_display = ('id', 'card', 'reference_date', 'value', 'amount_paid', 'status')
+    list_select_related = ('card',)
+    list_filter = ('status',)
+    search_fields = ('card__name',)
+    autocomplete_fields = ('card',)
+
+
+@admin.register(RecurringBill)
+class RecurringBillAdmin(admin.ModelAdmin):
+    list_display = ('name', 'house', 'base_value', 'due_day', 'is_active')
+    list_select_related = ('house',)
+    search_fields = ('name',)
+    autocomplete_fields = ('house', 'category')
+
+
+@admin.register(Transaction)
+class TransactionAdmin(LargeTableAdmin):
+    list_display = ('id', 'date', 'description', 'value', 'type', 'house', 'owner', 'category')
+    list_select_related = ('house', 'owner', 'category')
+    # A data é a chave de partição (core/partitioning.py): o filtro poda partições
+    list_filter = (('date', admin.DateFieldListFilter), 'is_shared')
+    search_fields = ('description',)
+    autocomplete_fields = ('house', 'category', 'account', 'invoice', 'recurring_bill', 'owner', 'credit_card')
+
+
+@admin.register(TransactionItem)
+class TransactionItemAdmin(LargeTableAdmin):
+    list_display = ('id', 'description', 'quantity', 'value', 'transaction_date', 'transaction_id')
+    search_fields = ('description',)
+    autocomplete_fields = ('transaction',)
+
+
+@admin.register(Product)
+class ProductAdmin(admin.ModelAdmin):
+    list_display = ('name', 'house', 'measure_unit', 'estimated_price')
+    list_select_related = ('house',)
+    search_fields = ('name',)
+    autocomplete_fields = ('house',)
+
+
+@admin.register(InventoryItem)
+class InventoryItemAdmin(admin.ModelAdmin):
+    list_display = ('product', 'house', 'quantity', 'min_quantity')
+    list_select_related = ('product', 'house')
+    search_fields = ('product__name',)
+    autocomplete_fields = ('house', 'product')
+
+
+@admin.register(ShoppingList)
+class ShoppingListAdmin(admin.ModelAdmin):
+    list_display = ('product', 'house', 'quantity_to_buy', 'is_purchased')
+    list_select_related = ('product', 'house')
+    list_filter = ('is_purchased',)
+    search_fields = ('product__name',)
+    autocomplete_fields = ('house', 'product')
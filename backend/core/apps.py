@@ -1,5 +1,15 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import categorization, statements
+        from .changelog import connect_signals
+        from .search import repair_sqlite_triggers
+        post_migrate.connect(repair_sqlite_triggers, sender=self)
+        connect_signals()
+        categorization.connect_signals()
+        statements.connect_signals()
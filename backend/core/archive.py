@@ -0,0 +1,173 @@
+"""
+Arquivo frio de transações antigas (comando archive_transactions).
+
+Por casa e mês, as transações anteriores ao corte (com seus itens) saem das
+tabelas quentes e vão para TransactionArchive: uma linha JSON por transação,
+compactadas com zlib. Na mesma transação do banco os totais do mês por tipo e
+categoria são somados em MonthlyRollup, que o /history/ continua mostrando.
+
+Os dados voltam sob demanda em /archive/transactions/ (JSON-lines em stream).
+Apagar das tabelas quentes é um DELETE por lote de ids, sem signals: saldos de
+contas e faturas não mudam, só o log de alterações recebe as remoções.
+"""
+import datetime
+import json
+import uuid
+import zlib
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.db import connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import TruncMonth
+
+from .changelog import DELETE, record_changes
+from .models import Category, MonthlyRollup, Transaction, TransactionArchive, TransactionItem
+
+TRANSACTION_FIELDS = [field.attname for field in Transaction._meta.concrete_fields]
+ITEM_FIELDS = ['id', 'description', 'value', 'quantity']
+DELETE_CHUNK = 500
+COMPRESSION_LEVEL = 9
+
+
+def archive_cutoff(months, today=None):
+    """Primeiro dia do mês de 'months' meses atrás: arquiva só meses completos."""
+    today = today or datetime.date.today()
+    return (today - relativedelta(months=months)).replace(day=1)
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} não serializável")
+
+
+def encode_rows(rows):
+    lines = (json.dumps(row, default=_json_default, ensure_ascii=False) for row in rows)
+    return zlib.compress('\n'.join(lines).encode('utf-8'), COMPRESSION_LEVEL)
+
+
+def decode_rows(data):
+    """Linhas JSON (texto) de um bloco arquivado."""
+    if not data:
+        return []
+    return zlib.decompress(bytes(data)).decode('utf-8').split('\n')
+
+
+# --- ARQUIVAMENTO ---
+
+def months_to_archive(house_id, cutoff):
+    return list(
+        Transaction.objects.filter(house_id=house_id, date__lt=cutoff)
+        .annotate(month=TruncMonth('date')).values_list('month', flat=True)
+        .distinct().order_by('month')
+    )
+
+
+def _add_rollups(house_id, month, rows):
+    totals = {}
+    for row in rows:
+        key = (row['type'], row['category_id'])
+        total, count = totals.get(key, (Decimal('0'), 0))
+        totals[key] = (total + row['value'], count + 1)
+
+    category_ids = {category_id for _, category_id in totals if category_id}
+    names = dict(Category.objects.filter(id__in=category_ids).values_list('id', 'name'))
+    for (type_, category_id), (total, count) in totals.items():
+        # Mês já arquivado antes (linhas que chegaram depois): soma ao que existe
+        updated = MonthlyRollup.objects.filter(
+            house_id=house_id, month=month, type=type_, category_id=category_id,
+        ).update(
+            # Value com o MoneyField: o total vai em centavos, como a coluna
+            total=F('total') + Value(total, output_field=MonthlyRollup._meta.get_field('total')),
+            count=F('count') + count,
+        )
+        if not updated:
+            MonthlyRollup.objects.create(
+                house_id=house_id, month=month, type=type_, category_id=category_id,
+                category_name=names.get(category_id, ''), total=total, count=count,
+            )
+
+
+def _delete_by_ids(model, ids, date_column, month, month_end):
+    # A faixa de datas não muda o resultado, mas deixa o PostgreSQL
+    # particionado (core/partitioning.py) olhar só a partição do mês
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        for start in range(0, len(ids), DELETE_CHUNK):
+            chunk = ids[start:start + DELETE_CHUNK]
+            cursor.execute(
+                f"DELETE FROM {table} WHERE {date_column} >= %s AND {date_column} < %s "
+                f"AND id IN ({', '.join(['%s'] * len(chunk))})",
+                [month, month_end, *chunk],
+            )
+
+
+def archive_month(house_id, month):
+    """Arquiva as transações da casa no mês. Devolve quantas foram arquivadas."""
+    month_end = month + relativedelta(months=1)
+    with transaction.atomic():
+        # Travadas até o commit: o que chegar depois fica para a próxima rodada
+        rows = list(
+            Transaction.objects.select_for_update()
+            .filter(house_id=house_id, date__gte=month, date__lt=month_end)
+            .order_by('id').values(*TRANSACTION_FIELDS)
+        )
+        if not rows:
+            return 0
+        ids = [row['id'] for row in rows]
+        locked = set(ids)
+
+        items = {}
+        item_ids = []
+        for item in TransactionItem.objects.filter(
+            transaction_date__gte=month, transaction_date__lt=month_end,
+            transaction__house_id=house_id, transaction__date__gte=month, transaction__date__lt=month_end,
+        ).order_by('id').values('transaction_id', *ITEM_FIELDS):
+            transaction_id = item.pop('transaction_id')
+            if transaction_id in locked:
+                items.setdefault(transaction_id, []).append(item)
+                item_ids.append(item['id'])
+        for row in rows:
+            row['items'] = items.get(row['id'], [])
+
+        _add_rollups(house_id, month, rows)
+        TransactionArchive.objects.create(house_id=house_id, month=month, row_count=len(rows), data=encode_rows(rows))
+
+        _delete_by_ids(TransactionItem, item_ids, 'transaction_date', month, month_end)
+        _delete_by_ids(Transaction, ids, 'date', month, month_end)
+        record_changes(TransactionItem, house_id, item_ids, DELETE)
+        record_changes(Transaction, house_id, ids, DELETE)
+    return len(rows)
+
+
+def archive_house(house_id, cutoff, progress=None):
+    archived = 0
+    for month in months_to_archive(house_id, cutoff):
+        count = archive_month(house_id, month)
+        archived += count
+        if progress:
+            progress(house_id, month, count)
+    return archived
+
+
+# --- LEITURA ---
+
+def iter_archived(user, house_id, start=None, end=None):
+    """
+    Linhas JSON (com '\\n') das transações arquivadas que o usuário pode ver
+    (as dele e as compartilhadas), de 'start' até 'end' (exclusivo).
+    Descompacta um bloco por vez.
+    """
+    archives = TransactionArchive.objects.filter(house_id=house_id).order_by('month', 'id')
+    if start:
+        archives = archives.filter(month__gte=start)
+    if end:
+        archives = archives.filter(month__lt=end)
+    for archive in archives.only('data').iterator(chunk_size=10):
+        for line in decode_rows(archive.data):
+            row = json.loads(line)
+            if row['is_shared'] or row['owner_id'] == user.id:
+                yield line + '\n'
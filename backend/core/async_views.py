@@ -0,0 +1,181 @@
+"""
+Versões assíncronas (ASGI) dos endpoints de leitura mais acessados.
+
+Mesmas respostas de /history/, /transactions/ e das chamadas que o Dashboard
+faz ao abrir (contas, cartões, contas fixas, transações e /me/), usando o ORM
+assíncrono (aiterator, aaggregate). Sob um servidor ASGI
+(uvicorn config.asgi:application) uma requisição esperando o banco não prende
+um worker: o event loop segue atendendo as demais.
+
+As consultas independentes de cada endpoint são disparadas juntas com
+asyncio.gather. Enquanto o Django não tiver drivers de banco assíncronos, o
+ORM assíncrono executa as queries de uma requisição numa thread própria dela,
+uma de cada vez; a concorrência real é entre requisições.
+
+Autenticação só por Token (header Authorization ou ?token=), como /events/.
+Comparação de vazão com as versões síncronas: manage.py compare_async.
+"""
+import asyncio
+import functools
+
+from asgiref.sync import sync_to_async
+from django.db.models import Q, Sum
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from .db_router import replica_reads
+from .fastpath import build_plan, render_rows
+from .models import Account, CreditCard, Invoice, RecurringBill, Transaction, TransactionItem
+from .serializers import (
+    AccountSerializer, CreditCardSerializer, RecurringBillSerializer, TransactionSerializer,
+    current_month_range,
+)
+from .throttling import heavy_request
+from .views import (
+    TransactionViewSet, build_history, current_user_data, history_rollups, history_transactions,
+    token_user, visible_transactions,
+)
+
+
+def _json(data):
+    # Mesmo renderer do DRF: datas, Decimals e floats saem iguais aos da versão síncrona
+    return HttpResponse(JSONRenderer().render(data), content_type='application/json')
+
+
+def token_required(view):
+    @functools.wraps(view)
+    async def wrapper(request):
+        user = await token_user(request)
+        if user is None:
+            return JsonResponse({'detail': 'Token inválido ou ausente.'}, status=401)
+        house_id = user.house_member.house_id if hasattr(user, 'house_member') else None
+        return await view(request, user, house_id)
+    return require_GET(wrapper)
+
+
+async def _alist(queryset):
+    return [obj async for obj in queryset.aiterator()]
+
+
+# --- CONSULTAS ---
+
+async def _item_ids(transactions):
+    # Subquery em vez da lista de pks: roda junto com a query das transações
+    items = {}
+    # .values() e não .values_list(): o aiterator() de tuplas executa a query
+    # antes de sair do event loop (SynchronousOnlyOperation)
+    rows = TransactionItem.objects.filter(
+        transaction__in=transactions.values('pk')
+    ).order_by('id').values('transaction_id', 'id')
+    async for row in rows.aiterator():
+        items.setdefault(row['transaction_id'], []).append(row['id'])
+    return items
+
+
+async def _transactions(request, user, house_id):
+    context = {'request': Request(request)}
+    queryset = visible_transactions(user, house_id)
+    plan = build_plan(
+        TransactionSerializer(context=context),
+        TransactionViewSet.fast_list_computed, TransactionViewSet.fast_list_many,
+    )
+    if plan is None:
+        # Campo sem equivalente em .values(): serializer normal, numa thread
+        queryset = queryset.select_related('category', 'owner', 'account', 'credit_card')
+        return await sync_to_async(
+            lambda: TransactionSerializer(queryset.prefetch_related('items'), many=True, context=context).data
+        )()
+    columns, lookups, many = plan
+
+    related = {}
+    if 'items' in many:
+        rows, related['items'] = await asyncio.gather(
+            _alist(queryset.values(*lookups)), _item_ids(queryset),
+        )
+    else:
+        rows = await _alist(queryset.values(*lookups))
+    return render_rows(rows, columns, related)
+
+
+async def _accounts(user, house_id):
+    queryset = Account.objects.filter(house_id=house_id).filter(Q(is_shared=True) | Q(owner=user))
+    return AccountSerializer(await _alist(queryset), many=True).data
+
+
+async def _pending_invoices(cards):
+    # Primeira fatura não paga de cada cartão, numa query só
+    pending = {}
+    queryset = Invoice.objects.filter(card__in=cards.values('pk')).exclude(
+        status='PAID'
+    ).order_by('reference_date', 'id')
+    async for invoice in queryset.aiterator():
+        pending.setdefault(invoice.card_id, invoice)
+    return pending
+
+
+async def _credit_cards(user, house_id):
+    cards = CreditCard.objects.filter(house_id=house_id).filter(Q(is_shared=True) | Q(owner=user))
+    rows, pending = await asyncio.gather(_alist(cards), _pending_invoices(cards))
+    return CreditCardSerializer(rows, many=True, context={'pending_invoices': pending}).data
+
+
+async def _recurring_bills(house_id):
+    month_start, month_end = current_month_range()
+    paid = Transaction.objects.filter(
+        recurring_bill__house_id=house_id, date__gte=month_start, date__lt=month_end
+    ).values_list('recurring_bill_id', flat=True).distinct()
+    bills, paid_ids = await asyncio.gather(
+        _alist(RecurringBill.objects.filter(house_id=house_id).select_related('category')),
+        _alist(paid),
+    )
+    return RecurringBillSerializer(bills, many=True, context={'paid_bill_ids': set(paid_ids)}).data
+
+
+# --- ENDPOINTS ---
+
+@heavy_request
+@replica_reads
+@token_required
+async def history(request, user, house_id):
+    """GET /async/history/ - mesma resposta de /history/."""
+    if house_id is None:
+        return _json([])
+    transactions, estimated, rollups = await asyncio.gather(
+        _alist(history_transactions(house_id)),
+        RecurringBill.objects.filter(house_id=house_id, is_active=True).aaggregate(total=Sum('base_value')),
+        _alist(history_rollups(house_id)),
+    )
+    return _json(build_history(transactions, estimated['total'] or 0, rollups))
+
+
+@replica_reads
+@token_required
+async def transactions(request, user, house_id):
+    """GET /async/transactions/ - mesma resposta de /transactions/ (aceita ?fields=)."""
+    if house_id is None:
+        return _json([])
+    return _json(await _transactions(request, user, house_id))
+
+
+@replica_reads
+@token_required
+async def dashboard(request, user, house_id):
+    """
+    GET /async/dashboard/ - tudo que o Dashboard carrega ao abrir, numa requisição:
+        {"accounts": [...], "credit_cards": [...], "recurring_bills": [...],
+         "transactions": [...], "me": {...}}
+    Cada lista é igual à do endpoint síncrono correspondente.
+    """
+    data = {'accounts': [], 'credit_cards': [], 'recurring_bills': [], 'transactions': []}
+    if house_id is not None:
+        accounts, cards, bills, transactions = await asyncio.gather(
+            _accounts(user, house_id),
+            _credit_cards(user, house_id),
+            _recurring_bills(house_id),
+            _transactions(request, user, house_id),
+        )
+        data = {'accounts': accounts, 'credit_cards': cards, 'recurring_bills': bills, 'transactions': transactions}
+    data['me'] = current_user_data(user)
+    return _json(data)
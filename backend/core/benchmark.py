@@ -0,0 +1,247 @@
+"""
+Benchmark dos endpoints principais.
+
+Semeia um conjunto fixo de dados (generate_load_data com seed fixa), chama
+cada endpoint pelo APIClient do DRF e mede latência (p50/p95/p99) e número de
+queries. São dois baselines:
+- queries: versionado em core/benchmark_baseline.json. Não depende da
+  máquina, vale em qualquer lugar (inclusive no teste);
+- latência: local, em benchmark_local.json (fora do git), gravado nesta
+  máquina com run_benchmarks --update-baseline. Milissegundos de um
+  computador não servem de régua para outro.
+
+Uso: python manage.py run_benchmarks   (ou RUN_BENCHMARKS=1 manage.py test core --tag benchmark,
+que confere só as queries)
+
+A vazão das views assíncronas contra as síncronas (servidores de verdade, via
+HTTP, mesma concorrência) fica em throughput()/compare_async.
+"""
+import datetime
+import gc
+import io
+import json
+import os
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .models import HouseMember, Account, CreditCard, ShoppingList, InventoryItem
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'benchmark_baseline.json')
+LOCAL_BASELINE_PATH = os.path.join(settings.BASE_DIR, 'benchmark_local.json')
+LATENCY_KEYS = ('p50_ms', 'p95_ms', 'p99_ms')
+
+# Tamanho fixo do conjunto de dados: mudar isso invalida o baseline
+DATASET = {
+    'houses': 1,
+    'members': 3,
+    'accounts': 4,
+    'cards': 5,
+    'months': 24,
+    'transactions': 3000,
+    'products': 200,
+    'recurring_bills': 10,
+    'seed': 2024,
+    'prefix': 'bench',
+}
+
+
+class Endpoint:
+    def __init__(self, name, method, path, body=None, setup=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body
+        self.setup = setup
+
+
+# --- PREPARAÇÃO DAS ESCRITAS (fora da medição) ---
+
+def _fill_cart(context):
+    house = context['house']
+    items = list(InventoryItem.objects.filter(house=house).select_related('product')[:10])
+    for item in items:
+        ShoppingList.objects.update_or_create(
+            house=house, product=item.product,
+            defaults={'quantity_to_buy': 2, 'real_unit_price': item.product.estimated_price, 'is_purchased': True},
+        )
+    Account.objects.filter(id=context['account'].id).update(balance=Decimal('1000000'))
+
+
+def _refill_card(context):
+    CreditCard.objects.filter(id=context['card'].id).update(limit_available=Decimal('1000000'))
+
+
+def endpoints(context):
+    today = datetime.date.today().isoformat()
+    return [
+        Endpoint('transactions-list', 'get', '/api/transactions/'),
+        Endpoint('inventory-list', 'get', '/api/inventory/'),
+        Endpoint('history', 'get', '/api/history/'),
+        Endpoint('credit-cards', 'get', '/api/credit-cards/'),
+        Endpoint('recurring-bills', 'get', '/api/recurring-bills/'),
+        Endpoint('shopping-list', 'get', '/api/shopping-list/'),
+        Endpoint('shopping-list-finish', 'post', '/api/shopping-list/finish/', body={
+            'payment_method': 'ACCOUNT', 'source_id': context['account'].id,
+            'total_value': '50.00', 'date': today,
+        }, setup=_fill_cart),
+        Endpoint('transactions-create-installments', 'post', '/api/transactions/', body={
+            'description': 'Benchmark parcelado', 'value': '1200.00', 'type': 'EXPENSE',
+            'payment_method': 'CREDIT_CARD', 'card': context['card'].id, 'installments': 12, 'date': today,
+        }, setup=_refill_card),
+    ]
+
+
+# --- EXECUÇÃO ---
+
+def seed():
+    """Cria o conjunto de dados e devolve o contexto (usuário, casa, conta, cartão)."""
+    call_command('generate_load_data', stdout=io.StringIO(), **DATASET)
+    member = HouseMember.objects.select_related('user', 'house').get(
+        user__username=f"{DATASET['prefix']}_{DATASET['seed']}_0_0"
+    )
+    return {
+        'user': member.user,
+        'house': member.house,
+        'account': Account.objects.filter(house=member.house, owner=member.user).order_by('id').first(),
+        'card': CreditCard.objects.filter(house=member.house, owner=member.user).order_by('id').first(),
+    }
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def run(context, iterations=20, warmup=2, only=None):
+    client = APIClient()
+    client.force_authenticate(user=context['user'])
+    results = {}
+
+    for endpoint in endpoints(context):
+        if only and endpoint.name not in only:
+            continue
+
+        timings = []
+        queries = 0
+        for i in range(warmup + iterations):
+            if endpoint.setup:
+                endpoint.setup(context)
+            # O log de queries é limitado (deque): zera para a contagem não saturar
+            connection.queries_log.clear()
+            # Como no timeit: coleta antes e desliga o GC durante a medição
+            gc.collect()
+            gc.disable()
+            try:
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    response = getattr(client, endpoint.method)(endpoint.path, endpoint.body, format='json')
+                    elapsed = (time.perf_counter() - start) * 1000
+            finally:
+                gc.enable()
+            if response.status_code >= 400:
+                raise AssertionError(f"{endpoint.name}: HTTP {response.status_code} {getattr(response, 'data', '')}")
+            if i >= warmup:
+                timings.append(elapsed)
+                queries = max(queries, len(captured))
+
+        results[endpoint.name] = {
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'p99_ms': round(percentile(timings, 99), 2),
+            'queries': queries,
+        }
+    return results
+
+
+# --- BASELINE ---
+
+def load_baseline(path=BASELINE_PATH):
+    with open(path, encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+def save_baseline(results, path=BASELINE_PATH, keys=('queries',)):
+    """Grava só as chaves pedidas: queries no versionado, LATENCY_KEYS no local."""
+    data = {name: {key: r[key] for key in keys} for name, r in results.items()}
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(data, fh, indent=2, sort_keys=True)
+        fh.write('\n')
+
+
+def compare(results, baseline, tolerance=0.5, query_tolerance=0):
+    """
+    Lista as regressões: p95 acima de baseline * (1 + tolerance) ou mais
+    queries do que o baseline (+ query_tolerance). Confere só o que o
+    baseline tem (queries no versionado, latência no local).
+    """
+    regressions = []
+    for name, current in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if 'p95_ms' in expected:
+            limit_ms = expected['p95_ms'] * (1 + tolerance)
+            if current['p95_ms'] > limit_ms:
+                regressions.append(
+                    f"{name}: p95 {current['p95_ms']} ms > {limit_ms:.2f} ms (baseline {expected['p95_ms']} ms)"
+                )
+        if 'queries' in expected and current['queries'] > expected['queries'] + query_tolerance:
+            regressions.append(
+                f"{name}: {current['queries']} queries > baseline {expected['queries']}"
+            )
+    return regressions
+
+
+# --- VAZÃO: SÍNCRONO x ASSÍNCRONO (HTTP) ---
+
+# Nome -> (caminhos da versão síncrona, caminhos da versão assíncrona).
+# Uma "operação" é a sequência inteira: o Dashboard síncrono faz 5 chamadas.
+ASYNC_COMPARISONS = {
+    'history': (['/api/history/'], ['/api/async/history/']),
+    'transactions': (['/api/transactions/'], ['/api/async/transactions/']),
+    'dashboard': (
+        ['/api/accounts/', '/api/credit-cards/', '/api/recurring-bills/', '/api/transactions/', '/api/me/'],
+        ['/api/async/dashboard/'],
+    ),
+}
+
+
+def _fetch(base_url, paths, token):
+    for path in paths:
+        request = urllib.request.Request(base_url.rstrip('/') + path, headers={'Authorization': f'Token {token}'})
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+
+
+def throughput(base_url, paths, token, concurrency=10, operations=200):
+    """
+    Executa 'operations' vezes a sequência 'paths' com 'concurrency' clientes
+    simultâneos e devolve vazão (operações/s) e latência por operação.
+    """
+    def timed(_):
+        start = time.perf_counter()
+        _fetch(base_url, paths, token)
+        return (time.perf_counter() - start) * 1000
+
+    # Aquecimento: uma operação por cliente
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(timed, range(concurrency)))
+        start = time.perf_counter()
+        timings = list(pool.map(timed, range(operations)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        'ops_per_s': round(operations / elapsed, 1),
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+    }
+
@@ -0,0 +1,261 @@
+"""
+Categorização automática por regras da casa (CategoryRule).
+
+As regras ativas de uma casa são compiladas num RuleMatcher: lista em ordem
+de prioridade com o teste de texto pronto de cada regra (substring e prefixo
+comparam a descrição em casefold com 'in'/startswith; regex vira re.Pattern).
+Para cada transação, tipo e faixa de valor (inteiros) são conferidos antes do
+texto, e a primeira regra que casa dá a categoria.
+
+O matcher fica num cache por processo, com a chave (casa,
+House.rules_version). Salvar ou apagar uma regra, ou mudar uma categoria da
+casa, sobe a versão (signals abaixo), e cada processo recompila na próxima
+vez que vir a casa. Casa com versão 0 nunca teve regras: nem consulta o banco.
+
+Aplicada no POST /transactions/ (sem categoria informada) e em lote pelo
+manage.py recategorize.
+
+Regex de regra roda no re do Python, sem limite de tempo, dentro das
+requisições: só vale um subconjunto sem backtracking explosivo (ver
+regex_problem). A descrição também é cortada no tamanho da coluna.
+"""
+import re
+import threading
+
+# Parser interno do re: é a árvore que o próprio re compila, mas não é API
+# pública. Python 3.11+ em re._parser; 3.10 só nos módulos sre_* (sem grupo
+# atômico nem repetição possessiva).
+try:
+    from re import _constants as sre, _parser as sre_parse
+except ImportError:
+    try:
+        import sre_constants as sre
+        import sre_parse
+    except ImportError as e:
+        raise ImportError(
+            'core.categorization valida as regex de regra com o parser interno do re '
+            '(re._parser ou sre_parse), que este Python não tem'
+        ) from e
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .changelog import record_changes
+from .models import Category, CategoryRule, House, Transaction
+from .money import cents, to_cents
+
+CACHE_SIZE = 500  # casas por processo
+MAX_REGEX_REPEATS = 2  # com 100 caracteres, o pior caso do search fica em ~100³ passos
+MAX_TEXT = Transaction._meta.get_field('description').max_length
+
+# None no 3.10, que não tem essas construções
+ATOMIC_GROUP = getattr(sre, 'ATOMIC_GROUP', None)
+REPEATS = (sre.MAX_REPEAT, sre.MIN_REPEAT, getattr(sre, 'POSSESSIVE_REPEAT', None))
+
+
+def regex_problem(pattern):
+    """
+    Motivo para recusar o regex, ou None. Fora do subconjunto: repetição
+    dentro de repetição ((a+)+), alternativa dentro de repetição ((a|ab)*),
+    referência a grupo, lookahead/lookbehind e mais de MAX_REGEX_REPEATS
+    repetições (a*a*a*...): são as formas que fazem o re levar tempo
+    exponencial (ou polinomial alto) para falhar.
+    """
+    repeats = 0
+
+    def walk(items, in_repeat):
+        nonlocal repeats
+        for op, av in items:
+            if op in REPEATS:
+                low, high, body = av
+                if high > 1:
+                    if in_repeat:
+                        return 'repetição dentro de repetição não é permitida'
+                    repeats += 1
+                problem = walk(body, in_repeat or high > 1)
+            elif op == sre.SUBPATTERN:
+                problem = walk(av[3], in_repeat)
+            elif op == ATOMIC_GROUP:
+                problem = walk(av, in_repeat)
+            elif op == sre.BRANCH:
+                if in_repeat:
+                    return 'alternativa dentro de repetição não é permitida'
+                problem = next(filter(None, (walk(branch, in_repeat) for branch in av[1])), None)
+            elif op in (sre.GROUPREF, sre.GROUPREF_EXISTS):
+                return 'referência a grupo não é permitida'
+            elif op in (sre.ASSERT, sre.ASSERT_NOT):
+                return 'lookahead/lookbehind não é permitido'
+            else:
+                problem = None
+            if problem:
+                return problem
+        return None
+
+    problem = walk(sre_parse.parse(pattern), False)
+    if not problem and repeats > MAX_REGEX_REPEATS:
+        problem = f'no máximo {MAX_REGEX_REPEATS} repetições (*, +, {{m,n}})'
+    return problem
+
+
+def text_test(kind, pattern):
+    """Função texto (já em casefold) -> bool; None quando a regra não olha o texto."""
+    if not pattern:
+        return None
+    if kind == 'REGEX':
+        problem = regex_problem(pattern)
+        if problem:
+            raise re.error(problem)
+        return re.compile(pattern, re.IGNORECASE).search
+    needle = pattern.casefold()
+    if kind == 'PREFIX':
+        return lambda text: text.startswith(needle)
+    return lambda text: needle in text
+
+
+def validate_pattern(kind, pattern):
+    """Mensagem de erro, ou None se o padrão serve."""
+    try:
+        text_test(kind, pattern)
+    except re.error as e:
+        return f'Expressão regular inválida: {e}'
+    return None
+
+
+class RuleMatcher:
+    def __init__(self, rules):
+        # rules: (id, kind, pattern, mínimo, máximo em centavos, categoria, tipo), já em prioridade
+        self.rules = []
+        for _id, kind, pattern, low, high, category_id, category_type in rules:
+            try:
+                test = text_test(kind, pattern)
+            except re.error:
+                continue  # inválida ou fora do subconjunto seguro (gravada sem passar pela API)
+            self.rules.append((test, low, high, category_id, category_type))
+
+    def match(self, description, value_cents, transaction_type):
+        text = None
+        for test, low, high, category_id, category_type in self.rules:
+            if category_type != transaction_type:
+                continue
+            if (low is not None and value_cents < low) or (high is not None and value_cents > high):
+                continue
+            if test is not None:
+                if text is None:
+                    text = (description or '')[:MAX_TEXT].casefold()
+                if not test(text):
+                    continue
+            return category_id
+        return None
+
+
+EMPTY = RuleMatcher([])
+
+
+class CompiledRules:
+    """Cache por processo: {casa: (versão, RuleMatcher)}."""
+
+    def __init__(self, size):
+        self.size = size
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, house_id, version):
+        if not version:
+            return EMPTY
+        with self._lock:
+            entry = self._entries.get(house_id)
+        if entry and entry[0] == version:
+            return entry[1]
+
+        matcher = RuleMatcher(_rule_rows(house_id))
+        with self._lock:
+            self._entries.pop(house_id, None)
+            while len(self._entries) >= self.size:
+                del self._entries[next(iter(self._entries))]  # a mais antiga
+            self._entries[house_id] = (version, matcher)
+        return matcher
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _rule_rows(house_id):
+    return list(
+        CategoryRule.objects.filter(house_id=house_id, is_active=True)
+        .order_by('priority', 'id')
+        .values_list('id', 'kind', 'pattern', cents('min_value'), cents('max_value'), 'category_id', 'category__type')
+    )
+
+
+compiled = CompiledRules(CACHE_SIZE)
+
+
+def matcher_for(house):
+    return compiled.get(house.pk, house.rules_version)
+
+
+def categorize(house, description, value, transaction_type):
+    """Categoria (id) das regras da casa para uma transação nova, ou None."""
+    return matcher_for(house).match(description, to_cents(value), transaction_type)
+
+
+# --- EM LOTE (manage.py recategorize) ---
+
+def recategorize_house(house, batch_size=5000):
+    """
+    Aplica as regras às transações sem categoria da casa, em lotes por id
+    (keyset: cada lote é uma query curta no índice da chave primária). As
+    escritas de cada lote são um UPDATE por categoria (WHERE id IN ...).
+    Devolve quantas transações ganharam categoria.
+    """
+    matcher = matcher_for(house)
+    if not matcher.rules:
+        return 0
+    pending = Transaction.objects.filter(house_id=house.pk, category__isnull=True).order_by('id')
+    last_id, total = 0, 0
+    while True:
+        rows = list(
+            pending.filter(id__gt=last_id)
+            .values_list('id', 'description', cents('value'), 'type')[:batch_size]
+        )
+        if not rows:
+            return total
+        last_id = rows[-1][0]
+        matched = {}
+        for pk, description, value, transaction_type in rows:
+            category_id = matcher.match(description, value, transaction_type)
+            if category_id:
+                matched.setdefault(category_id, []).append(pk)
+        now = timezone.now()  # update() não passa pelo auto_now (versão do extrato, core/statements.py)
+        with transaction.atomic():
+            for category_id, ids in matched.items():
+                Transaction.objects.filter(id__in=ids).update(category_id=category_id, updated_at=now)
+                record_changes(Transaction, house.pk, ids)
+        total += sum(len(ids) for ids in matched.values())
+
+
+# --- INVALIDAÇÃO ---
+
+def bump_version(house_id):
+    House.objects.filter(pk=house_id).update(rules_version=F('rules_version') + 1)
+
+
+def _on_rule_change(sender, instance, **kwargs):
+    bump_version(instance.house_id)
+
+
+def _on_category_save(sender, instance, created, **kwargs):
+    # O tipo da categoria entra no matcher compilado; casa sem regras não paga o UPDATE
+    if not created:
+        House.objects.filter(pk=instance.house_id, rules_version__gt=0).update(
+            rules_version=F('rules_version') + 1
+        )
+
+
+def connect_signals():
+    post_save.connect(_on_rule_change, sender=CategoryRule, dispatch_uid='categorization_rule_save')
+    post_delete.connect(_on_rule_change, sender=CategoryRule, dispatch_uid='categorization_rule_delete')
+    post_save.connect(_on_category_save, sender=Category, dispatch_uid='categorization_category_save')
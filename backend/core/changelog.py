@@ -0,0 +1,141 @@
+"""
+Log de alterações por casa (ChangeLogEntry), base do endpoint /sync/.
+
+Cada save/delete de um model da casa grava uma entrada com um número de
+sequência crescente por casa. O contador fica em House.change_seq e é
+incrementado com UPDATE na mesma transação da alteração: o lock da linha da
+casa garante que os seqs aparecem na ordem de commit, então um cliente que
+já viu o seq N nunca perde uma alteração N-1 confirmada depois.
+
+Escritas que não disparam signals (bulk_create, bulk_update, queryset.update)
+chamam record_changes() explicitamente.
+"""
+from django.db import connection
+from django.db.models.signals import post_delete, post_save
+
+from . import events
+from .models import (
+    House, HouseMember, Category, Account, CreditCard, Invoice, RecurringBill,
+    Transaction, TransactionItem, Product, InventoryItem, ShoppingList,
+    HouseInvitation, ChangeLogEntry,
+)
+
+UPSERT = 'UPSERT'
+DELETE = 'DELETE'
+
+# Model -> caminho até o id da casa
+TRACKED_MODELS = {
+    HouseMember: 'house_id',
+    Category: 'house_id',
+    Account: 'house_id',
+    CreditCard: 'house_id',
+    Invoice: 'card.house_id',
+    RecurringBill: 'house_id',
+    Transaction: 'house_id',
+    TransactionItem: 'transaction.house_id',
+    Product: 'house_id',
+    InventoryItem: 'house_id',
+    ShoppingList: 'house_id',
+    HouseInvitation: 'house_id',
+}
+
+
+def model_name(model):
+    return model._meta.model_name
+
+
+def house_id_for(instance):
+    value = instance
+    for attr in TRACKED_MODELS[type(instance)].split('.'):
+        value = getattr(value, attr, None)
+        if value is None:
+            return None
+    return value
+
+
+def allocate_seqs(house_id, count):
+    """
+    Reserva 'count' seqs da casa e devolve o último (ou None se a casa não
+    existe mais, por exemplo no meio de uma exclusão em cascata).
+    """
+    table = House._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                f"UPDATE {table} SET change_seq = change_seq + %s WHERE id = %s RETURNING change_seq",
+                [count, house_id],
+            )
+            row = cursor.fetchone()
+        else:
+            cursor.execute(f"UPDATE {table} SET change_seq = change_seq + %s WHERE id = %s", [count, house_id])
+            row = None
+            if cursor.rowcount:
+                cursor.execute(f"SELECT change_seq FROM {table} WHERE id = %s", [house_id])
+                row = cursor.fetchone()
+    return row[0] if row else None
+
+
+# PostgreSQL: reserva os seqs e grava as entradas num único comando
+POSTGRES_RECORD = """
+WITH reserved AS (
+    UPDATE core_house SET change_seq = change_seq + %(count)s WHERE id = %(house)s RETURNING change_seq
+)
+INSERT INTO core_changelogentry (house_id, seq, model, object_id, op, created_at)
+SELECT %(house)s, reserved.change_seq - %(count)s + ids.ord, %(model)s, ids.object_id, %(op)s, now()
+FROM reserved, unnest(%(ids)s::text[]) WITH ORDINALITY AS ids(object_id, ord)
+RETURNING seq
+"""
+
+
+def record_changes(model, house_id, object_ids, op=UPSERT):
+    """
+    Grava uma entrada por objeto, com seqs consecutivos (1 comando no
+    PostgreSQL, 2 nos demais), e avisa as conexões SSE da casa.
+    """
+    object_ids = [str(pk) for pk in object_ids]
+    if house_id is None or not object_ids:
+        return
+    name = model_name(model)
+
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(POSTGRES_RECORD, {
+                'count': len(object_ids), 'house': house_id, 'model': name,
+                'ids': object_ids, 'op': op,
+            })
+            seqs = [row[0] for row in cursor.fetchall()]
+        last = max(seqs) if seqs else None
+    else:
+        last = allocate_seqs(house_id, len(object_ids))
+        if last is not None:
+            first = last - len(object_ids) + 1
+            ChangeLogEntry.objects.bulk_create([
+                ChangeLogEntry(house_id=house_id, seq=first + i, model=name, object_id=pk, op=op)
+                for i, pk in enumerate(object_ids)
+            ])
+
+    if last is not None:
+        events.publish(house_id, {'seq': last, 'model': name, 'op': op, 'ids': object_ids})
+
+
+# --- SIGNALS ---
+
+def _on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return  # loaddata
+    record_changes(sender, house_id_for(instance), [instance.pk], UPSERT)
+
+
+def _on_delete(sender, instance, origin=None, **kwargs):
+    # Casa inteira sendo apagada: o log dela vai junto
+    if isinstance(origin, House):
+        return
+    # Em cascata (ex.: cartão -> faturas) a origem já diz a casa, sem query extra
+    house_id = getattr(origin, 'house_id', None) or house_id_for(instance)
+    record_changes(sender, house_id, [instance.pk], DELETE)
+
+
+def connect_signals():
+    for model in TRACKED_MODELS:
+        post_save.connect(_on_save, sender=model, dispatch_uid=f'changelog_save_{model_name(model)}')
+        post_delete.connect(_on_delete, sender=model, dispatch_uid=f'changelog_delete_{model_name(model)}')
@@ -0,0 +1,111 @@
+"""
+Leituras em réplica (alias 'replica', ver DATABASE_REPLICA_URL).
+
+Por padrão tudo vai para o primário. Uma requisição só lê da réplica quando:
+- o método é seguro (GET/HEAD/OPTIONS);
+- a view aceita dados com alguns segundos de atraso: atributo
+  replica_reads = True nas views DRF, decorator replica_reads nas assíncronas;
+- o cliente não gravou nada nos últimos REPLICA_STICKY_SECONDS segundos;
+- não há transação aberta no primário.
+
+Assim que a requisição grava (db_for_write), as leituras seguintes dela voltam
+para o primário, e o cliente fica "preso" ao primário pelo tempo configurado:
+quem acabou de gravar sempre lê o que gravou.
+
+O estado fica numa ContextVar: vale para views síncronas e assíncronas, e
+fora de requisições (comandos, testes) tudo continua no primário.
+"""
+import contextvars
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+PRIMARY = 'default'
+REPLICA = 'replica'
+
+# Autenticação e vínculo com a casa: lidos no primário sempre. São buscas por
+# chave, baratas, e o atraso da réplica derrubaria o primeiro acesso de quem
+# acabou de entrar ou de gerar o token.
+PRIMARY_ONLY_MODELS = {'authtoken.token', 'auth.user', 'core.housemember'}
+
+
+class RouteState:
+    def __init__(self):
+        self.replica = False
+        self.wrote = False
+
+
+_state = contextvars.ContextVar('db_route_state', default=None)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def begin_request():
+    return _state.set(RouteState())
+
+
+def end_request(token):
+    _state.reset(token)
+
+
+def current_state():
+    return _state.get()
+
+
+def replica_reads(view):
+    """Marca uma view (função) como apta a ler da réplica."""
+    view.replica_reads = True
+    return view
+
+
+# --- CLIENTE PRESO AO PRIMÁRIO ---
+
+def client_key(request):
+    # O token identifica o cliente sem consultar o banco
+    header = request.headers.get('Authorization', '')
+    credential = header if header else request.GET.get('token', '')
+    if not credential:
+        return None
+    return 'replica-pin:' + hashlib.sha256(credential.encode('utf-8')).hexdigest()[:32]
+
+
+def pin_client(request):
+    key = client_key(request)
+    if key:
+        cache.set(key, True, settings.REPLICA_STICKY_SECONDS)
+
+
+def client_is_pinned(request):
+    key = client_key(request)
+    return bool(key and cache.get(key))
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.replica or state.wrote:
+            return PRIMARY
+        if model._meta.label_lower in PRIMARY_ONLY_MODELS:
+            return PRIMARY
+        if connections[PRIMARY].in_atomic_block:
+            # Transação aberta no primário (inclusive a de cada TestCase): o que
+            # ela gravou ainda não foi commitado, a réplica não enxerga
+            return PRIMARY
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Mesmos dados nos dois aliases
+        aliases = {PRIMARY, REPLICA}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
@@ -0,0 +1,176 @@
+"""
+Eventos em tempo real da casa (Server-Sent Events, ver views.house_events).
+
+- EventHub: pub/sub dentro do processo. Cada conexão SSE é só uma corrotina
+  com uma fila asyncio; nenhuma thread ou conexão de banco fica presa.
+- Broker: leva o evento do processo que gravou até os hubs de todos os
+  workers. PostgresBroker usa NOTIFY/LISTEN; InMemoryBroker entrega só no
+  próprio processo (testes, SQLite, um único worker).
+
+As alterações chegam pelo log de alterações (changelog.record_changes); o
+evento carrega o seq, e o cliente busca os dados em /sync/.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'domo_house_changes'
+# Limite do payload do NOTIFY é 8000 bytes
+MAX_PAYLOAD_BYTES = 7900
+
+
+class EventHub:
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = {}  # house_id -> set de filas
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def subscribe(self, house_id):
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(house_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, house_id, queue):
+        with self._lock:
+            queues = self._subscribers.get(house_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[house_id]
+
+    def subscriber_count(self, house_id=None):
+        if house_id is not None:
+            return len(self._subscribers.get(house_id, ()))
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def dispatch(self, house_id, event):
+        """Entrega o evento às conexões da casa. Pode ser chamado de qualquer thread."""
+        loop = self._loop
+        if loop is None or loop.is_closed() or house_id not in self._subscribers:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._deliver(house_id, event)
+        else:
+            loop.call_soon_threadsafe(self._deliver, house_id, event)
+
+    def _deliver(self, house_id, event):
+        with self._lock:
+            queues = list(self._subscribers.get(house_id, ()))
+        for queue in queues:
+            if queue.full():
+                # Cliente lento: perde o evento mais antigo (o /sync/ recupera pelo seq)
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+
+class InMemoryBroker:
+    """Entrega direto no hub do processo, depois do commit."""
+
+    def __init__(self, hub):
+        self.hub = hub
+
+    def start(self):
+        pass
+
+    def publish(self, house_id, event):
+        transaction.on_commit(lambda: self.hub.dispatch(house_id, event))
+
+
+class PostgresBroker:
+    """
+    NOTIFY na mesma transação da alteração (o PostgreSQL só entrega no commit)
+    e uma thread por processo em LISTEN repassando para o hub local.
+    """
+
+    def __init__(self, hub):
+        self.hub = hub
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._listen, name='events-listen', daemon=True)
+                self._thread.start()
+
+    def publish(self, house_id, event):
+        payload = json.dumps({'house': house_id, 'event': event})
+        if len(payload.encode('utf-8')) > MAX_PAYLOAD_BYTES:
+            event = {key: value for key, value in event.items() if key != 'ids'}
+            payload = json.dumps({'house': house_id, 'event': event})
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [CHANNEL, payload])
+
+    def _connect(self):
+        # Conexão própria em autocommit, fora das conexões do Django
+        conn = connection.Database.connect(**connection.get_connection_params())
+        conn.autocommit = True
+        return conn
+
+    def _listen(self):
+        while True:
+            conn = None
+            try:
+                conn = self._connect()
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CHANNEL}")
+                while True:
+                    if select.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        data = json.loads(notify.payload)
+                        self.hub.dispatch(data['house'], data['event'])
+            except Exception:
+                logger.exception('LISTEN de eventos caiu; reconectando em 5s')
+                time.sleep(5)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+
+hub = EventHub(queue_size=settings.EVENTS_QUEUE_SIZE)
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            if settings.EVENTS_BROKER:
+                broker_class = import_string(settings.EVENTS_BROKER)
+            elif connection.vendor == 'postgresql':
+                broker_class = PostgresBroker
+            else:
+                broker_class = InMemoryBroker
+            _broker = broker_class(hub)
+        return _broker
+
+
+def publish(house_id, event):
+    # Evento é "melhor esforço": nunca derruba a escrita que o gerou
+    try:
+        get_broker().publish(house_id, event)
+    except Exception:
+        logger.exception('Falha ao publicar evento da casa %s', house_id)
@@ -0,0 +1,137 @@
+"""
+Header Idempotency-Key nos POSTs que movem dinheiro (@idempotent).
+
+A primeira requisição com uma chave roda a view e grava a resposta em
+IdempotencyKey, na mesma transação das escritas da view: ou as duas ficam, ou
+nenhuma. As repetições (mesmo usuário e chave, até IDEMPOTENCY_KEY_TTL_HOURS)
+recebem a resposta gravada, com o header Idempotent-Replayed, sem passar pelo
+saldo, faturas ou estoque. A mesma chave com outro corpo ou rota é 422.
+
+Duplicatas simultâneas ficam em fila na chave: o INSERT da segunda espera no
+índice único até a primeira terminar (PostgreSQL); se a primeira gravou, a
+segunda devolve a resposta dela, se desfez, a segunda roda a view.
+
+Respostas de erro (>= 400) não são guardadas: tudo é desfeito e o retry roda
+de novo. Cada processo mantém as respostas recentes num cache em memória
+(IDEMPOTENCY_CACHE_SIZE) na frente da tabela; as linhas vencidas saem com
+manage.py expire_idempotency_keys.
+"""
+import datetime
+import functools
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction as db_transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+class RecentResponses:
+    """Cache por processo: {(usuário, chave): (vence em, fingerprint, status, corpo)}."""
+
+    def __init__(self, size):
+        self.size = size
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id, key):
+        with self._lock:
+            entry = self._entries.get((user_id, key))
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[(user_id, key)]
+                return None
+            return entry[1:]
+
+    def put(self, user_id, key, fingerprint, status_code, body, expires_at):
+        ttl = (expires_at - timezone.now()).total_seconds()
+        if self.size <= 0 or ttl <= 0:
+            return
+        with self._lock:
+            self._entries.pop((user_id, key), None)
+            while len(self._entries) >= self.size:
+                del self._entries[next(iter(self._entries))]  # o mais antigo
+            self._entries[(user_id, key)] = (time.monotonic() + ttl, fingerprint, status_code, body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+recent = RecentResponses(settings.IDEMPOTENCY_CACHE_SIZE)
+
+
+def fingerprint(request):
+    digest = hashlib.sha256(f'{request.method} {request.path}\n'.encode())
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def _replay(request_fingerprint, stored_fingerprint, status_code, body):
+    if stored_fingerprint != request_fingerprint:
+        return Response(
+            {'error': f'{HEADER} já usada em outra requisição.'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    response = Response(body, status=status_code)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(view):
+    """Para métodos de ViewSet (create, ações POST). Sem o header, nada muda."""
+
+    @functools.wraps(view)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key or not request.user.is_authenticated:
+            return view(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {'error': f'{HEADER} deve ter até {MAX_KEY_LENGTH} caracteres.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        request_fingerprint = fingerprint(request)  # lê o corpo antes do parser do DRF
+        user_id = request.user.pk
+        cached = recent.get(user_id, key)
+        if cached:
+            return _replay(request_fingerprint, *cached)
+
+        expires_at = timezone.now() + datetime.timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+        with db_transaction.atomic():
+            try:
+                with db_transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        user_id=user_id, key=key, fingerprint=request_fingerprint, expires_at=expires_at,
+                    )
+            except IntegrityError:
+                stored = IdempotencyKey.objects.select_for_update().get(user_id=user_id, key=key)
+                if stored.expires_at > timezone.now():
+                    recent.put(user_id, key, stored.fingerprint, stored.status_code, stored.body, stored.expires_at)
+                    return _replay(request_fingerprint, stored.fingerprint, stored.status_code, stored.body)
+                # Vencida e ainda não expurgada: a chave vale de novo
+                stored.fingerprint, stored.expires_at = request_fingerprint, expires_at
+                record = stored
+
+            response = view(self, request, *args, **kwargs)
+            if response.status_code >= 400 or not hasattr(response, 'data'):
+                db_transaction.set_rollback(True)
+                return response
+
+            record.status_code, record.body = response.status_code, response.data
+            record.save()
+            entry = (user_id, key, record.fingerprint, record.status_code, record.body, record.expires_at)
+            db_transaction.on_commit(lambda: recent.put(*entry))
+        return response
+
+    return wrapper
@@ -0,0 +1,107 @@
+"""
+Exclusão de transações em lote com estorno agregado (POST /transactions/bulk-delete/).
+
+A seleção é expandida para as séries de parcelas inteiras (installment_group)
+e o efeito de cada transação é desfeito sem carregar objetos: SELECTs
+agrupados somam o impacto por conta, fatura e cartão, e um UPDATE por tabela
+aplica tudo com CASE. Itens e transações saem com um DELETE cada.
+
+O que é desfeito espelha a criação (TransactionViewSet.create e Transaction.save):
+- conta: despesa devolve o valor ao saldo, receita retira;
+- fatura: o valor das despesas sai do total da fatura;
+- cartão: o limite volta só para parcelas de faturas ainda não pagas (o
+  pagamento já devolveu o das pagas), sem passar do limite total.
+"""
+from django.db import connection, transaction
+from django.db.models import Case, F, Sum, Value, When
+from django.db.models.functions import Least
+
+from .changelog import DELETE, UPSERT, record_changes
+from .models import Account, CreditCard, Invoice, Transaction, TransactionItem
+
+
+def _grouped_update(model, field, deltas, cap=None):
+    """Um UPDATE para todas as linhas: field += delta da linha (limitado a 'cap')."""
+    if not deltas:
+        return
+    model_field = model._meta.get_field(field)
+    increment = Case(
+        *[When(pk=pk, then=Value(delta, output_field=model_field)) for pk, delta in deltas.items()],
+        output_field=model_field,
+    )
+    new_value = F(field) + increment
+    if cap:
+        new_value = Least(new_value, F(cap))
+    model.objects.filter(pk__in=deltas).update(**{field: new_value})
+
+
+def _delete_where(model, column, queryset):
+    table = connection.ops.quote_name(model._meta.db_table)
+    select, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE {column} IN ({select})", params)
+        return cursor.rowcount
+
+
+def delete_transactions(queryset):
+    """Ver TransactionQuerySet.delete_with_reversal."""
+    with transaction.atomic():
+        series = queryset.with_installment_series()
+        rows = list(series.select_for_update().order_by().values_list('id', 'house_id'))
+        if not rows:
+            return 0, {}
+        item_rows = list(
+            TransactionItem.objects.filter(transaction__in=series.values('pk')).values_list('id', 'transaction__house_id')
+        )
+
+        signed_value = Case(
+            When(type='INCOME', then=-F('value')), default=F('value'),
+            output_field=Transaction._meta.get_field('value'),
+        )
+        account_deltas = {}
+        for house_id, account_id, delta in (
+            series.filter(account__isnull=False).order_by()
+            .values('house_id', 'account_id').annotate(delta=Sum(signed_value))
+            .values_list('house_id', 'account_id', 'delta')
+        ):
+            account_deltas[account_id] = (house_id, delta)
+
+        invoice_deltas = {}
+        card_deltas = {}
+        for house_id, invoice_id, card_id, invoice_status, total in (
+            series.filter(type='EXPENSE', invoice__isnull=False).order_by()
+            .values('house_id', 'invoice_id', 'invoice__card_id', 'invoice__status').annotate(total=Sum('value'))
+            .values_list('house_id', 'invoice_id', 'invoice__card_id', 'invoice__status', 'total')
+        ):
+            invoice_deltas[invoice_id] = (house_id, -total)
+            if invoice_status != 'PAID':
+                previous = card_deltas.get(card_id, (house_id, 0))[1]
+                card_deltas[card_id] = (house_id, previous + total)
+
+        items_deleted = _delete_where(TransactionItem, 'transaction_id', series)
+        deleted = _delete_where(Transaction, 'id', series)
+
+        _grouped_update(Account, 'balance', {pk: delta for pk, (_, delta) in account_deltas.items()})
+        _grouped_update(Invoice, 'value', {pk: delta for pk, (_, delta) in invoice_deltas.items()})
+        _grouped_update(
+            CreditCard, 'limit_available', {pk: delta for pk, (_, delta) in card_deltas.items()}, cap='limit_total'
+        )
+
+        # DELETE e UPDATE diretos não disparam signals
+        for model, op, changes in (
+            (TransactionItem, DELETE, item_rows),
+            (Transaction, DELETE, rows),
+            (Account, UPSERT, [(pk, house_id) for pk, (house_id, _) in account_deltas.items()]),
+            (Invoice, UPSERT, [(pk, house_id) for pk, (house_id, _) in invoice_deltas.items()]),
+            (CreditCard, UPSERT, [(pk, house_id) for pk, (house_id, _) in card_deltas.items()]),
+        ):
+            per_house = {}
+            for pk, house_id in changes:
+                per_house.setdefault(house_id, []).append(pk)
+            for house_id, ids in per_house.items():
+                record_changes(model, house_id, ids, op)
+
+    return deleted + items_deleted, {
+        Transaction._meta.label: deleted,
+        TransactionItem._meta.label: items_deleted,
+    }
@@ -0,0 +1,51 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import archive
+from core.models import House
+
+
+class Command(BaseCommand):
+    help = (
+        'Move transações (e itens) anteriores ao corte para o arquivo frio, '
+        'mantendo os totais mensais. Um mês por transação do banco.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=settings.ARCHIVE_AFTER_MONTHS,
+                            help='Arquiva meses completos com mais de N meses')
+        parser.add_argument('--before', help='Data de corte (YYYY-MM-DD), no lugar de --months')
+        parser.add_argument('--house', type=int, action='append', help='Só estas casas (repetível)')
+        parser.add_argument('--dry-run', action='store_true', help='Só lista os meses que seriam arquivados')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        if options['before']:
+            try:
+                cutoff = datetime.date.fromisoformat(options['before']).replace(day=1)
+            except ValueError:
+                raise CommandError('--before deve estar no formato YYYY-MM-DD.')
+        else:
+            cutoff = archive.archive_cutoff(options['months'])
+
+        houses = House.objects.order_by('id').values_list('id', flat=True)
+        if options['house']:
+            houses = houses.filter(id__in=options['house'])
+
+        self.stdout.write(f"Corte: {cutoff}")
+        total = 0
+        for house_id in list(houses):
+            if options['dry_run']:
+                for month in archive.months_to_archive(house_id, cutoff):
+                    self.stdout.write(f"  casa {house_id}: {month:%Y-%m}")
+                continue
+            total += archive.archive_house(house_id, cutoff, self._progress)
+
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'{total} transações arquivadas.'))
+
+    def _progress(self, house_id, month, count):
+        if self.verbosity >= 2:
+            self.stdout.write(f"  casa {house_id}: {month:%Y-%m} ({count})")
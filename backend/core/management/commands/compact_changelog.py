@@ -0,0 +1,48 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction as db_transaction
+from django.db.models import Max
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from core.models import House, ChangeLogEntry
+
+
+class Command(BaseCommand):
+    help = 'Apaga entradas antigas do log de alterações e sobe o piso de sincronização de cada casa.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.CHANGELOG_RETENTION_DAYS,
+                            help='Mantém as entradas dos últimos N dias')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - datetime.timedelta(days=options['days'])
+        batch_size = options['batch_size']
+
+        # Último seq "velho" de cada casa: tudo até ele sai do log
+        per_house = (
+            ChangeLogEntry.objects.filter(created_at__lt=cutoff)
+            .values('house_id').annotate(max_seq=Max('seq')).order_by()
+        )
+
+        total = 0
+        for row in per_house:
+            house_id, max_seq = row['house_id'], row['max_seq']
+            # O piso sobe antes de apagar: um cliente com cursor antigo recebe 410
+            # em vez de um delta incompleto
+            House.objects.filter(pk=house_id).update(change_seq_floor=Greatest('change_seq_floor', max_seq))
+            while True:
+                with db_transaction.atomic():
+                    ids = list(
+                        ChangeLogEntry.objects.filter(house_id=house_id, seq__lte=max_seq)
+                        .order_by('seq').values_list('id', flat=True)[:batch_size]
+                    )
+                    if not ids:
+                        break
+                    ChangeLogEntry.objects.filter(id__in=ids).delete()
+                    total += len(ids)
+
+        self.stdout.write(self.style.SUCCESS(f'{total} entradas removidas do log de alterações.'))
@@ -0,0 +1,49 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from core import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara a vazão das leituras síncronas com as assíncronas (/api/async/...) '
+        'na mesma concorrência. Ex.: gunicorn config.wsgi -w 4 na porta 8000 e '
+        'uvicorn config.asgi:application --workers 4 na porta 8001. Suba os dois com '
+        'THROTTLING_ENABLED=False e HEAVY_REQUESTS_PER_WORKER=0 para medir sem os limites.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sync-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--async-url', default='http://127.0.0.1:8001')
+        parser.add_argument('--username', help='Usuário cujo token será usado (criado se preciso)')
+        parser.add_argument('--token')
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--operations', type=int, default=200)
+        parser.add_argument('--only', nargs='*', choices=sorted(benchmark.ASYNC_COMPARISONS))
+
+    def handle(self, *args, **options):
+        token = options['token']
+        if not token:
+            if not options['username']:
+                raise CommandError('Informe --token ou --username.')
+            try:
+                user = get_user_model().objects.get(username=options['username'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"Usuário não encontrado: {options['username']}")
+            token = Token.objects.get_or_create(user=user)[0].key
+
+        concurrency = options['concurrency']
+        self.stdout.write(f"Concorrência: {concurrency}, operações: {options['operations']}")
+        self.stdout.write(f"{'endpoint':<16}{'modo':<8}{'ops/s':>10}{'p50':>10}{'p95':>10}")
+        for name, (sync_paths, async_paths) in benchmark.ASYNC_COMPARISONS.items():
+            if options['only'] and name not in options['only']:
+                continue
+            results = {
+                'sync': benchmark.throughput(options['sync_url'], sync_paths, token, concurrency, options['operations']),
+                'async': benchmark.throughput(options['async_url'], async_paths, token, concurrency, options['operations']),
+            }
+            for mode, r in results.items():
+                self.stdout.write(f"{name:<16}{mode:<8}{r['ops_per_s']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}")
+            ratio = results['async']['ops_per_s'] / results['sync']['ops_per_s']
+            self.stdout.write(f"{'':<16}{'async/sync':<18}{ratio:>6.2f}x")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core import purge
+from core.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = 'Apaga as chaves de idempotência vencidas (IDEMPOTENCY_KEY_TTL_HOURS). Agendar no cron.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        expired = IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+        total = purge.delete_in_batches(expired, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{total} chaves de idempotência removidas.'))
@@ -0,0 +1,392 @@
+import datetime
+import io
+import random
+import time
+import uuid
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction as db_transaction
+from django.utils import timezone
+
+from core.models import (
+    House, HouseMember, Category, Account, CreditCard, Invoice, RecurringBill,
+    Transaction, TransactionItem, Product, InventoryItem, ShoppingList
+)
+
+EXPENSE_CATEGORIES = ['Mercado', 'Moradia', 'Transporte', 'Lazer', 'Saúde', 'Educação', 'Restaurantes', 'Assinaturas']
+INCOME_CATEGORIES = ['Salário', 'Freelance', 'Rendimentos']
+
+EXPENSE_WORDS = ['Mercado', 'Padaria', 'Farmácia', 'Posto', 'Uber', 'iFood', 'Cinema', 'Academia', 'Livraria',
+                 'Açougue', 'Hortifruti', 'Pet Shop', 'Restaurante', 'Streaming', 'Conta de Luz', 'Internet']
+INCOME_WORDS = ['Salário', 'Freelance', 'Reembolso', 'Rendimento', 'Venda', 'Bônus']
+PRODUCT_WORDS = ['Arroz', 'Feijão', 'Leite', 'Café', 'Açúcar', 'Óleo', 'Macarrão', 'Sabão', 'Detergente', 'Papel',
+                 'Ovos', 'Pão', 'Queijo', 'Manteiga', 'Farinha', 'Sal', 'Molho', 'Biscoito', 'Suco', 'Iogurte']
+PRODUCT_BRANDS = ['Tio João', 'Camil', 'Italac', 'Pilão', 'União', 'Liza', 'Barilla', 'Omo', 'Ypê', 'Neve']
+UNITS = ['un', 'kg', 'L', 'pct']
+BILLS = ['Aluguel', 'Condomínio', 'Luz', 'Água', 'Internet', 'Celular', 'Streaming', 'Academia', 'Seguro', 'Escola']
+
+
+def money(cents):
+    return Decimal(cents) / 100
+
+
+class RowWriter:
+    """
+    Escrita em massa das tabelas grandes (transações e itens), sem instanciar
+    models: no PostgreSQL usa COPY com ids pré-alocados da sequence; nos
+    demais bancos, INSERT com executemany. O bulk_create do ORM gasta ~200 µs
+    por linha compilando SQL, o que inviabiliza milhões de linhas.
+
+    Sem models, o MoneyField não converte nada: as colunas de dinheiro
+    recebem os centavos inteiros, como estão gravados no banco.
+    """
+
+    def __init__(self, model, columns, batch_size):
+        self.table = model._meta.db_table
+        self.columns = columns
+        self.batch_size = batch_size
+        self.rows = []
+        self.count = 0
+        self.ids = iter(())
+        self.last_id = 0
+
+    def next_id(self):
+        try:
+            return next(self.ids)
+        except StopIteration:
+            self.ids = iter(self._allocate_ids(self.batch_size))
+            return next(self.ids)
+
+    def _allocate_ids(self, amount):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+                    [self.table, amount],
+                )
+                return [row[0] for row in cursor.fetchall()]
+            # Demais bancos: o comando roda dentro de uma transação, ids contíguos
+            cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {connection.ops.quote_name(self.table)}")
+            start = max(cursor.fetchone()[0], self.last_id) + 1
+            self.last_id = start + amount - 1
+            return range(start, start + amount)
+
+    def add(self, row):
+        self.rows.append(row)
+        self.count += 1
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                buffer = io.StringIO()
+                for row in self.rows:
+                    buffer.write('\t'.join(_copy_value(v) for v in row))
+                    buffer.write('\n')
+                sql = f"COPY {self.table} ({', '.join(self.columns)}) FROM STDIN"
+                if hasattr(cursor.cursor, 'copy_expert'):  # psycopg2
+                    buffer.seek(0)
+                    cursor.cursor.copy_expert(sql, buffer)
+                else:  # psycopg 3
+                    with cursor.cursor.copy(sql) as copy:
+                        copy.write(buffer.getvalue())
+            else:
+                placeholders = ', '.join(['%s'] * len(self.columns))
+                cursor.executemany(
+                    f"INSERT INTO {connection.ops.quote_name(self.table)} ({', '.join(self.columns)}) "
+                    f"VALUES ({placeholders})",
+                    self.rows,
+                )
+        self.rows = []
+
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    if value is True:
+        return 't'
+    if value is False:
+        return 'f'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+
+class Command(BaseCommand):
+    help = 'Gera um conjunto de dados sintético e reprodutível para testes de carga.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--houses', type=int, default=1)
+        parser.add_argument('--members', type=int, default=3, help='Membros por casa')
+        parser.add_argument('--accounts', type=int, default=4, help='Contas por casa')
+        parser.add_argument('--cards', type=int, default=5, help='Cartões por casa')
+        parser.add_argument('--months', type=int, default=36, help='Meses de histórico')
+        parser.add_argument('--transactions', type=int, default=10000, help='Transações por casa')
+        parser.add_argument('--products', type=int, default=500, help='Produtos por casa')
+        parser.add_argument('--recurring-bills', type=int, default=10, help='Contas fixas por casa')
+        parser.add_argument('--installment-ratio', type=float, default=0.1, help='Fração das compras no cartão parceladas')
+        parser.add_argument('--items-ratio', type=float, default=0.1, help='Fração das despesas com itens detalhados')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='load', help='Prefixo dos usernames gerados')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.password = make_password('load-test')
+        self.today = datetime.date.today()
+
+        prefix = f"{options['prefix']}_{options['seed']}_"
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f'Já existem usuários "{prefix}*". Use outro --prefix ou --seed.')
+
+        started = time.perf_counter()
+        totals = {'transactions': 0, 'items': 0}
+        for index in range(options['houses']):
+            with db_transaction.atomic():
+                created = self.generate_house(f"{prefix}{index}")
+            totals['transactions'] += created['transactions']
+            totals['items'] += created['items']
+            self.stdout.write(f"Casa {index + 1}/{options['houses']}: {created['transactions']} transações, {created['items']} itens")
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{totals['transactions']} transações e {totals['items']} itens em {elapsed:.1f}s"
+        ))
+
+    # ------------------------------------------------------------------
+    # CADASTROS DA CASA
+    # ------------------------------------------------------------------
+
+    def generate_house(self, tag):
+        rng = self.rng
+        opts = self.options
+
+        house = House.objects.create(name=f"Casa {tag}")
+
+        users = User.objects.bulk_create([
+            User(username=f"{tag}_{i}", email=f"{tag}_{i}@load.domo", first_name=f"Morador {i}", password=self.password)
+            for i in range(opts['members'])
+        ])
+        # bulk_create não dispara signals: o papel MASTER já vai definido
+        HouseMember.objects.bulk_create([
+            HouseMember(user=user, house=house, role='MASTER' if i == 0 else 'MEMBER')
+            for i, user in enumerate(users)
+        ])
+
+        expense_categories = Category.objects.bulk_create([
+            Category(house=house, name=name, type='EXPENSE') for name in EXPENSE_CATEGORIES
+        ])
+        income_categories = Category.objects.bulk_create([
+            Category(house=house, name=name, type='INCOME') for name in INCOME_CATEGORIES
+        ])
+
+        accounts = Account.objects.bulk_create([
+            Account(
+                house=house, owner=users[i % len(users)], name=f"Conta {i + 1}",
+                balance=money(rng.randint(0, 5_000_000)), limit=money(rng.choice([0, 50_000, 200_000])),
+                is_shared=rng.random() < 0.7,
+            )
+            for i in range(opts['accounts'])
+        ])
+
+        cards = []
+        for i in range(opts['cards']):
+            limit_total = money(rng.choice([100_000, 300_000, 500_000, 1_000_000, 2_000_000]))
+            cards.append(CreditCard(
+                house=house, owner=users[i % len(users)], name=f"Cartão {i + 1}",
+                limit_total=limit_total, limit_available=limit_total,
+                closing_day=rng.randint(1, 28), due_day=rng.randint(1, 28),
+                is_shared=rng.random() < 0.6,
+            ))
+        cards = CreditCard.objects.bulk_create(cards)
+
+        invoices = self.generate_invoices(cards)
+
+        RecurringBill.objects.bulk_create([
+            RecurringBill(
+                house=house, name=f"{BILLS[i % len(BILLS)]} {i // len(BILLS) + 1}",
+                base_value=money(rng.randint(5_000, 300_000)), due_day=rng.randint(1, 28),
+                category=rng.choice(expense_categories), is_active=rng.random() < 0.9,
+            )
+            for i in range(opts['recurring_bills'])
+        ])
+
+        self.generate_stock(house)
+
+        created = self.generate_transactions(house, accounts, cards, invoices, expense_categories, income_categories)
+        self.finish_invoices(cards, invoices)
+        return created
+
+    def generate_invoices(self, cards):
+        """Uma fatura por cartão e mês, do início do histórico até 12 meses à frente."""
+        start = (self.today - relativedelta(months=self.options['months'])).replace(day=1)
+        current = self.today.replace(day=1)
+        months = [start + relativedelta(months=i) for i in range(self.options['months'] + 13)]
+
+        invoices = Invoice.objects.bulk_create([
+            Invoice(
+                card=card, reference_date=month, value=0, amount_paid=0,
+                status='PAID' if month < current else 'OPEN',
+            )
+            for card in cards for month in months
+        ], batch_size=self.batch_size)
+
+        by_card = {}
+        for invoice in invoices:
+            key = invoice.reference_date.year * 12 + invoice.reference_date.month - 1
+            by_card.setdefault(invoice.card_id, {})[key] = invoice
+        return by_card
+
+    def generate_stock(self, house):
+        rng = self.rng
+        products = []
+        for i in range(self.options['products']):
+            name = f"{PRODUCT_WORDS[i % len(PRODUCT_WORDS)]} {PRODUCT_BRANDS[(i // len(PRODUCT_WORDS)) % len(PRODUCT_BRANDS)]}"
+            if i >= len(PRODUCT_WORDS) * len(PRODUCT_BRANDS):
+                name = f"{name} {i}"
+            products.append(Product(
+                house=house, name=name, measure_unit=rng.choice(UNITS),
+                estimated_price=money(rng.randint(150, 8_000)), min_quantity=rng.randint(1, 5),
+            ))
+        products = Product.objects.bulk_create(products, batch_size=self.batch_size)
+
+        inventory = []
+        shopping = []
+        for product in products:
+            if rng.random() < 0.8:
+                quantity = rng.randint(0, 12)
+                inventory.append(InventoryItem(
+                    house=house, product=product, quantity=quantity, min_quantity=product.min_quantity,
+                ))
+                if quantity <= product.min_quantity:
+                    shopping.append(ShoppingList(
+                        house=house, product=product, quantity_to_buy=product.min_quantity,
+                        real_unit_price=product.estimated_price, discount_unit_price=product.estimated_price,
+                        is_purchased=rng.random() < 0.3,
+                    ))
+        InventoryItem.objects.bulk_create(inventory, batch_size=self.batch_size)
+        ShoppingList.objects.bulk_create(shopping, batch_size=self.batch_size)
+
+    # ------------------------------------------------------------------
+    # TRANSAÇÕES
+    # ------------------------------------------------------------------
+
+    def generate_transactions(self, house, accounts, cards, invoices, expense_categories, income_categories):
+        rng = self.rng
+        opts = self.options
+        target = opts['transactions']
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+
+        start = (self.today - relativedelta(months=opts['months'])).replace(day=1)
+        dates = [start + datetime.timedelta(days=d) for d in range((self.today - start).days + 1)]
+        # Datas das parcelas: até 12 meses depois do fim do histórico
+        months_ahead = {d: [d + relativedelta(months=i) for i in range(12)] for d in dates}
+        market_id = next(c.id for c in expense_categories if c.name == 'Mercado')
+        expense_ids = [c.id for c in expense_categories]
+        income_ids = [c.id for c in income_categories]
+
+        transactions = RowWriter(Transaction, [
+            'id', 'house_id', 'description', 'value', 'date', 'type', 'category_id', 'is_shared',
+            'created_at', 'updated_at', 'account_id', 'invoice_id', 'recurring_bill_id',
+            'owner_id', 'credit_card_id', 'installment_group',
+        ], self.batch_size)
+        items = RowWriter(TransactionItem, [
+            'id', 'transaction_id', 'transaction_date', 'description', 'value', 'quantity',
+        ], self.batch_size)
+        invoice_cents = {invoice.id: 0 for by_month in invoices.values() for invoice in by_month.values()}
+
+        def add_items(tx_id, tx_date, total_cents):
+            count = rng.randint(3, 8)
+            share = total_cents // count
+            for _ in range(count):
+                items.add([
+                    items.next_id(), tx_id, tx_date.isoformat(), rng.choice(PRODUCT_WORDS),
+                    share, rng.randint(1, 4),
+                ])
+
+        while transactions.count < target:
+            tx_date = rng.choice(dates)
+            roll = rng.random()
+
+            if roll < 0.15:
+                account = rng.choice(accounts)
+                transactions.add([
+                    transactions.next_id(), house.id, rng.choice(INCOME_WORDS),
+                    int(rng.lognormvariate(11, 0.6)), tx_date.isoformat(), 'INCOME',
+                    rng.choice(income_ids), account.is_shared, now, now, account.id, None, None,
+                    account.owner_id, None, None,
+                ])
+
+            elif roll < 0.65 or not cards:
+                account = rng.choice(accounts)
+                category_id = rng.choice(expense_ids) if rng.random() < 0.8 else None
+                cents = int(rng.lognormvariate(8.5, 1.1)) + 100
+                tx_id = transactions.next_id()
+                transactions.add([
+                    tx_id, house.id, rng.choice(EXPENSE_WORDS), cents, tx_date.isoformat(), 'EXPENSE',
+                    category_id, account.is_shared, now, now, account.id, None, None,
+                    account.owner_id, None, None,
+                ])
+                ratio = opts['items_ratio'] * 5 if category_id == market_id else opts['items_ratio']
+                if rng.random() < ratio:
+                    add_items(tx_id, tx_date, cents)
+
+            else:
+                card = rng.choice(cards)
+                category_id = rng.choice(expense_ids) if rng.random() < 0.8 else None
+                total_cents = int(rng.lognormvariate(9, 1.2)) + 100
+                description = rng.choice(EXPENSE_WORDS)
+                installments = rng.randint(2, 12) if rng.random() < opts['installment_ratio'] else 1
+                base, remainder = divmod(total_cents, installments)
+                # Mesmo grupo em todas as parcelas, como no POST /transactions/ (hex: vale no SQLite e no COPY)
+                group = uuid.UUID(int=rng.getrandbits(128), version=4).hex if installments > 1 else None
+
+                for i in range(installments):
+                    date_i = months_ahead[tx_date][i]
+                    ref = date_i.year * 12 + date_i.month - 1 + (1 if date_i.day >= card.closing_day else 0)
+                    invoice = invoices[card.id].get(ref)
+                    if invoice is None:
+                        break
+                    cents = base + (remainder if i == 0 else 0)
+                    invoice_cents[invoice.id] += cents
+                    tx_id = transactions.next_id()
+                    transactions.add([
+                        tx_id, house.id,
+                        f"{description} ({i + 1}/{installments})" if installments > 1 else description,
+                        cents, date_i.isoformat(), 'EXPENSE', category_id, card.is_shared,
+                        now, now, None, invoice.id, None,
+                        card.owner_id, card.id, group,
+                    ])
+                    if installments == 1 and rng.random() < opts['items_ratio']:
+                        add_items(tx_id, date_i, cents)
+
+        transactions.flush()
+        items.flush()
+
+        for by_month in invoices.values():
+            for invoice in by_month.values():
+                invoice.value = money(invoice_cents[invoice.id])
+        return {'transactions': transactions.count, 'items': items.count}
+
+    def finish_invoices(self, cards, invoices):
+        """Faturas passadas ficam pagas; o limite do cartão desconta o que está em aberto."""
+        to_update = []
+        for card in cards:
+            open_total = Decimal('0')
+            for invoice in invoices[card.id].values():
+                if invoice.status == 'PAID':
+                    invoice.amount_paid = invoice.value
+                else:
+                    open_total += invoice.value
+                to_update.append(invoice)
+            card.limit_available = max(card.limit_total - open_total, Decimal('0'))
+
+        Invoice.objects.bulk_update(to_update, ['value', 'amount_paid'], batch_size=self.batch_size)
+        CreditCard.objects.bulk_update(cards, ['limit_available'])
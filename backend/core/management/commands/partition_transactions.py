@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core import partitioning
+from core.models import House
+
+ACTIONS = ['status', 'convert', 'prepare', 'backfill', 'swap', 'create', 'verify', 'drop-old']
+
+
+class Command(BaseCommand):
+    help = (
+        'Particionamento por data das transações e itens (PostgreSQL 15+). '
+        'convert = prepare + backfill + swap, online; create = partições futuras '
+        '(agendar mensalmente); verify = confere o partition pruning das consultas mais usadas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', nargs='?', default='status', choices=ACTIONS)
+        parser.add_argument('--interval', default=settings.TRANSACTION_PARTITIONING or 'month',
+                            choices=partitioning.INTERVALS)
+        parser.add_argument('--ahead', type=int, default=settings.TRANSACTION_PARTITIONS_AHEAD,
+                            help='Partições futuras além da atual')
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--lock-timeout', default='5s', help='Espera máxima pelo lock na troca das tabelas')
+        parser.add_argument('--house', type=int, help='Casa usada no verify (padrão: a primeira)')
+
+    def handle(self, *args, **options):
+        action = options['action']
+        try:
+            partitioning.check_server(connection)
+            getattr(self, 'do_' + action.replace('-', '_'))(options)
+        except partitioning.PartitioningError as exc:
+            raise CommandError(str(exc))
+
+    def _progress(self, table, done, total):
+        self.stdout.write(f"  {table}: {done}/{total}")
+
+    def do_status(self, options):
+        state = partitioning.conversion_state(connection)
+        self.stdout.write(f"Estado: {state}")
+        if state == 'partitioned':
+            with connection.cursor() as cursor:
+                for table in partitioning.PARTITION_KEYS:
+                    names = partitioning.partitions(cursor, table)
+                    self.stdout.write(f"{table}: {len(names)} partições ({names[0]} .. {names[-1]})")
+
+    def do_convert(self, options):
+        partitioning.convert(
+            connection, options['interval'], options['ahead'], options['batch_size'],
+            options['lock_timeout'], self._progress,
+        )
+        self.stdout.write(self.style.SUCCESS('Tabelas particionadas.'))
+
+    def do_prepare(self, options):
+        partitioning.prepare(connection, options['interval'], options['ahead'])
+        self.stdout.write(self.style.SUCCESS('Tabelas-sombra e triggers criadas; rode o backfill.'))
+
+    def do_backfill(self, options):
+        copied = partitioning.backfill(connection, options['batch_size'], self._progress)
+        for table, count in copied.items():
+            self.stdout.write(f"{table}: {count} linhas copiadas")
+        self.stdout.write(self.style.SUCCESS('Backfill concluído; rode o swap.'))
+
+    def do_swap(self, options):
+        partitioning.swap(connection, options['lock_timeout'])
+        self.stdout.write(self.style.SUCCESS('Tabelas trocadas; as antigas ficaram como *_old (drop-old).'))
+
+    def do_create(self, options):
+        created = partitioning.create_partitions(connection, options['interval'], options['ahead'])
+        for name in created:
+            self.stdout.write(f"  {name}")
+        self.stdout.write(self.style.SUCCESS(f'{len(created)} partições criadas.'))
+
+    def do_verify(self, options):
+        house_id = options['house'] or House.objects.order_by('id').values_list('id', flat=True).first()
+        if house_id is None:
+            raise CommandError('Nenhuma casa no banco para montar as consultas.')
+        results = partitioning.verify(connection, options['interval'], partitioning.hot_queries(house_id))
+        failed = False
+        for label, read, ok in results:
+            status = self.style.SUCCESS('ok') if ok else self.style.ERROR('SEM PRUNING')
+            self.stdout.write(f"{label:<24}{status}  {', '.join(read)}")
+            failed = failed or not ok
+        if failed:
+            raise CommandError('Há consultas lendo partições fora da faixa pedida.')
+
+    def do_drop_old(self, options):
+        partitioning.drop_old(connection)
+        self.stdout.write(self.style.SUCCESS('Tabelas *_old removidas.'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core import purge
+
+
+class Command(BaseCommand):
+    help = (
+        'Apaga as casas com exclusão pedida (DELETE /houses/{id}/) que ainda não '
+        'foram expurgadas: retoma expurgos interrompidos ou roda no lugar da '
+        'thread quando HOUSE_PURGE_IN_BACKGROUND=False.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Linhas por DELETE (padrão: HOUSE_PURGE_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        houses = list(purge.pending_houses().values_list('id', flat=True))
+        for house_id in houses:
+            counts = purge.purge_house(house_id, options['batch_size'])
+            total = sum(counts.values())
+            self.stdout.write(f"Casa {house_id}: {total} linhas apagadas")
+        self.stdout.write(self.style.SUCCESS(f'{len(houses)} casas expurgadas.'))
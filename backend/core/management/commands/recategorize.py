@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import categorization
+from core.models import House
+
+
+class Command(BaseCommand):
+    help = (
+        'Aplica as regras de categorização (CategoryRule) às transações sem '
+        'categoria das casas que têm regras.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--house', type=int, action='append', help='Só estas casas (repetível)')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        houses = House.objects.filter(rules_version__gt=0, deletion_requested_at__isnull=True).order_by('id')
+        if options['house']:
+            houses = houses.filter(id__in=options['house'])
+
+        started = time.perf_counter()
+        total = 0
+        for house in houses:
+            count = categorization.recategorize_house(house, options['batch_size'])
+            if count and options['verbosity'] > 1:
+                self.stdout.write(f"Casa {house.id}: {count} transações categorizadas")
+            total += count
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'{total} transações categorizadas em {elapsed:.1f}s.'))
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction as db_transaction
+
+from core import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Mede latência e queries dos endpoints principais e compara com o baseline.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--only', nargs='*', help='Nomes dos endpoints a medir')
+        parser.add_argument('--baseline', default=benchmark.BASELINE_PATH, help='Queries (versionado)')
+        parser.add_argument('--local-baseline', default=benchmark.LOCAL_BASELINE_PATH, help='Latência desta máquina')
+        parser.add_argument('--tolerance', type=float, default=0.5, help='Folga de latência (0.5 = +50%%)')
+        parser.add_argument('--query-tolerance', type=int, default=0)
+        parser.add_argument(
+            '--update-baseline', action='store_true',
+            help='Grava as queries no baseline versionado e a latência no local',
+        )
+
+    def handle(self, *args, **options):
+        # Tudo roda numa transação desfeita no final: o banco não é alterado
+        with db_transaction.atomic():
+            context = benchmark.seed()
+            results = benchmark.run(context, options['iterations'], options['warmup'], options['only'])
+            db_transaction.set_rollback(True)
+
+        self.stdout.write(f"{'endpoint':<36}{'p50':>10}{'p95':>10}{'p99':>10}{'queries':>10}")
+        for name, r in results.items():
+            self.stdout.write(f"{name:<36}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['queries']:>10}")
+
+        if options['update_baseline']:
+            benchmark.save_baseline(results, options['baseline'])
+            benchmark.save_baseline(results, options['local_baseline'], benchmark.LATENCY_KEYS)
+            self.stdout.write(self.style.SUCCESS(
+                f"Baseline gravado em {options['baseline']} (queries) e {options['local_baseline']} (latência)"
+            ))
+            return
+
+        try:
+            baseline = benchmark.load_baseline(options['baseline'])
+        except FileNotFoundError:
+            raise CommandError(f"Baseline não encontrado: {options['baseline']} (rode com --update-baseline)")
+        regressions = benchmark.compare(results, baseline, options['tolerance'], options['query_tolerance'])
+
+        try:
+            local = benchmark.load_baseline(options['local_baseline'])
+        except FileNotFoundError:
+            self.stdout.write(self.style.WARNING(
+                f"Sem baseline de latência desta máquina ({options['local_baseline']}): só as queries foram "
+                "conferidas. Grave um com --update-baseline."
+            ))
+        else:
+            regressions += benchmark.compare(results, local, options['tolerance'], options['query_tolerance'])
+        if regressions:
+            raise CommandError('Regressões de performance:\n  ' + '\n  '.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Sem regressões em relação ao baseline.'))
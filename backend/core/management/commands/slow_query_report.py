@@ -0,0 +1,105 @@
+import glob
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Resume o log de queries lentas agrupando pelas piores fingerprints.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=None, help='Arquivo de log (padrão: SLOW_QUERY_LOG_FILE)')
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--order', choices=['total', 'max', 'count', 'p95'], default='total')
+        parser.add_argument('--hours', type=float, default=None, help='Considera apenas as últimas N horas')
+        parser.add_argument('--route', default=None, help='Filtra por trecho da rota')
+
+    def handle(self, *args, **options):
+        path = options['file'] or str(settings.SLOW_QUERY_LOG_FILE)
+        # Inclui os arquivos já rotacionados (slow_queries.jsonl.1, .2, ...)
+        files = sorted(glob.glob(f"{glob.escape(path)}*"))
+        if not files:
+            raise CommandError(f'Nenhum log encontrado em {path}')
+
+        since = time.time() - options['hours'] * 3600 if options['hours'] else None
+        groups = {}
+
+        for file in files:
+            with open(file, encoding='utf-8') as fh:
+                for line in fh:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if since and entry.get('ts', 0) < since:
+                        continue
+                    if options['route'] and options['route'] not in (entry.get('route') or ''):
+                        continue
+
+                    group = groups.setdefault(entry['fingerprint'], {
+                        'normalized': entry['normalized'],
+                        'durations': [],
+                        'routes': {},
+                        'houses': set(),
+                        'worst': None,
+                    })
+                    group['durations'].append(entry['duration_ms'])
+                    route = entry.get('route') or '-'
+                    group['routes'][route] = group['routes'].get(route, 0) + 1
+                    if entry.get('house_id') is not None:
+                        group['houses'].add(entry['house_id'])
+                    if group['worst'] is None or entry['duration_ms'] > group['worst']['duration_ms']:
+                        group['worst'] = entry
+
+        if not groups:
+            self.stdout.write('Nenhuma query lenta no período.')
+            return
+
+        rows = []
+        for fp, group in groups.items():
+            durations = sorted(group['durations'])
+            rows.append({
+                'fingerprint': fp,
+                'normalized': group['normalized'],
+                'count': len(durations),
+                'total': sum(durations),
+                'max': durations[-1],
+                'p95': durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+                'routes': sorted(group['routes'].items(), key=lambda r: r[1], reverse=True),
+                'houses': len(group['houses']),
+                'worst': group['worst'],
+            })
+        rows.sort(key=lambda r: r[options['order']], reverse=True)
+
+        for row in rows[:options['limit']]:
+            self.stdout.write(self.style.WARNING(
+                f"[{row['fingerprint']}] {row['count']}x | total {row['total']:.0f} ms | "
+                f"p95 {row['p95']:.0f} ms | max {row['max']:.0f} ms | casas: {row['houses']}"
+            ))
+            self.stdout.write(f"  {row['normalized'][:300]}")
+            routes = ', '.join(f'{route} ({n})' for route, n in row['routes'][:3])
+            self.stdout.write(f"  rotas: {routes}")
+            plan = self._plan_summary(row['worst'].get('explain'))
+            if plan:
+                self.stdout.write(f"  plano (pior execução): {plan}")
+            self.stdout.write('')
+
+    def _plan_summary(self, explain):
+        if not explain or not isinstance(explain, list):
+            return None
+        root = explain[0]
+        plan = root.get('Plan', {})
+        nodes = []
+
+        def walk(node):
+            label = node.get('Node Type', '?')
+            if node.get('Relation Name'):
+                label += f" em {node['Relation Name']}"
+            nodes.append(label)
+            for child in node.get('Plans', []):
+                walk(child)
+
+        walk(plan)
+        return f"{root.get('Execution Time', '?')} ms | " + ' > '.join(nodes[:6])
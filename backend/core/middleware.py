@@ -0,0 +1,295 @@
+import cProfile
+import logging
+import threading
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import JsonResponse
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import db_router, throttling
+from .profiling import profile_id, save_profile
+from .slow_queries import SlowQueryLogger
+
+logger = logging.getLogger(__name__)
+
+
+# Os middlewares abaixo funcionam nos dois modos. Sob ASGI, basta um middleware
+# só-síncrono na cadeia para o Django atender cada requisição numa thread e
+# perder a vantagem das views assíncronas (ver core/async_views.py).
+
+class AsyncCapableMixin:
+    sync_capable = True
+    async_capable = True
+
+    def _set_mode(self, get_response):
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+
+class StaticFilesMiddleware(AsyncCapableMixin, WhiteNoiseMiddleware):
+    """
+    WhiteNoise com suporte a ASGI: a busca do arquivo é um dicionário em
+    memória, então requisições da API seguem direto; só a entrega de um
+    arquivo estático passa por uma thread.
+    """
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self._set_mode(get_response)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class SlowQueryLogMiddleware(AsyncCapableMixin):
+    """
+    Instala o SlowQueryLogger em todas as conexões durante a requisição.
+    Desligado (sem custo nenhum) quando SLOW_QUERY_LOG_ENABLED=False.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_LOG_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self._set_mode(get_response)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with self._wrapped_connections(request):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        # As conexões são por contexto: o ORM assíncrono usa estas mesmas
+        with self._wrapped_connections(request):
+            return await self.get_response(request)
+
+    def _wrapped_connections(self, request):
+        wrapper = SlowQueryLogger(request)
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        return stack
+
+
+class ProfilingMiddleware(AsyncCapableMixin):
+    """
+    Perfila a requisição com cProfile quando um usuário staff envia o header
+    'X-Profile: 1' (ou ?profile=1). O id do perfil volta no header X-Profile-Id.
+    Com PROFILING_ENABLED=False o middleware nem é carregado.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        # O cProfile não suporta dois perfis simultâneos no mesmo processo
+        self.lock = threading.Lock()
+        self._set_mode(get_response)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self._requested(request):
+            return self.get_response(request)
+        if not self._is_staff(request) or not self.lock.acquire(blocking=False):
+            return self.get_response(request)
+
+        try:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+            return self._save(profiler, request, response)
+        finally:
+            self.lock.release()
+
+    async def __acall__(self, request):
+        if not self._requested(request):
+            return await self.get_response(request)
+        is_staff = await sync_to_async(self._is_staff)(request)
+        if not is_staff or not self.lock.acquire(blocking=False):
+            return await self.get_response(request)
+
+        # Sob ASGI o perfil cobre a thread do event loop (código da view);
+        # as queries do ORM assíncrono rodam em outra thread.
+        try:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                response = await self.get_response(request)
+            finally:
+                profiler.disable()
+            return await sync_to_async(self._save)(profiler, request, response)
+        finally:
+            self.lock.release()
+
+    def _requested(self, request):
+        return request.headers.get('X-Profile') == '1' or request.GET.get('profile') == '1'
+
+    def _save(self, profiler, request, response):
+        name = profile_id(request)
+        try:
+            save_profile(profiler, settings.PROFILING_DIR, name, settings.PROFILING_MAX_BYTES)
+            response['X-Profile-Id'] = name
+        except OSError:
+            logger.exception('Falha ao salvar o perfil %s', name)
+        return response
+
+    def _is_staff(self, request):
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            # A API usa Token: autentica aqui mesmo, antes da view
+            try:
+                result = TokenAuthentication().authenticate(request)
+            except AuthenticationFailed:
+                return False
+            user = result[0] if result else None
+        return bool(user and user.is_staff)
+
+
+class ReplicaRoutingMiddleware(AsyncCapableMixin):
+    """
+    Decide por requisição se as leituras podem ir para a réplica e prende ao
+    primário o cliente que gravou (ver core/db_router.py). Sem
+    DATABASE_REPLICA_URL o middleware nem é carregado.
+    """
+
+    def __init__(self, get_response):
+        if not db_router.replica_configured():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self._set_mode(get_response)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = db_router.begin_request()
+        try:
+            response = self.get_response(request)
+            if self._wrote(request):
+                db_router.pin_client(request)
+            return response
+        finally:
+            db_router.end_request(token)
+
+    async def __acall__(self, request):
+        token = db_router.begin_request()
+        try:
+            response = await self.get_response(request)
+            if self._wrote(request):
+                await sync_to_async(db_router.pin_client)(request)
+            return response
+        finally:
+            db_router.end_request(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = db_router.current_state()
+        view = getattr(view_func, 'cls', view_func)  # ViewSets do DRF guardam a classe em .cls
+        if (
+            state is not None
+            and request.method in SAFE_METHODS
+            and getattr(view, 'replica_reads', False)
+            and not db_router.client_is_pinned(request)
+        ):
+            state.replica = True
+        return None
+
+    def _wrote(self, request):
+        state = db_router.current_state()
+        return request.method not in SAFE_METHODS or (state is not None and state.wrote)
+
+
+
+class ConcurrencyLimitMiddleware(AsyncCapableMixin):
+    """
+    Limita quantas requisições pesadas (views com heavy_request, ver
+    core/throttling.py) rodam ao mesmo tempo neste processo. Sem vaga: 429
+    com Retry-After. Com HEAVY_REQUESTS_PER_WORKER=0 o middleware nem é carregado.
+    """
+
+    def __init__(self, get_response):
+        if settings.HEAVY_REQUESTS_PER_WORKER <= 0:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slots = throttling.Slots(settings.HEAVY_REQUESTS_PER_WORKER)
+        self._set_mode(get_response)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        response = None
+        try:
+            response = self.get_response(request)
+            return response
+        finally:
+            self._release(request, response)
+
+    async def __acall__(self, request):
+        response = None
+        try:
+            response = await self.get_response(request)
+            return response
+        finally:
+            self._release(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not throttling.is_heavy(view_func, request.method):
+            return None
+        if not self.slots.acquire():
+            response = JsonResponse(
+                {'error': 'Servidor ocupado. Tente novamente em instantes.'}, status=429
+            )
+            response['Retry-After'] = str(settings.HEAVY_REQUESTS_RETRY_AFTER)
+            return response
+        request._heavy_slot = True
+        return None
+
+    def _release(self, request, response):
+        if not getattr(request, '_heavy_slot', False):
+            return
+        request._heavy_slot = False
+        if response is not None and response.streaming and not response.is_async:
+            # Stream (ex.: /archive/transactions/): a vaga vale até o último bloco
+            response.streaming_content = _ReleaseWhenDone(response.streaming_content, self.slots.release)
+        else:
+            self.slots.release()
+
+
+class _ReleaseWhenDone:
+    # O Django chama close() ao fechar a resposta, mesmo se o stream nem começou
+    def __init__(self, content, release):
+        self.content = content
+        self.release = release
+
+    def __iter__(self):
+        try:
+            yield from self.content
+        finally:
+            self.close()
+
+    def close(self):
+        if self.release is not None:
+            self.release()
+            self.release = None
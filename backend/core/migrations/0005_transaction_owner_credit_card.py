@@ -0,0 +1,56 @@
+# Generated by Django 6.0 on 2026-10-19 05:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_owner_and_card(apps, schema_editor):
+    """Preenche dono/cartão das transações existentes com UPDATEs em lote."""
+    Transaction = apps.get_model('core', 'Transaction')
+    Account = apps.get_model('core', 'Account')
+    Invoice = apps.get_model('core', 'Invoice')
+
+    accounts = Account.objects.filter(pk=OuterRef('account_id'))
+    Transaction.objects.filter(account__isnull=False).update(
+        owner_id=Subquery(accounts.values('owner_id')[:1]),
+    )
+
+    # Parcelas criadas via bulk_create ficaram com is_shared=False: herdam do cartão
+    invoices = Invoice.objects.filter(pk=OuterRef('invoice_id'))
+    Transaction.objects.filter(account__isnull=True, invoice__isnull=False).update(
+        credit_card_id=Subquery(invoices.values('card_id')[:1]),
+        owner_id=Subquery(invoices.values('card__owner_id')[:1]),
+        is_shared=Subquery(invoices.values('card__is_shared')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_transaction_created_at_transaction_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='credit_card',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transactions', to='core.creditcard'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='owner',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transactions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_owner_and_card, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['house', 'owner', '-date'], name='tx_house_owner_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['house', 'is_shared', '-date'], name='tx_house_shared_date_idx'),
+        ),
+    ]
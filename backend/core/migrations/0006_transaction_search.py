@@ -0,0 +1,88 @@
+# Generated by Django 6.0 on 2026-10-19 06:10
+
+from django.db import migrations
+
+# SQL congelado como era nesta migration; a busca atual está em core/search.py
+POSTGRES_INSTALL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "ALTER TABLE core_transaction ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('portuguese', coalesce(description, ''))) STORED",
+    "ALTER TABLE core_transactionitem ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('portuguese', coalesce(description, ''))) STORED",
+    "CREATE INDEX IF NOT EXISTS core_tx_search_idx ON core_transaction USING GIN (search_vector)",
+    "CREATE INDEX IF NOT EXISTS core_txitem_search_idx ON core_transactionitem USING GIN (search_vector)",
+    "CREATE INDEX IF NOT EXISTS core_tx_desc_trgm_idx ON core_transaction USING GIN (description gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS core_txitem_desc_trgm_idx ON core_transactionitem USING GIN (description gin_trgm_ops)",
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS core_txitem_desc_trgm_idx",
+    "DROP INDEX IF EXISTS core_tx_desc_trgm_idx",
+    "DROP INDEX IF EXISTS core_txitem_search_idx",
+    "DROP INDEX IF EXISTS core_tx_search_idx",
+    "ALTER TABLE core_transactionitem DROP COLUMN IF EXISTS search_vector",
+    "ALTER TABLE core_transaction DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_TABLES = ['core_transaction', 'core_transactionitem']
+
+
+def sqlite_install(table):
+    fts = f"{table}_fts"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"description, content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, description) VALUES (new.id, new.description); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, description) VALUES ('delete', old.id, old.description); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF description ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, description) VALUES ('delete', old.id, old.description); "
+        f"INSERT INTO {fts}(rowid, description) VALUES (new.id, new.description); END",
+        # Indexa as linhas que já existiam
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def sqlite_uninstall(table):
+    fts = f"{table}_fts"
+    return [f"DROP TRIGGER IF EXISTS {fts}_{suffix}" for suffix in ('ai', 'ad', 'au')] + [
+        f"DROP TABLE IF EXISTS {fts}",
+    ]
+
+
+def install_search(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        statements = POSTGRES_INSTALL
+    elif vendor == 'sqlite':
+        statements = [sql for table in SQLITE_TABLES for sql in sqlite_install(table)]
+    else:
+        return
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def uninstall_search(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        statements = POSTGRES_UNINSTALL
+    elif vendor == 'sqlite':
+        statements = [sql for table in SQLITE_TABLES for sql in sqlite_uninstall(table)]
+    else:
+        return
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_transaction_owner_credit_card'),
+    ]
+
+    # Índices de busca textual fora dos models (consultas em core/search.py):
+    # tsvector gerado + GIN + trigram no PostgreSQL, FTS5 + triggers no SQLite.
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-19 07:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_transaction_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='house',
+            name='change_seq',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='house',
+            name='change_seq_floor',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.BigIntegerField()),
+                ('model', models.CharField(max_length=30)),
+                ('object_id', models.CharField(max_length=40)),
+                ('op', models.CharField(choices=[('UPSERT', 'Criado/Alterado'), ('DELETE', 'Removido')], max_length=6)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('house', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='changes', to='core.house')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('house', 'seq'), name='changelog_house_seq_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-19 09:12
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+BATCH_SIZE = 5000
+
+
+def backfill_transaction_date(apps, schema_editor):
+    # Em lotes por faixa de id: cada lote é uma transação curta (migration não atômica)
+    TransactionItem = apps.get_model('core', 'TransactionItem')
+    Transaction = apps.get_model('core', 'Transaction')
+    manager = TransactionItem.objects.using(schema_editor.connection.alias)
+    last_id = manager.order_by('-id').values_list('id', flat=True).first() or 0
+    date_of_transaction = Subquery(Transaction.objects.filter(id=OuterRef('transaction_id')).values('date')[:1])
+    for start in range(0, last_id, BATCH_SIZE):
+        manager.filter(
+            id__gt=start, id__lte=start + BATCH_SIZE, transaction_date__isnull=True
+        ).update(transaction_date=date_of_transaction)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('core', '0007_changelog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transactionitem',
+            name='transaction_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_transaction_date, migrations.RunPython.noop),
+    ]
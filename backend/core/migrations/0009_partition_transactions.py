@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-19 10:40
+
+from django.db import migrations
+from django.db.migrations.exceptions import IrreversibleError
+
+
+def unpartition_transactions(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('core_transaction')")
+        row = cursor.fetchone()
+    if row and row[0] == 'p':
+        raise IrreversibleError(
+            'core_transaction está particionada; a volta para tabela comum não é automática.'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_transactionitem_transaction_date'),
+    ]
+
+    # Particionamento por data (opcional, TRANSACTION_PARTITIONING), fora dos
+    # models: o Django continua vendo 'id' como chave primária. A conversão é
+    # online, em lotes e com troca de tabelas, e não roda no migrate: fica com
+    # manage.py partition_transactions convert (ver core/partitioning.py).
+    # Aqui só a trava para não desfazer migrations sobre tabelas particionadas.
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, unpartition_transactions),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='house',
+            name='deletion_requested_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 6.0 on 2026-10-19 10:32
+
+import re
+import uuid
+
+from django.db import migrations, models
+
+INSTALLMENT_RE = re.compile(r'^(.*) \((\d+)/(\d+)\)$')
+
+
+def group_existing_installments(apps, schema_editor):
+    # Séries antigas: "Descrição (i/n)" no mesmo cartão, com a parcela i no
+    # mês i-1 depois da primeira (como o TransactionViewSet.create gera)
+    Transaction = apps.get_model('core', 'Transaction')
+    manager = Transaction.objects.using(schema_editor.connection.alias)
+    series = {}
+    for pk, house_id, card_id, description, date in (
+        manager.filter(installment_group__isnull=True, invoice__isnull=False, description__regex=r' \([0-9]+/[0-9]+\)$')
+        .values_list('id', 'house_id', 'invoice__card_id', 'description', 'date').iterator(chunk_size=2000)
+    ):
+        match = INSTALLMENT_RE.match(description)
+        if not match:
+            continue
+        base, number, total = match.group(1), int(match.group(2)), int(match.group(3))
+        if not 1 <= number <= total:
+            continue
+        first_month = date.year * 12 + date.month - 1 - (number - 1)
+        series.setdefault((house_id, card_id, base, total, first_month), []).append(pk)
+
+    for ids in series.values():
+        if len(ids) > 1:
+            manager.filter(id__in=ids).update(installment_group=uuid.uuid4())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_house_deletion_requested_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='installment_group',
+            field=models.UUIDField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(group_existing_installments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 6.0 on 2026-10-19 11:05
+
+import core.money
+from django.db import migrations, models
+
+BATCH_SIZE = 5000
+
+# (model, campo, opções finais do MoneyField)
+MONEY_FIELDS = [
+    ('account', 'balance', {'default': 0}),
+    ('account', 'limit', {'default': 0}),
+    ('creditcard', 'limit_total', {'verbose_name': 'Limite Total'}),
+    ('creditcard', 'limit_available', {'default': 0, 'verbose_name': 'Limite Disponível'}),
+    ('invoice', 'value', {'default': 0}),
+    ('invoice', 'amount_paid', {'default': 0}),
+    ('recurringbill', 'base_value', {'verbose_name': 'Valor Base'}),
+    ('transaction', 'value', {}),
+    ('transactionitem', 'value', {}),
+    ('product', 'estimated_price', {'default': 0}),
+    ('shoppinglist', 'real_unit_price', {'default': 0, 'verbose_name': 'Preço Real (Un)'}),
+    ('shoppinglist', 'discount_unit_price', {'default': 0, 'verbose_name': 'Preço c/ Desc (Un)'}),
+    ('monthlyrollup', 'total', {'default': 0}),
+]
+
+
+def copy_to_cents(apps, schema_editor):
+    # SQL direto (reais * 100, arredondado) em lotes por faixa de id; cada lote
+    # é uma transação curta (migration não atômica)
+    connection = schema_editor.connection
+    quote = connection.ops.quote_name
+    for model_name, field, _options in MONEY_FIELDS:
+        model = apps.get_model('core', model_name)
+        table = quote(model._meta.db_table)
+        last_id = model.objects.using(connection.alias).order_by('-id').values_list('id', flat=True).first() or 0
+        with connection.cursor() as cursor:
+            for start in range(0, last_id, BATCH_SIZE):
+                cursor.execute(
+                    f"UPDATE {table} SET {quote(field + '_cents')} = ROUND({quote(field)} * 100) "
+                    f"WHERE id > %s AND id <= %s",
+                    [start, start + BATCH_SIZE],
+                )
+
+
+def copy_to_reais(apps, schema_editor):
+    # Volta (migrate core 0012): centavos / 100 na coluna decimal recriada
+    connection = schema_editor.connection
+    quote = connection.ops.quote_name
+    for model_name, field, _options in MONEY_FIELDS:
+        model = apps.get_model('core', model_name)
+        table = quote(model._meta.db_table)
+        last_id = model.objects.using(connection.alias).order_by('-id').values_list('id', flat=True).first() or 0
+        with connection.cursor() as cursor:
+            for start in range(0, last_id, BATCH_SIZE):
+                cursor.execute(
+                    f"UPDATE {table} SET {quote(field)} = {quote(field + '_cents')} / 100.0 "
+                    f"WHERE id > %s AND id <= %s",
+                    [start, start + BATCH_SIZE],
+                )
+
+
+def operations():
+    # Coluna nova em centavos ao lado da antiga, cópia, e a nova assume o nome.
+    # A decimal antiga fica anulável antes de sair: na volta ela é recriada
+    # vazia, recebe os reais (copy_to_reais) e só então volta a NOT NULL.
+    before = [
+        migrations.AddField(model_name, field + '_cents', models.BigIntegerField(null=True))
+        for model_name, field, _options in MONEY_FIELDS
+    ]
+    relax = [
+        migrations.AlterField(model_name, field, models.DecimalField(
+            max_digits=14 if model_name == 'monthlyrollup' else 10, decimal_places=2, null=True,
+        ))
+        for model_name, field, _options in MONEY_FIELDS
+    ]
+    after = []
+    for model_name, field, options in MONEY_FIELDS:
+        after += [
+            migrations.RemoveField(model_name, field),
+            migrations.RenameField(model_name, field + '_cents', field),
+            migrations.AlterField(model_name, field, core.money.MoneyField(**options)),
+        ]
+    return (
+        before
+        + [migrations.RunPython(copy_to_cents, migrations.RunPython.noop)]
+        + relax
+        + [migrations.RunPython(migrations.RunPython.noop, copy_to_reais)]
+        + after
+    )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('core', '0012_transaction_installment_group'),
+    ]
+
+    operations = operations()
@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-19 15:20
+
+import core.money
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='house',
+            name='rules_version',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='CategoryRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('CONTAINS', 'Contém'), ('PREFIX', 'Começa com'), ('REGEX', 'Expressão regular')], default='CONTAINS', max_length=10)),
+                ('pattern', models.CharField(blank=True, max_length=200)),
+                ('min_value', core.money.MoneyField(blank=True, null=True)),
+                ('max_value', core.money.MoneyField(blank=True, null=True)),
+                ('priority', models.PositiveIntegerField(default=100)),
+                ('is_active', models.BooleanField(default=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rules', to='core.category')),
+                ('house', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='category_rules', to='core.house')),
+            ],
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 6.0 on 2026-10-19 16:05
+
+from django.db import migrations
+
+# SQL congelado como era nesta migration; a busca atual está em core/search.py
+DROP_SEARCH_VECTOR = [
+    "DROP INDEX IF EXISTS core_txitem_search_idx",
+    "DROP INDEX IF EXISTS core_tx_search_idx",
+    "ALTER TABLE core_transactionitem DROP COLUMN IF EXISTS search_vector",
+    "ALTER TABLE core_transaction DROP COLUMN IF EXISTS search_vector",
+]
+
+UNACCENT_SEARCH_VECTOR = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() é STABLE (lê o dicionário pelo search_path): o wrapper fixa o
+    # dicionário para poder entrar na coluna gerada. Não é removido na volta:
+    # as tabelas <tabela>_old da conversão para partições ainda dependem dele.
+    "CREATE OR REPLACE FUNCTION core_unaccent(text) RETURNS text "
+    "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT "
+    "AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$",
+    "ALTER TABLE core_transaction ADD COLUMN search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('simple', core_unaccent(coalesce(description, '')))) STORED",
+    "ALTER TABLE core_transactionitem ADD COLUMN search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('simple', core_unaccent(coalesce(description, '')))) STORED",
+    "CREATE INDEX core_tx_search_idx ON core_transaction USING GIN (search_vector)",
+    "CREATE INDEX core_txitem_search_idx ON core_transactionitem USING GIN (search_vector)",
+]
+
+PORTUGUESE_SEARCH_VECTOR = [
+    "ALTER TABLE core_transaction ADD COLUMN search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('portuguese', coalesce(description, ''))) STORED",
+    "ALTER TABLE core_transactionitem ADD COLUMN search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('portuguese', coalesce(description, ''))) STORED",
+    "CREATE INDEX core_tx_search_idx ON core_transaction USING GIN (search_vector)",
+    "CREATE INDEX core_txitem_search_idx ON core_transactionitem USING GIN (search_vector)",
+]
+
+
+def rebuild(statements):
+    # Recria as colunas tsvector com outra expressão: coluna gerada não muda
+    # de expressão no lugar, e o ADD reescreve a tabela. Os índices trigram
+    # não dependem dela e ficam como estão.
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for sql in DROP_SEARCH_VECTOR + statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_category_rules'),
+    ]
+
+    # Busca sem acento e por prefixo também no PostgreSQL (ver core/search.py).
+    # No SQLite o FTS5 já era assim: nada muda.
+    operations = [
+        migrations.RunPython(rebuild(UNACCENT_SEARCH_VECTOR), rebuild(PORTUGUESE_SEARCH_VECTOR)),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-19 16:30
+
+import core.money
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_search_unaccent_prefix'),
+    ]
+
+    # Só o estado: max_digits vale para a API/formulários, a coluna segue em centavos
+    operations = [
+        migrations.AlterField(
+            model_name='monthlyrollup',
+            name='total',
+            field=core.money.MoneyField(default=0, max_digits=14),
+        ),
+    ]
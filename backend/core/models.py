@@ -1,17 +1,31 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 from datetime import date
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 import uuid
 
+from .money import MoneyField
+
 # --- GESTÃO DA CASA (MULTI-TENANCY) ---
 
 class House(models.Model):
     name = models.CharField(max_length=100, verbose_name="Nome da Casa")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # --- LOG DE ALTERAÇÕES (ver core/changelog.py) ---
+    # Último número de sequência usado e o piso abaixo do qual o log foi compactado
+    change_seq = models.BigIntegerField(default=0)
+    change_seq_floor = models.BigIntegerField(default=0)
+
+    # Exclusão pedida: os dados são apagados em segundo plano (core/purge.py)
+    deletion_requested_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    # Sobe a cada mudança nas regras de categorização (core/categorization.py)
+    rules_version = models.BigIntegerField(default=0, editable=False)
+
     def __str__(self):
         return self.name
 
@@ -43,13 +57,33 @@ class Category(models.Model):
 
 # --- MÓDULO FINANCEIRO ---
 
+class CategoryRule(models.Model):
+    """
+    Regra de categorização automática da casa: transação sem categoria cuja
+    descrição casa com o padrão (e cujo valor cai na faixa, se houver) recebe
+    a categoria. Menor prioridade vence. Ver core/categorization.py.
+    """
+    KINDS = [('CONTAINS', 'Contém'), ('PREFIX', 'Começa com'), ('REGEX', 'Expressão regular')]
+
+    house = models.ForeignKey(House, on_delete=models.CASCADE, related_name='category_rules')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='rules')
+    kind = models.CharField(max_length=10, choices=KINDS, default='CONTAINS')
+    pattern = models.CharField(max_length=200, blank=True)  # vazio: só a faixa de valor
+    min_value = MoneyField(null=True, blank=True)
+    max_value = MoneyField(null=True, blank=True)
+    priority = models.PositiveIntegerField(default=100)
+    is_active = models.BooleanField(default=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} '{self.pattern}' -> {self.category_id}"
+
 class Account(models.Model):
     """Conta Corrente ou Carteira"""
     house = models.ForeignKey(House, on_delete=models.CASCADE, related_name='accounts')
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='owned_accounts')
     name = models.CharField(max_length=50)
-    balance = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
-    limit = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    balance = MoneyField(default=0)
+    limit = MoneyField(default=0)
     is_shared = models.BooleanField(default=True, verbose_name="Compartilhado com a casa?")
 
     def __str__(self):
@@ -59,8 +93,8 @@ class CreditCard(models.Model):
     house = models.ForeignKey(House, on_delete=models.CASCADE, related_name='credit_cards')
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='owned_cards')
     name = models.CharField(max_length=50)
-    limit_total = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Limite Total")
-    limit_available = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Limite Disponível", default=0)
+    limit_total = MoneyField(verbose_name="Limite Total")
+    limit_available = MoneyField(verbose_name="Limite Disponível", default=0)
     closing_day = models.IntegerField(verbose_name="Dia Fechamento")
     due_day = models.IntegerField(verbose_name="Dia Vencimento")
     is_shared = models.BooleanField(default=True)
@@ -74,10 +108,10 @@ class Invoice(models.Model):
     card = models.ForeignKey(CreditCard, on_delete=models.CASCADE, related_name='invoices')
     reference_date = models.DateField(help_text="Data de referência")
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='OPEN')
-    value = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    value = MoneyField(default=0)
     
     # NOVO CAMPO: Para controlar pagamentos parciais
-    amount_paid = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    amount_paid = MoneyField(default=0)
 
     def __str__(self):
         return f"{self.card.name} - {self.status}"
@@ -85,7 +119,7 @@ class Invoice(models.Model):
 class RecurringBill(models.Model):
     house = models.ForeignKey(House, on_delete=models.CASCADE, related_name='recurring_bills')
     name = models.CharField(max_length=100)
-    base_value = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Valor Base")
+    base_value = MoneyField(verbose_name="Valor Base")
     due_day = models.IntegerField(verbose_name="Dia de Vencimento")
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
     is_active = models.BooleanField(default=True)
@@ -97,12 +131,30 @@ from django.db import models
 from django.utils import timezone
 # Certifique-se de importar suas outras models (House, Category, Account, etc)
 
+class TransactionQuerySet(models.QuerySet):
+    def with_installment_series(self):
+        """As transações da queryset mais as demais parcelas das suas séries."""
+        groups = self.exclude(installment_group=None).values('installment_group')
+        return Transaction.objects.filter(
+            models.Q(pk__in=self.values('pk')) | models.Q(installment_group__in=groups)
+        )
+
+    def delete_with_reversal(self):
+        """
+        Apaga as transações (com as séries de parcelas inteiras) desfazendo o
+        efeito em contas, faturas e limites de cartão (ver core/ledger.py).
+        Devolve o mesmo formato do delete(): (total, {rótulo: quantidade}).
+        """
+        from .ledger import delete_transactions
+        return delete_transactions(self)
+
+
 class Transaction(models.Model):
     TYPES = [('INCOME', 'Receita'), ('EXPENSE', 'Despesa')]
 
     house = models.ForeignKey(House, on_delete=models.CASCADE, related_name='transactions')
     description = models.CharField(max_length=100)
-    value = models.DecimalField(max_digits=10, decimal_places=2)
+    value = MoneyField()
     date = models.DateField(default=timezone.now)
     type = models.CharField(max_length=10, choices=TYPES)
     
@@ -119,23 +171,50 @@ class Transaction(models.Model):
     invoice = models.ForeignKey(Invoice, on_delete=models.CASCADE, null=True, blank=True, related_name='transactions')
     recurring_bill = models.ForeignKey(RecurringBill, on_delete=models.SET_NULL, null=True, blank=True, related_name='transactions')
 
+    # --- DONO E ORIGEM DESNORMALIZADOS ---
+    # Copiados da conta (ou do cartão da fatura) na criação. A listagem filtra
+    # direto por house/owner/is_shared, sem JOIN com Account e sem DISTINCT.
+    owner = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='transactions')
+    credit_card = models.ForeignKey(CreditCard, on_delete=models.SET_NULL, null=True, blank=True, related_name='transactions')
+
+    # Mesmo valor em todas as parcelas de uma compra parcelada no cartão
+    installment_group = models.UUIDField(null=True, blank=True, editable=False, db_index=True)
+
+    objects = TransactionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['house', 'owner', '-date'], name='tx_house_owner_date_idx'),
+            models.Index(fields=['house', 'is_shared', '-date'], name='tx_house_shared_date_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         # 1. Verifica se é uma criação nova (não tem ID ainda)
         is_new = self.pk is None
         
-        # 2. SE FOR NOVO: Define a privacidade automaticamente antes de salvar
+        # 2. SE FOR NOVO: Define a privacidade (e o dono) automaticamente antes de salvar
         if is_new:
             # Prioridade 1: Herdar da Conta Bancária
             if self.account:
                 self.is_shared = self.account.is_shared
+                if self.owner_id is None:
+                    self.owner_id = self.account.owner_id
             
             # Prioridade 2: Herdar do Cartão de Crédito (via Fatura)
             elif self.invoice and self.invoice.card:
                 self.is_shared = self.invoice.card.is_shared
+                self.credit_card_id = self.invoice.card_id
+                if self.owner_id is None:
+                    self.owner_id = self.invoice.card.owner_id
         
         # 3. Salva a transação no banco
         super().save(*args, **kwargs)
 
+        # Itens guardam a data da transação (chave de partição); no PostgreSQL
+        # particionado a FK já propaga com ON UPDATE CASCADE
+        if not is_new:
+            self.items.exclude(transaction_date=self.date).update(transaction_date=self.date)
+
         # 4. Lógica de Atualização de Saldo (Opcional, se você estiver usando)
         if is_new and self.account:
             if self.type == 'EXPENSE':
@@ -150,7 +229,7 @@ class Product(models.Model):
     house = models.ForeignKey(House, on_delete=models.CASCADE, related_name='products', null=True)
     name = models.CharField(max_length=100, verbose_name="Nome do Produto")
     measure_unit = models.CharField(max_length=10, default='un')
-    estimated_price = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    estimated_price = MoneyField(default=0)
     
     # NOVO CAMPO: Define o padrão para este produto
     min_quantity = models.DecimalField(max_digits=8, decimal_places=2, default=1, verbose_name="Qtd Mínima Padrão")
@@ -176,8 +255,8 @@ class ShoppingList(models.Model):
     quantity_to_buy = models.DecimalField(max_digits=8, decimal_places=2, default=1)
     
     # NOVOS CAMPOS FINANCEIROS
-    real_unit_price = models.DecimalField(max_digits=10, decimal_places=2, default=0.00, verbose_name="Preço Real (Un)")
-    discount_unit_price = models.DecimalField(max_digits=10, decimal_places=2, default=0.00, verbose_name="Preço c/ Desc (Un)")
+    real_unit_price = MoneyField(default=0, verbose_name="Preço Real (Un)")
+    discount_unit_price = MoneyField(default=0, verbose_name="Preço c/ Desc (Un)")
     
     is_purchased = models.BooleanField(default=False) # "No Carrinho"
 
@@ -193,9 +272,18 @@ class TransactionItem(models.Model):
     description = models.CharField(max_length=255) 
     
     # Simplificando valores para alinhar com o frontend
-    value = models.DecimalField(max_digits=10, decimal_places=2) # Valor total do item
+    value = MoneyField() # Valor total do item
     quantity = models.DecimalField(max_digits=10, decimal_places=2, default=1)
 
+    # Cópia de transaction.date: chave de partição dos itens no PostgreSQL
+    # particionado (ver core/partitioning.py). Quem usa bulk_create preenche.
+    transaction_date = models.DateField(null=True, blank=True, editable=False)
+
+    def save(self, *args, **kwargs):
+        if self.transaction_date is None and self.transaction_id:
+            self.transaction_date = self.transaction.date
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.description} ({self.quantity})"
     
@@ -210,13 +298,101 @@ class HouseInvitation(models.Model):
     def __str__(self):
         return f"Convite para {self.email} ({self.house.name})"
     
+class ChangeLogEntry(models.Model):
+    """
+    Log append-only de alterações por casa, usado pelo /sync/.
+    'seq' cresce por casa (House.change_seq); o cliente guarda o último seq
+    que viu e pede só o que veio depois.
+    """
+    OPS = [('UPSERT', 'Criado/Alterado'), ('DELETE', 'Removido')]
+
+    house = models.ForeignKey(House, on_delete=models.CASCADE, related_name='changes')
+    seq = models.BigIntegerField()
+    model = models.CharField(max_length=30)
+    object_id = models.CharField(max_length=40)
+    op = models.CharField(max_length=6, choices=OPS)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['house', 'seq'], name='changelog_house_seq_uniq'),
+        ]
+
+    def __str__(self):
+        return f"#{self.seq} {self.op} {self.model}:{self.object_id}"
+
+# --- ARQUIVO FRIO (ver core/archive.py) ---
+
+class MonthlyRollup(models.Model):
+    """
+    Totais de um mês arquivado por tipo e categoria. O /history/ soma estes
+    totais aos das transações que ainda estão nas tabelas.
+    """
+    house = models.ForeignKey(House, on_delete=models.CASCADE, related_name='monthly_rollups')
+    month = models.DateField()  # primeiro dia do mês
+    type = models.CharField(max_length=10, choices=Transaction.TYPES)
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
+    category_name = models.CharField(max_length=50, blank=True)  # nome na hora de arquivar
+    total = MoneyField(default=0, max_digits=14)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=['house', 'month'], name='rollup_house_month_idx')]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.type} {self.category_name or 'Geral'}: {self.total}"
+
+
+class TransactionArchive(models.Model):
+    """
+    Transações (com itens) de uma casa num mês, tiradas das tabelas quentes:
+    uma linha JSON por transação, compactadas com zlib. Um mês pode ter
+    vários blocos (rodadas diferentes do archive_transactions).
+    """
+    house = models.ForeignKey(House, on_delete=models.CASCADE, related_name='transaction_archives')
+    month = models.DateField()  # primeiro dia do mês
+    row_count = models.PositiveIntegerField()
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['house', 'month'], name='archive_house_month_idx')]
+
+    def __str__(self):
+        return f"{self.house_id} {self.month:%Y-%m} ({self.row_count} transações)"
+
+# --- IDEMPOTÊNCIA (ver core/idempotency.py) ---
+
+class IdempotencyKey(models.Model):
+    """
+    Resposta gravada de um POST com header Idempotency-Key, devolvida às
+    repetições da mesma chave até expires_at.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)  # sha256 de método, rota e corpo
+    status_code = models.PositiveSmallIntegerField(null=True)
+    body = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key} ({self.status_code})"
+
+
 @receiver(post_save, sender=HouseMember)
 def enforce_master_role_for_creator(sender, instance, created, **kwargs):
     """
     Garante que o PRIMEIRO membro de qualquer casa seja sempre MASTER.
     Funciona tanto para cadastro quanto para criação manual.
     """
-    if created:
+    # Quem já entra como MASTER (cadastro sem convite, casa nova) dispensa a contagem
+    if created and instance.role != 'MASTER':
         # Conta quantos membros essa casa tem
         members_count = HouseMember.objects.filter(house=instance.house).count()
         
@@ -0,0 +1,99 @@
+"""
+Valores monetários em centavos inteiros.
+
+O MoneyField grava BigInteger (centavos) no banco e devolve Decimal com duas
+casas no Python, então o código que soma, compara e serializa reais continua
+igual. Somas e ordenações rodam sobre inteiros no SQL; para somar no Python
+sem Decimal, leia a coluna crua com cents('campo') em .values()/.annotate().
+
+Cuidado com expressões: F('valor') + Decimal('1.50') mistura centavos com
+reais. Passe o número como Value(x, output_field=<o MoneyField>) para ele ser
+convertido (ver ledger._grouped_update).
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.db.models import ExpressionWrapper, F
+from django.utils.functional import cached_property
+
+CENT = Decimal('0.01')
+
+
+def to_decimal(value):
+    """Reais com duas casas (arredondamento comercial)."""
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def to_cents(value):
+    return int(to_decimal(value) * 100)
+
+
+def from_cents(cents):
+    if not isinstance(cents, int):
+        cents = to_cents(Decimal(str(cents)) / 100)  # AVG e afins voltam fracionados
+    return Decimal(cents).scaleb(-2)
+
+
+def cents_to_float(cents):
+    """Centavos -> número do JSON (o /history/ responde em float)."""
+    return cents / 100
+
+
+def split_installments(total, installments):
+    """
+    Divide 'total' em parcelas exatas: todas iguais em centavos e o resto
+    da divisão na primeira. A soma das parcelas é sempre o total.
+    """
+    cents = to_cents(total)
+    installments = max(int(installments), 1)
+    base, remainder = divmod(cents, installments)
+    return [from_cents(base + remainder)] + [from_cents(base)] * (installments - 1)
+
+
+def cents(field_name):
+    """A coluna de um MoneyField como inteiro (centavos), sem conversão."""
+    return ExpressionWrapper(F(field_name), output_field=models.BigIntegerField())
+
+
+class MoneyField(models.BigIntegerField):
+    description = "Valor monetário (centavos)"
+
+    def __init__(self, *args, max_digits=10, **kwargs):
+        # Dígitos em reais aceitos na API e nos formulários (o banco guarda centavos)
+        self.max_digits = max_digits
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.max_digits != 10:
+            kwargs['max_digits'] = self.max_digits
+        return name, path, args, kwargs
+
+    @cached_property
+    def validators(self):
+        # Os limites do BigIntegerField valem para os centavos, não para os reais
+        return [*self.default_validators, *self._validators]
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else from_cents(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, Decimal) and value.as_tuple().exponent == -2:
+            return value
+        try:
+            return to_decimal(value)
+        except ArithmeticError:
+            raise ValidationError(self.error_messages['invalid'], code='invalid', params={'value': value})
+
+    def get_prep_value(self, value):
+        value = models.Field.get_prep_value(self, value)
+        return None if value is None else to_cents(value)
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(self, **{
+            'form_class': forms.DecimalField, 'max_digits': self.max_digits, 'decimal_places': 2, **kwargs,
+        })
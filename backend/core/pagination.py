@@ -0,0 +1,53 @@
+"""
+Paginação com contagem estimada para as tabelas grandes (usada no admin).
+
+No PostgreSQL, COUNT(*) percorre a tabela (ou o índice) inteira a cada página.
+Aqui a contagem sai das estatísticas do banco:
+- sem filtro: pg_class.reltuples da tabela (somando as partições, ver
+  core/partitioning.py), atualizado pelo ANALYZE/autovacuum;
+- com filtro: a estimativa de linhas do planner (EXPLAIN).
+Se a estimativa ficar abaixo de ESTIMATED_COUNT_THRESHOLD, ou fora do
+PostgreSQL, a contagem é exata como no Paginator do Django.
+"""
+import json
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+# Tabela comum: a própria linha. Particionada ('p'): a soma das partições
+TABLE_ESTIMATE_SQL = """
+    SELECT SUM(GREATEST(reltuples, 0)) FROM pg_class
+    WHERE (oid = %s::regclass AND relkind <> 'p')
+       OR oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass)
+"""
+
+
+def table_estimate(model, using):
+    table = connections[using].ops.quote_name(model._meta.db_table)
+    with connections[using].cursor() as cursor:
+        cursor.execute(TABLE_ESTIMATE_SQL, [table, table])
+        return int(cursor.fetchone()[0] or 0)
+
+
+def planner_estimate(queryset):
+    plan = json.loads(queryset.explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def estimated_rows(queryset):
+    if not queryset.query.where:
+        return table_estimate(queryset.model, queryset.db)
+    return planner_estimate(queryset)
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if hasattr(queryset, 'query') and connections[queryset.db].vendor == 'postgresql':
+            estimate = estimated_rows(queryset)
+            if estimate >= settings.ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
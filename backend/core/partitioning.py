@@ -0,0 +1,568 @@
+"""
+Particionamento por data de core_transaction e core_transactionitem
+(PostgreSQL >= 15, opcional: TRANSACTION_PARTITIONING = 'month' ou 'year').
+
+- core_transaction: PARTITION BY RANGE (date), chave primária (id, date).
+- core_transactionitem: PARTITION BY RANGE (transaction_date), cópia da data
+  da transação, com FK composta (transaction_id, transaction_date) ->
+  core_transaction (id, date) ON UPDATE CASCADE: mudar a data da transação
+  leva os itens junto para a partição certa.
+- Cada tabela tem uma partição DEFAULT para datas fora das faixas criadas.
+  As faixas futuras são criadas com antecedência (create_partitions, comando
+  partition_transactions create, TRANSACTION_PARTITIONS_AHEAD).
+
+Conversão online de tabelas existentes (manage.py partition_transactions
+convert, fora do migrate), sem bloquear escrita durante a cópia:
+1. prepare: cria as tabelas-sombra particionadas (<tabela>_p) e triggers nas
+   tabelas atuais que repetem cada INSERT/UPDATE/DELETE na sombra;
+2. backfill: copia as linhas existentes em lotes curtos por faixa de id;
+3. swap: numa transação curta (lock_timeout), troca os nomes. As tabelas
+   antigas ficam como <tabela>_old até drop_old.
+
+O id continua único pela sequence, mas o banco só garante unicidade de
+(id, data): buscas por id consultam o índice de cada partição.
+"""
+import datetime
+import hashlib
+import json
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+
+INTERVALS = ('month', 'year')
+MIN_SERVER_VERSION = 150000  # FK com ON UPDATE CASCADE entre partições (PG 15)
+
+TRANSACTION_TABLE = 'core_transaction'
+ITEM_TABLE = 'core_transactionitem'
+
+# Tabela -> coluna de partição
+PARTITION_KEYS = {
+    TRANSACTION_TABLE: 'date',
+    ITEM_TABLE: 'transaction_date',
+}
+
+
+class PartitioningError(Exception):
+    pass
+
+
+# --- FAIXAS ---
+
+def partition_bounds(day, interval):
+    """(início, fim exclusivo) da faixa que contém 'day'."""
+    if interval == 'month':
+        start = day.replace(day=1)
+        return start, start + relativedelta(months=1)
+    if interval == 'year':
+        start = day.replace(month=1, day=1)
+        return start, start + relativedelta(years=1)
+    raise PartitioningError(f"Intervalo inválido: {interval!r} (use {' ou '.join(INTERVALS)}).")
+
+
+def partition_name(table, start, interval):
+    """core_transaction_2025_01 (mensal) ou core_transaction_2025 (anual)."""
+    if interval == 'month':
+        return f"{table}_{start:%Y_%m}"
+    return f"{table}_{start:%Y}"
+
+
+def default_partition_name(table):
+    return f"{table}_default"
+
+
+def partition_ranges(first, last, interval):
+    """Faixas consecutivas cobrindo de 'first' até 'last' (inclusive)."""
+    ranges = []
+    start, end = partition_bounds(first, interval)
+    while start <= last:
+        ranges.append((start, end))
+        start, end = partition_bounds(end, interval)
+    return ranges
+
+
+def future_ranges(interval, ahead, today=None):
+    """Faixa atual mais 'ahead' faixas seguintes."""
+    today = today or datetime.date.today()
+    step = relativedelta(months=ahead) if interval == 'month' else relativedelta(years=ahead)
+    return partition_ranges(today, today + step, interval)
+
+
+# --- CATÁLOGO ---
+
+def _fetch(cursor, sql, params=None):
+    cursor.execute(sql, params or [])
+    return cursor.fetchall()
+
+
+def _scalar(cursor, sql, params=None):
+    cursor.execute(sql, params or [])
+    return cursor.fetchone()[0]
+
+
+def check_server(connection):
+    if connection.vendor != 'postgresql':
+        raise PartitioningError("Particionamento só existe no PostgreSQL.")
+    if connection.pg_version < MIN_SERVER_VERSION:
+        raise PartitioningError("Particionamento exige PostgreSQL 15 ou superior.")
+
+
+def relkind(cursor, table):
+    """'r' (tabela comum), 'p' (particionada) ou None (não existe)."""
+    rows = _fetch(cursor, "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [table])
+    return rows[0][0] if rows else None
+
+
+def is_partitioned(connection, table=TRANSACTION_TABLE):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        return relkind(cursor, table) == 'p'
+
+
+def partitions(cursor, table):
+    """Nomes das partições de 'table', em ordem."""
+    rows = _fetch(cursor, """
+        SELECT child.relname FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = to_regclass(%s)
+        ORDER BY child.relname
+    """, [table])
+    return [row[0] for row in rows]
+
+
+def _columns(cursor, table):
+    # Colunas graváveis (sem as geradas, como search_vector)
+    rows = _fetch(cursor, """
+        SELECT attname FROM pg_attribute
+        WHERE attrelid = to_regclass(%s) AND attnum > 0 AND NOT attisdropped AND attgenerated = ''
+        ORDER BY attnum
+    """, [table])
+    return [row[0] for row in rows]
+
+
+def _indexes(cursor, table):
+    # (nome, definição) dos índices, sem a chave primária
+    return _fetch(cursor, """
+        SELECT index.relname, pg_get_indexdef(pg_index.indexrelid)
+        FROM pg_index JOIN pg_class index ON index.oid = pg_index.indexrelid
+        WHERE pg_index.indrelid = to_regclass(%s) AND NOT pg_index.indisprimary
+        ORDER BY index.relname
+    """, [table])
+
+
+def _foreign_keys(cursor, table):
+    # (nome, definição, tabela referenciada)
+    return _fetch(cursor, """
+        SELECT conname, pg_get_constraintdef(oid), confrelid::regclass::text
+        FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'f'
+        ORDER BY conname
+    """, [table])
+
+
+def _primary_key_name(cursor, table):
+    return _scalar(cursor, """
+        SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'p'
+    """, [table])
+
+
+def _short_name(prefix, name):
+    # Nomes temporários de índice (limite de 63 caracteres do PostgreSQL)
+    return f"{prefix}_{hashlib.md5(name.encode('utf-8')).hexdigest()[:20]}"
+
+
+def _shadow(table):
+    return f"{table}_p"
+
+
+def _old(table):
+    return f"{table}_old"
+
+
+# --- PARTIÇÕES ---
+
+def _has_default_rows(cursor, table, start, end):
+    default, key = default_partition_name(table), PARTITION_KEYS[table]
+    return _scalar(cursor, f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {key} >= %s AND {key} < %s)", [start, end])
+
+
+def _attach_from_default(cursor, start, end, interval):
+    """
+    A DEFAULT já tem linhas na faixa (ex.: parcelas futuras), e o PostgreSQL
+    recusa CREATE ... PARTITION OF: as linhas vão para tabelas avulsas, que
+    então são anexadas. Itens saem antes das transações, e a checagem adiada
+    da FK (que procura a chave só na partição de onde a transação saiu) roda
+    enquanto os itens ainda estão fora da tabela.
+    """
+    for table in (ITEM_TABLE, TRANSACTION_TABLE):
+        name, key = partition_name(table, start, interval), PARTITION_KEYS[table]
+        columns = ', '.join(_columns(cursor, table))
+        cursor.execute(
+            f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING CONSTRAINTS)"
+        )
+        cursor.execute(f"""
+            WITH moved AS (
+                DELETE FROM {default_partition_name(table)} WHERE {key} >= %s AND {key} < %s RETURNING {columns}
+            )
+            INSERT INTO {name} ({columns}) SELECT {columns} FROM moved
+        """, [start, end])
+    cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+    for table in (TRANSACTION_TABLE, ITEM_TABLE):
+        cursor.execute(
+            f"ALTER TABLE {table} ATTACH PARTITION {partition_name(table, start, interval)} "
+            f"FOR VALUES FROM (%s) TO (%s)",
+            [start, end],
+        )
+
+
+def create_partitions(connection, interval, ahead, today=None):
+    """
+    Cria, nas duas tabelas, as partições da faixa atual e das 'ahead'
+    seguintes que ainda não existem (uma transação por faixa). Devolve os
+    nomes criados.
+    """
+    check_server(connection)
+    created = []
+    with connection.cursor() as cursor:
+        for table in PARTITION_KEYS:
+            if relkind(cursor, table) != 'p':
+                raise PartitioningError(f"{table} não está particionada.")
+        existing = set(partitions(cursor, TRANSACTION_TABLE)) | set(partitions(cursor, ITEM_TABLE))
+
+    for start, end in future_ranges(interval, ahead, today):
+        names = [partition_name(table, start, interval) for table in PARTITION_KEYS]
+        if all(name in existing for name in names):
+            continue
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            if any(_has_default_rows(cursor, table, start, end) for table in PARTITION_KEYS):
+                if any(name in existing for name in names):
+                    raise PartitioningError(f"Faixa {start} a {end} existe só numa das tabelas.")
+                _attach_from_default(cursor, start, end, interval)
+            else:
+                for table, name in zip(PARTITION_KEYS, names):
+                    cursor.execute(
+                        f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)",
+                        [start, end],
+                    )
+        created.extend(name for name in names if name not in existing)
+    return created
+
+
+# --- CONVERSÃO ONLINE ---
+
+def _create_shadow(cursor, table, key):
+    shadow = _shadow(table)
+    cursor.execute(
+        f"CREATE TABLE {shadow} (LIKE {table} INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING CONSTRAINTS) "
+        f"PARTITION BY RANGE ({key})"
+    )
+    # Sequence própria (a identity da tabela atual não acompanha o LIKE)
+    cursor.execute(f"CREATE SEQUENCE {shadow}_id_seq OWNED BY {shadow}.id")
+    cursor.execute(f"ALTER TABLE {shadow} ALTER COLUMN id SET DEFAULT nextval('{shadow}_id_seq')")
+    cursor.execute(f"ALTER TABLE {shadow} ALTER COLUMN {key} SET NOT NULL")
+    cursor.execute(f"ALTER TABLE {shadow} ADD CONSTRAINT {shadow}_pkey PRIMARY KEY (id, {key})")
+
+    for name, definition in _indexes(cursor, table):
+        if definition.startswith('CREATE UNIQUE'):
+            raise PartitioningError(f"Índice único {name} não inclui a data; não há como particionar {table}.")
+        method = definition.split(' USING ', 1)[1]
+        cursor.execute(f"CREATE INDEX {_short_name('p', name)} ON {shadow} USING {method}")
+
+    for name, definition, target in _foreign_keys(cursor, table):
+        if table == ITEM_TABLE and target == TRANSACTION_TABLE:
+            continue  # substituída pela FK composta
+        cursor.execute(f"ALTER TABLE {shadow} ADD CONSTRAINT {name} {definition}")
+
+
+def _sync_trigger_sql(table, columns, parent_copy=''):
+    """Trigger que repete na sombra cada alteração da tabela atual."""
+    shadow = _shadow(table)
+    names = ', '.join(columns)
+    values = ', '.join(f"NEW.{column}" for column in columns)
+    return f"""
+        CREATE FUNCTION {shadow}_sync() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                DELETE FROM {shadow} WHERE id = OLD.id;
+                RETURN OLD;
+            END IF;
+            {parent_copy}
+            IF TG_OP = 'UPDATE' THEN
+                UPDATE {shadow} SET ({names}) = ROW({values}) WHERE id = OLD.id;
+                IF FOUND THEN
+                    RETURN NEW;
+                END IF;
+            END IF;
+            INSERT INTO {shadow} ({names}) VALUES ({values}) ON CONFLICT DO NOTHING;
+            RETURN NEW;
+        END $$;
+        CREATE TRIGGER {shadow}_sync AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {shadow}_sync();
+    """
+
+
+def _item_parent_copy(transaction_columns):
+    # Item novo cuja transação ainda não foi copiada: copia a transação antes,
+    # e a data vem sempre dela (a coluna pode estar vazia em linhas antigas)
+    names = ', '.join(transaction_columns)
+    return f"""
+            INSERT INTO {_shadow(TRANSACTION_TABLE)} ({names})
+                SELECT {names} FROM {TRANSACTION_TABLE} WHERE id = NEW.transaction_id
+                ON CONFLICT DO NOTHING;
+            NEW.transaction_date := (SELECT date FROM {TRANSACTION_TABLE} WHERE id = NEW.transaction_id);
+    """
+
+
+def conversion_state(connection):
+    """'none', 'prepared' (sombras e triggers criadas) ou 'partitioned'."""
+    with connection.cursor() as cursor:
+        if relkind(cursor, TRANSACTION_TABLE) == 'p':
+            return 'partitioned'
+        if relkind(cursor, _shadow(TRANSACTION_TABLE)) == 'p':
+            return 'prepared'
+    return 'none'
+
+
+def prepare(connection, interval, ahead, today=None):
+    """Passo 1: tabelas-sombra particionadas e triggers de sincronização."""
+    check_server(connection)
+    partition_bounds(datetime.date.today(), interval)  # valida o intervalo
+    if conversion_state(connection) != 'none':
+        raise PartitioningError("Conversão já iniciada (rode backfill/swap).")
+    today = today or datetime.date.today()
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        first = _scalar(cursor, f"SELECT MIN(date) FROM {TRANSACTION_TABLE}") or today
+        last = future_ranges(interval, ahead, today)[-1][0]
+
+        for table, key in PARTITION_KEYS.items():
+            _create_shadow(cursor, table, key)
+        cursor.execute(
+            f"ALTER TABLE {_shadow(ITEM_TABLE)} ADD CONSTRAINT {ITEM_TABLE}_transaction_date_fk "
+            f"FOREIGN KEY (transaction_id, transaction_date) "
+            f"REFERENCES {_shadow(TRANSACTION_TABLE)} (id, date) "
+            f"ON UPDATE CASCADE DEFERRABLE INITIALLY DEFERRED"
+        )
+
+        # Partições com os nomes finais (a troca só renomeia as tabelas-mãe)
+        for table in PARTITION_KEYS:
+            for start, end in partition_ranges(first, last, interval):
+                name = partition_name(table, start, interval)
+                cursor.execute(
+                    f"CREATE TABLE {name} PARTITION OF {_shadow(table)} FOR VALUES FROM (%s) TO (%s)",
+                    [start, end],
+                )
+            cursor.execute(f"CREATE TABLE {default_partition_name(table)} PARTITION OF {_shadow(table)} DEFAULT")
+
+        transaction_columns = _columns(cursor, TRANSACTION_TABLE)
+        cursor.execute(_sync_trigger_sql(TRANSACTION_TABLE, transaction_columns))
+        cursor.execute(_sync_trigger_sql(
+            ITEM_TABLE, _columns(cursor, ITEM_TABLE), _item_parent_copy(transaction_columns),
+        ))
+
+
+def backfill(connection, batch_size=10000, progress=None):
+    """
+    Passo 2: copia as linhas existentes em lotes por faixa de id, cada lote
+    na sua transação. As linhas lidas ficam travadas (FOR SHARE) até o lote
+    gravar, então uma alteração concorrente espera e o trigger a repete.
+    Pode ser interrompido e rodado de novo.
+    """
+    check_server(connection)
+    if conversion_state(connection) != 'prepared':
+        raise PartitioningError("Rode prepare antes do backfill.")
+    with connection.cursor() as cursor:
+        transaction_columns = _columns(cursor, TRANSACTION_TABLE)
+        item_columns = _columns(cursor, ITEM_TABLE)
+
+    names = ', '.join(transaction_columns)
+    item_names = ', '.join(item_columns)
+    item_values = ', '.join(
+        'tx.date' if column == 'transaction_date' else f'item.{column}' for column in item_columns
+    )
+    steps = [
+        (TRANSACTION_TABLE, f"""
+            WITH src AS (
+                SELECT {names} FROM {TRANSACTION_TABLE}
+                WHERE id > %s AND id <= %s FOR SHARE
+            )
+            INSERT INTO {_shadow(TRANSACTION_TABLE)} ({names}) SELECT {names} FROM src
+            ON CONFLICT DO NOTHING
+        """),
+        (ITEM_TABLE, f"""
+            WITH src AS (
+                SELECT {item_values} FROM {ITEM_TABLE} item
+                JOIN {TRANSACTION_TABLE} tx ON tx.id = item.transaction_id
+                WHERE item.id > %s AND item.id <= %s FOR SHARE OF item
+            )
+            INSERT INTO {_shadow(ITEM_TABLE)} ({item_names}) SELECT * FROM src
+            ON CONFLICT DO NOTHING
+        """),
+    ]
+    copied = {}
+    for table, sql in steps:
+        with connection.cursor() as cursor:
+            last_id = _scalar(cursor, f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+        copied[table] = 0
+        for start in range(0, last_id, batch_size):
+            with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+                cursor.execute(sql, [start, start + batch_size])
+                copied[table] += cursor.rowcount
+            if progress:
+                progress(table, min(start + batch_size, last_id), last_id)
+    return copied
+
+
+def _row_counts(cursor, table):
+    return (
+        _scalar(cursor, f"SELECT COUNT(*) FROM {table}"),
+        _scalar(cursor, f"SELECT COUNT(*) FROM {_shadow(table)}"),
+    )
+
+
+def swap(connection, lock_timeout='5s'):
+    """
+    Passo 3: troca as tabelas. Só o lock e os renames rodam com as tabelas
+    travadas; se o lock não vier em 'lock_timeout', nada muda e dá para
+    tentar de novo.
+    """
+    check_server(connection)
+    if conversion_state(connection) != 'prepared':
+        raise PartitioningError("Rode prepare e backfill antes do swap.")
+    with connection.cursor() as cursor:
+        for table in PARTITION_KEYS:
+            current, shadow = _row_counts(cursor, table)
+            if current != shadow:
+                raise PartitioningError(
+                    f"{_shadow(table)} tem {shadow} linhas e {table} tem {current}: rode o backfill."
+                )
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute("SELECT set_config('lock_timeout', %s, true)", [lock_timeout])
+        cursor.execute(f"LOCK TABLE {TRANSACTION_TABLE}, {ITEM_TABLE} IN ACCESS EXCLUSIVE MODE")
+        # Checagens de FK adiadas pendentes impediriam os ALTER TABLE
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+        for table in PARTITION_KEYS:
+            shadow = _shadow(table)
+            cursor.execute(f"DROP TRIGGER {shadow}_sync ON {table}")
+            cursor.execute(f"DROP FUNCTION {shadow}_sync()")
+
+        for table in PARTITION_KEYS:
+            shadow, old = _shadow(table), _old(table)
+            old_sequence = _scalar(cursor, "SELECT pg_get_serial_sequence(%s, 'id')", [table])
+            # Continua de onde a sequence atual parou (ids já reservados não voltam)
+            cursor.execute(
+                f"SELECT setval('{shadow}_id_seq', GREATEST((SELECT COALESCE(MAX(id), 0) FROM {table}), "
+                f"(SELECT last_value FROM {old_sequence}), 1))"
+            )
+            indexes = _indexes(cursor, table)
+            primary_key = _primary_key_name(cursor, table)
+
+            # Atual -> _old (índices com nomes curtos, liberando os originais)
+            cursor.execute(f"ALTER TABLE {table} RENAME TO {old}")
+            cursor.execute(f"ALTER TABLE {old} RENAME CONSTRAINT {primary_key} TO {old}_pkey")
+            cursor.execute(f"ALTER SEQUENCE {old_sequence} RENAME TO {old}_id_seq")
+            for name, _definition in indexes:
+                cursor.execute(f"ALTER INDEX {name} RENAME TO {_short_name('old', name)}")
+            # A tabela antiga não pode mais travar exclusões nas tabelas referenciadas
+            for name, _definition, target in _foreign_keys(cursor, old):
+                if target not in (old, _old(TRANSACTION_TABLE)):
+                    cursor.execute(f"ALTER TABLE {old} DROP CONSTRAINT {name}")
+
+            # Sombra -> nome definitivo
+            cursor.execute(f"ALTER TABLE {shadow} RENAME TO {table}")
+            cursor.execute(f"ALTER TABLE {table} RENAME CONSTRAINT {shadow}_pkey TO {table}_pkey")
+            cursor.execute(f"ALTER SEQUENCE {shadow}_id_seq RENAME TO {table}_id_seq")
+            for name, _definition in indexes:
+                cursor.execute(f"ALTER INDEX {_short_name('p', name)} RENAME TO {name}")
+        cursor.execute(
+            f"ALTER TABLE {ITEM_TABLE} RENAME CONSTRAINT {ITEM_TABLE}_transaction_date_fk "
+            f"TO {ITEM_TABLE}_transaction_id_date_fk"
+        )
+
+
+def drop_old(connection):
+    """Passo 4 (quando a aplicação já estiver estável): apaga as tabelas _old."""
+    check_server(connection)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {_old(ITEM_TABLE)}, {_old(TRANSACTION_TABLE)}")
+
+
+def convert(connection, interval, ahead, batch_size=10000, lock_timeout='5s', progress=None):
+    """Os três passos em sequência (retoma uma conversão interrompida)."""
+    state = conversion_state(connection)
+    if state == 'partitioned':
+        return
+    if state == 'none':
+        prepare(connection, interval, ahead)
+    backfill(connection, batch_size, progress)
+    swap(connection, lock_timeout)
+
+
+# --- VERIFICAÇÃO (PARTITION PRUNING) ---
+
+def _scanned_relations(plan):
+    relations = set()
+    name = plan.get('Relation Name')
+    if name:
+        relations.add(name)
+    for child in plan.get('Plans', []):
+        relations |= _scanned_relations(child)
+    return relations
+
+
+def scanned_relations(queryset):
+    """Tabelas que o plano do PostgreSQL lê para executar a queryset."""
+    plan = json.loads(queryset.explain(format='json'))
+    return _scanned_relations(plan[0]['Plan'])
+
+
+def expected_partitions(table, interval, start, end=None):
+    """Partições que uma consulta de 'start' até 'end' (exclusivo) pode ler."""
+    last = (end or start) - datetime.timedelta(days=1)
+    names = {partition_name(table, s, interval) for s, _ in partition_ranges(start, max(start, last), interval)}
+    names.add(default_partition_name(table))
+    return names
+
+
+def hot_queries(house_id):
+    """Consultas mais frequentes sobre as tabelas particionadas, para verify()."""
+    from .models import Transaction, TransactionItem
+    from .serializers import current_month_range
+    from .views import history_start_date, history_transactions
+
+    month_start, month_end = current_month_range()
+    return [
+        ('histórico (12 meses)', history_transactions(house_id), TRANSACTION_TABLE, history_start_date(), None),
+        ('transações do mês', Transaction.objects.filter(
+            house_id=house_id, date__gte=month_start, date__lt=month_end,
+        ), TRANSACTION_TABLE, month_start, month_end),
+        ('itens do mês', TransactionItem.objects.filter(
+            transaction_date__gte=month_start, transaction_date__lt=month_end,
+        ), ITEM_TABLE, month_start, month_end),
+    ]
+
+
+def verify(connection, interval, checks):
+    """
+    Confere o pruning de cada consulta em 'checks' (label, queryset, tabela,
+    início, fim ou None para "em diante"). Devolve [(label, lidas, ok)]:
+    ok quando o plano lê só partições da faixa consultada (a DEFAULT pode
+    aparecer) e nenhuma fora dela.
+    """
+    check_server(connection)
+    results = []
+    with connection.cursor() as cursor:
+        all_partitions = {table: set(partitions(cursor, table)) for table in PARTITION_KEYS}
+    for label, queryset, table, start, end in checks:
+        scanned = scanned_relations(queryset)
+        read = scanned & all_partitions[table]
+        if end is None:
+            allowed = {
+                name for name in all_partitions[table]
+                if name == default_partition_name(table) or name >= partition_name(table, start, interval)
+            }
+        else:
+            allowed = expected_partitions(table, interval, start, end)
+        ok = bool(read) and read <= allowed and table not in scanned
+        results.append((label, sorted(read), ok))
+    return results
@@ -0,0 +1,112 @@
+"""
+Perfis sob demanda (ver ProfilingMiddleware).
+
+Cada requisição perfilada gera dois arquivos no PROFILING_DIR:
+  - <id>.prof   -> saída do cProfile (abra com snakeviz / pstats)
+  - <id>.folded -> pilhas colapsadas para flamegraph.pl / speedscope
+O diretório tem tamanho máximo (PROFILING_MAX_BYTES); os perfis mais antigos
+são apagados primeiro.
+"""
+import os
+import pstats
+import re
+import uuid
+
+from django.utils import timezone
+
+MAX_STACK_DEPTH = 64
+# Caminhos com menos tempo que isso são descartados (evita explosão combinatória)
+MIN_PATH_SECONDS = 0.0001
+_SLUG_RE = re.compile(r'[^a-zA-Z0-9]+')
+
+
+def profile_id(request):
+    slug = _SLUG_RE.sub('-', request.path).strip('-')[:60] or 'root'
+    stamp = timezone.now().strftime('%Y%m%d-%H%M%S')
+    return f"{stamp}-{uuid.uuid4().hex[:8]}-{request.method.lower()}-{slug}"
+
+
+def _label(func):
+    filename, lineno, name = func
+    if filename == '~':
+        # Funções built-in: ('~', 0, "<method 'execute' of ...>")
+        return name.replace(';', ',')
+    parts = filename.replace('\\', '/').split('/')
+    short = '/'.join(parts[-2:])
+    return f"{name} ({short}:{lineno})".replace(';', ',')
+
+
+def collapsed_stacks(profiler):
+    """
+    Reconstrói pilhas aproximadas a partir do grafo chamador -> chamado do
+    cProfile. O tempo de cada função é dividido entre os caminhos na
+    proporção do tempo acumulado que cada chamador gastou nela.
+    Retorna linhas "a;b;c <microssegundos>".
+    """
+    stats = pstats.Stats(profiler).stats
+    callees = {}
+    roots = []
+    for func, (_cc, _nc, _tt, _ct, callers) in stats.items():
+        if not callers:
+            roots.append(func)
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    totals = {}
+
+    def walk(func, stack, scale):
+        _cc, _nc, tt, ct, _callers = stats[func]
+        stack = stack + [_label(func)]
+        self_time = tt * scale
+        if self_time > 0:
+            key = ';'.join(stack)
+            totals[key] = totals.get(key, 0) + self_time
+        if len(stack) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge_ct in callees.get(func, []):
+            callee_ct = stats[callee][3]
+            path_time = scale * edge_ct
+            if callee in visiting or callee_ct <= 0 or path_time < MIN_PATH_SECONDS:
+                continue
+            visiting.add(callee)
+            walk(callee, stack, path_time / callee_ct)
+            visiting.discard(callee)
+
+    for root in roots:
+        visiting = {root}
+        walk(root, [], 1.0)
+
+    lines = []
+    for stack, seconds in totals.items():
+        micros = int(seconds * 1_000_000)
+        if micros > 0:
+            lines.append(f"{stack} {micros}")
+    return lines
+
+
+def save_profile(profiler, directory, name, max_bytes):
+    os.makedirs(directory, exist_ok=True)
+    prof_path = os.path.join(directory, f"{name}.prof")
+    profiler.dump_stats(prof_path)
+    with open(os.path.join(directory, f"{name}.folded"), 'w', encoding='utf-8') as fh:
+        fh.write('\n'.join(collapsed_stacks(profiler)))
+    evict(directory, max_bytes)
+
+
+def evict(directory, max_bytes):
+    """Apaga os perfis mais antigos até o diretório caber em max_bytes."""
+    entries = []
+    for entry in os.scandir(directory):
+        if entry.is_file() and entry.name.endswith(('.prof', '.folded')):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _mtime, size, _path in entries)
+    for _mtime, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,114 @@
+"""
+Projeção de caixa mês a mês (GET /projection/?months=N).
+
+Entradas lidas com agregados agrupados, em 4 queries para qualquer N:
+- saldo atual das contas visíveis ao usuário;
+- limites dos cartões visíveis;
+- quanto falta pagar de cada fatura não paga, por cartão e mês de referência
+  (as parcelas futuras já estão nas faturas futuras: o create lança cada
+  parcela na fatura do seu mês);
+- contas fixas ativas: base_value todo mês, e no mês atual só as não pagas.
+
+Transações já lançadas mexeram no saldo na criação (mesmo com data futura),
+então a projeção desconta só o que ainda vai sair: faturas e contas fixas.
+Fatura vencida e não paga entra no mês atual. Pagar a fatura devolve o limite
+do cartão, como no InvoiceViewSet.pay. Tudo em centavos inteiros; os saldos
+de cada mês saem de somas acumuladas (itertools.accumulate) das séries mensais.
+"""
+import datetime
+from itertools import accumulate
+
+from dateutil.relativedelta import relativedelta
+from django.db.models import Q, Sum
+
+from .models import Account, CreditCard, Invoice, RecurringBill, Transaction
+from .money import cents, from_cents
+
+
+def _money(value):
+    return str(from_cents(int(value or 0)))
+
+
+def project(user, house_id, months, today=None):
+    start = (today or datetime.date.today()).replace(day=1)
+    end = start + relativedelta(months=months)
+    timeline = [start + relativedelta(months=i) for i in range(months)]
+    position = {month: i for i, month in enumerate(timeline)}
+    visible = Q(is_shared=True) | Q(owner=user)
+
+    accounts = list(
+        Account.objects.filter(house_id=house_id).filter(visible).order_by('name', 'id')
+        .values('id', 'name', balance_cents=cents('balance'))
+    )
+    cards = list(
+        CreditCard.objects.filter(house_id=house_id).filter(visible).order_by('name', 'id')
+        .values('id', 'name', total_cents=cents('limit_total'), available_cents=cents('limit_available'))
+    )
+
+    # Falta pagar por cartão e mês (ref. é sempre o dia 1)
+    card_dues = {card['id']: [0] * months for card in cards}
+    for row in (
+        Invoice.objects.filter(card_id__in=list(card_dues), reference_date__lt=end).exclude(status='PAID')
+        .values('card_id', 'reference_date')
+        .annotate(due=Sum(cents('value')) - Sum(cents('amount_paid'))).order_by()
+    ):
+        month = max(row['reference_date'].replace(day=1), start)
+        card_dues[row['card_id']][position[month]] += max(int(row['due'] or 0), 0)
+
+    paid_this_month = Transaction.objects.filter(
+        recurring_bill__house_id=house_id, date__gte=start, date__lt=start + relativedelta(months=1),
+    ).values('recurring_bill_id')
+    bills = RecurringBill.objects.filter(house_id=house_id, is_active=True).aggregate(
+        monthly=Sum(cents('base_value')),
+        unpaid=Sum(cents('base_value'), filter=~Q(id__in=paid_this_month)),
+    )
+    bill_series = [int(bills['unpaid'] or 0)] + [int(bills['monthly'] or 0)] * (months - 1)
+
+    invoice_series = [sum(dues) for dues in zip(*card_dues.values())] or [0] * months
+    outflow = [bill + invoice for bill, invoice in zip(bill_series, invoice_series)]
+    opening = sum(account['balance_cents'] for account in accounts)
+    balances = [opening - spent for spent in accumulate(outflow)]
+
+    # Limite disponível depois de pagar as faturas até o mês (sem passar do total)
+    card_available = {
+        card['id']: [
+            min(card['total_cents'], card['available_cents'] + paid)
+            for paid in accumulate(card_dues[card['id']])
+        ]
+        for card in cards
+    }
+
+    return {
+        'months': months,
+        'balance': _money(opening),
+        'accounts': [
+            {'id': account['id'], 'name': account['name'], 'balance': _money(account['balance_cents'])}
+            for account in accounts
+        ],
+        'cards': [
+            {
+                'id': card['id'], 'name': card['name'],
+                'limit_total': _money(card['total_cents']), 'limit_available': _money(card['available_cents']),
+            }
+            for card in cards
+        ],
+        'timeline': [
+            {
+                'month': month.strftime('%Y-%m'),
+                'recurring_bills': _money(bill_series[i]),
+                'invoices': _money(invoice_series[i]),
+                'outflow': _money(outflow[i]),
+                'balance': _money(balances[i]),
+                'cards': [
+                    {
+                        'id': card['id'],
+                        'due': _money(card_dues[card['id']][i]),
+                        'limit_available': _money(card_available[card['id']][i]),
+                        'used': _money(card['total_cents'] - card_available[card['id']][i]),
+                    }
+                    for card in cards
+                ],
+            }
+            for i, month in enumerate(timeline)
+        ],
+    }
@@ -0,0 +1,119 @@
+"""
+Exclusão de uma casa inteira (HouseViewSet.destroy) em segundo plano.
+
+O house.delete() do Django carrega na memória cada transação, item, fatura,
+produto... da casa para disparar os signals e apagar em cascata, tudo dentro
+da requisição. Aqui a requisição só marca a casa (deletion_requested_at),
+desliga os membros e desativa o Master; o expurgo roda depois, numa thread
+ao fim do commit (HOUSE_PURGE_IN_BACKGROUND) ou pelo comando purge_houses,
+que também retoma expurgos interrompidos.
+
+O expurgo apaga tabela por tabela, dos dependentes para a casa, com
+DELETE ... WHERE id IN (SELECT id ... WHERE casa = X LIMIT n): um lote por
+transação do banco, sem carregar objetos e sem signals (nem log de
+alterações: a casa some inteira, com o log dela).
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, connections, transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from .models import (
+    House, HouseMember, Category, CategoryRule, Account, CreditCard, Invoice, RecurringBill,
+    Transaction, TransactionItem, Product, InventoryItem, ShoppingList,
+    HouseInvitation, ChangeLogEntry, MonthlyRollup, TransactionArchive,
+)
+
+logger = logging.getLogger(__name__)
+
+# Ordem de dependência: quem aponta para outra tabela da casa sai antes dela
+PURGE_ORDER = [
+    (TransactionItem, 'transaction__house_id'),
+    (Transaction, 'house_id'),
+    (Invoice, 'card__house_id'),
+    (CreditCard, 'house_id'),
+    (Account, 'house_id'),
+    (RecurringBill, 'house_id'),
+    (InventoryItem, 'house_id'),
+    (ShoppingList, 'house_id'),
+    (Product, 'house_id'),
+    (CategoryRule, 'house_id'),
+    (Category, 'house_id'),
+    (HouseInvitation, 'house_id'),
+    (MonthlyRollup, 'house_id'),
+    (TransactionArchive, 'house_id'),
+    (ChangeLogEntry, 'house_id'),
+]
+
+
+def delete_in_batches(queryset, batch_size=None):
+    """
+    Apaga as linhas da queryset em lotes por id, cada lote na sua transação,
+    sem signals nem cascata do Django (as dependentes já devem ter saído).
+    Devolve quantas linhas foram apagadas.
+    """
+    batch_size = batch_size or settings.HOUSE_PURGE_BATCH_SIZE
+    model = queryset.model
+    table = connection.ops.quote_name(model._meta.db_table)
+    select, params = queryset.order_by().values('pk')[:batch_size].query.sql_with_params()
+    deleted = 0
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE id IN ({select})", params)
+            count = cursor.rowcount
+        deleted += count
+        if count < batch_size:
+            return deleted
+
+
+def request_deletion(house, master):
+    """
+    Parte síncrona do DELETE /houses/{id}/: a casa fica inacessível na hora
+    e o expurgo é agendado para depois do commit.
+    """
+    with transaction.atomic():
+        House.objects.filter(pk=house.pk).update(deletion_requested_at=timezone.now())
+        # Demais membros ficam sem casa; o Master fica vinculado até o expurgo
+        # (é ele que o expurgo apaga no fim), mas sem login
+        HouseMember.objects.filter(house=house).exclude(user=master).delete()
+        HouseInvitation.objects.filter(house=house).delete()
+        User.objects.filter(pk=master.pk).update(is_active=False)
+        Token.objects.filter(user=master).delete()
+        if settings.HOUSE_PURGE_IN_BACKGROUND:
+            transaction.on_commit(lambda: start_purge(house.pk))
+
+
+def purge_house(house_id, batch_size=None):
+    """Apaga a casa e tudo dela; devolve {model: linhas apagadas}."""
+    counts = {}
+    for model, path in PURGE_ORDER:
+        counts[model._meta.model_name] = delete_in_batches(model.objects.filter(**{path: house_id}), batch_size)
+
+    # Poucas linhas: Master (e membros que ainda restem), depois a própria casa
+    with transaction.atomic():
+        masters = list(HouseMember.objects.filter(house_id=house_id, role='MASTER').values_list('user_id', flat=True))
+        HouseMember.objects.filter(house_id=house_id).delete()
+        User.objects.filter(pk__in=masters, is_active=False).delete()
+        House.objects.filter(pk=house_id).delete()
+    return counts
+
+
+def pending_houses():
+    return House.objects.filter(deletion_requested_at__isnull=False).order_by('deletion_requested_at')
+
+
+def _run(house_id):
+    try:
+        purge_house(house_id)
+    except Exception:
+        logger.exception('Expurgo da casa %s falhou; rode manage.py purge_houses', house_id)
+    finally:
+        connections.close_all()
+
+
+def start_purge(house_id):
+    threading.Thread(target=_run, args=(house_id,), name=f'purge-house-{house_id}', daemon=True).start()
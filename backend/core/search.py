@@ -0,0 +1,167 @@
+"""
+Busca textual em Transaction.description e TransactionItem.description.
+
+- PostgreSQL: coluna tsvector gerada (STORED) com índice GIN, mais índice
+  trigram (pg_trgm) para erros de digitação. O tsvector usa a configuração
+  'simple' sobre o texto sem acentos (extensão unaccent, via core_unaccent,
+  que é IMMUTABLE como a coluna gerada exige).
+- SQLite: tabelas virtuais FTS5 (external content) mantidas por triggers,
+  com remove_diacritics.
+
+Nos dois bancos cada palavra da busca vira um prefixo, sem acento e sem
+stemming, com AND entre as palavras: "cafe" acha "Café", "merc" acha
+"Mercado".
+- Outros bancos: icontains simples (sem índice).
+
+As colunas/tabelas auxiliares não existem nos models: são criadas pelas
+migrations 0006 e 0016 e só usadas aqui, em SQL direto.
+"""
+import re
+
+from django.db import connection as default_connection
+from django.db.models import Q
+
+from .models import Transaction
+
+ITEM_RANK_WEIGHT = 0.8  # Achar pelo item vale um pouco menos que pela descrição
+
+SQLITE_TABLES = ['core_transaction', 'core_transactionitem']
+
+
+def _sqlite_triggers(table):
+    # Os mesmos da migration 0006
+    fts = f"{table}_fts"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, description) VALUES (new.id, new.description); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, description) VALUES ('delete', old.id, old.description); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF description ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, description) VALUES ('delete', old.id, old.description); "
+        f"INSERT INTO {fts}(rowid, description) VALUES (new.id, new.description); END",
+    ]
+
+
+# --- MANUTENÇÃO (post_migrate) ---
+
+def repair_sqlite_triggers(sender, using, **kwargs):
+    """
+    post_migrate: no SQLite, migrations que alteram core_transaction recriam a
+    tabela e descartam os triggers. Se o FTS existe mas algum trigger sumiu,
+    recria os triggers e reconstrói o índice.
+    """
+    from django.db import connections
+
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        existing = {row[0] for row in cursor.fetchall()}
+        for table in SQLITE_TABLES:
+            fts = f"{table}_fts"
+            if fts not in existing:
+                continue
+            if all(f"{fts}_{suffix}" in existing for suffix in ('ai', 'ad', 'au')):
+                continue
+            for sql in _sqlite_triggers(table):
+                cursor.execute(sql)
+            cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+# --- CONSULTA ---
+
+# %(prefixes)s: 'merc:* & cafe:*' (ver _tsquery). O trigram (<%, similaridade da
+# busca com o trecho mais parecido da descrição) cobre os erros de digitação.
+POSTGRES_QUERY = """
+WITH q AS (SELECT to_tsquery('simple', core_unaccent(%(prefixes)s)) AS query),
+matches AS (
+    SELECT t.id, ts_rank(t.search_vector, q.query) + word_similarity(%(q)s, t.description) AS rank
+    FROM q, core_transaction t
+    WHERE t.house_id = %(house)s AND (t.owner_id = %(user)s OR t.is_shared)
+      AND (t.search_vector @@ q.query OR %(q)s <%% t.description)
+    UNION ALL
+    SELECT t.id, %(item_weight)s * (ts_rank(i.search_vector, q.query) + word_similarity(%(q)s, i.description))
+    FROM q, core_transactionitem i JOIN core_transaction t ON t.id = i.transaction_id
+    WHERE t.house_id = %(house)s AND (t.owner_id = %(user)s OR t.is_shared)
+      AND (i.search_vector @@ q.query OR %(q)s <%% i.description)
+)
+SELECT id, MAX(rank) AS rank, COUNT(*) OVER () AS total
+FROM matches GROUP BY id
+ORDER BY rank DESC, id DESC
+LIMIT %(limit)s OFFSET %(offset)s
+"""
+
+# CROSS JOIN força o SQLite a partir do índice FTS; com JOIN comum o planner
+# prefere o índice por casa e reavalia o MATCH a cada linha (minutos em 1M linhas).
+SQLITE_QUERY = """
+WITH matches AS (
+    SELECT t.id AS id, -bm25(core_transaction_fts) AS rank
+    FROM core_transaction_fts CROSS JOIN core_transaction t ON t.id = core_transaction_fts.rowid
+    WHERE core_transaction_fts MATCH %(q)s AND t.house_id = %(house)s AND (t.owner_id = %(user)s OR t.is_shared)
+    UNION ALL
+    SELECT t.id AS id, -%(item_weight)s * bm25(core_transactionitem_fts) AS rank
+    FROM core_transactionitem_fts
+    CROSS JOIN core_transactionitem i ON i.id = core_transactionitem_fts.rowid
+    CROSS JOIN core_transaction t ON t.id = i.transaction_id
+    WHERE core_transactionitem_fts MATCH %(q)s AND t.house_id = %(house)s AND (t.owner_id = %(user)s OR t.is_shared)
+)
+SELECT id, MAX(rank) AS rank, COUNT(*) OVER () AS total
+FROM matches GROUP BY id
+ORDER BY rank DESC, id DESC
+LIMIT %(limit)s OFFSET %(offset)s
+"""
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _fts5_query(text):
+    # Cada palavra vira um prefixo entre aspas: "arroz"* "tio"* (AND implícito)
+    return ' '.join(f'"{token}"*' for token in _TOKEN_RE.findall(text))
+
+
+def _tsquery(text):
+    # Mesma divisão em palavras do FTS5: arroz:* & tio:* (\w não tem operador do tsquery)
+    return ' & '.join(f'{token}:*' for token in _TOKEN_RE.findall(text))
+
+
+def search_transactions(user, house_id, text, limit=20, offset=0, connection=None):
+    """
+    Devolve (total, [(transaction_id, rank), ...]) ordenado por relevância,
+    respeitando a visibilidade (minhas ou compartilhadas da casa).
+    """
+    connection = connection or default_connection
+    params = {
+        'q': text, 'house': house_id, 'user': user.id,
+        'item_weight': ITEM_RANK_WEIGHT, 'limit': limit, 'offset': offset,
+    }
+
+    if connection.vendor == 'postgresql':
+        params['prefixes'] = _tsquery(text)
+        if not params['prefixes']:
+            return 0, []
+        sql = POSTGRES_QUERY
+    elif connection.vendor == 'sqlite':
+        params['q'] = _fts5_query(text)
+        if not params['q']:
+            return 0, []
+        sql = SQLITE_QUERY
+    else:
+        return _fallback_search(user, house_id, text, limit, offset)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    total = rows[0][2] if rows else 0
+    return total, [(row[0], float(row[1])) for row in rows]
+
+
+def _fallback_search(user, house_id, text, limit, offset):
+    queryset = Transaction.objects.filter(house_id=house_id).filter(
+        Q(owner=user) | Q(is_shared=True)
+    ).filter(
+        Q(description__icontains=text) | Q(items__description__icontains=text)
+    ).distinct().order_by('-date', '-id')
+    total = queryset.count()
+    ids = list(queryset.values_list('id', flat=True)[offset:offset + limit])
+    return total, [(pk, 0.0) for pk in ids]
@@ -5,12 +5,58 @@ import datetime
 from .models import (
     House, HouseMember, Account, CreditCard, Invoice, 
     Transaction, Product, InventoryItem, ShoppingList, 
-    RecurringBill, Category, TransactionItem, HouseInvitation
+    RecurringBill, Category, CategoryRule, TransactionItem, HouseInvitation
 )
+from .categorization import validate_pattern
+from .money import MoneyField
+
+# --- VALORES EM CENTAVOS (core/money.py) ---
+
+class MoneySerializerField(serializers.DecimalField):
+    """MoneyField na API: mesma string decimal ("1234.50") dos DecimalField de antes."""
+
+
+class MoneyModelSerializer(serializers.ModelSerializer):
+    """Base dos serializers da app: MoneyField vira MoneySerializerField."""
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        MoneyField: MoneySerializerField,
+    }
+
+    def build_standard_field(self, field_name, model_field):
+        field_class, field_kwargs = super().build_standard_field(field_name, model_field)
+        if isinstance(model_field, MoneyField):
+            field_kwargs.update(max_digits=model_field.max_digits, decimal_places=2)
+        return field_class, field_kwargs
+
+def current_month_range():
+    """(primeiro dia do mês atual, primeiro dia do próximo mês)."""
+    start = timezone.now().date().replace(day=1)
+    return start, (start + datetime.timedelta(days=32)).replace(day=1)
+
+# --- CAMPOS ESPARSOS (?fields=) ---
+
+class SparseFieldsMixin:
+    """
+    ?fields=id,description,value devolve só os campos pedidos. Vale apenas em
+    leituras (GET); escritas sempre usam o serializer completo.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+        requested = request.query_params.get('fields')
+        if not requested:
+            return
+        wanted = {name.strip() for name in requested.split(',') if name.strip()}
+        for name in list(self.fields):
+            if name not in wanted:
+                self.fields.pop(name)
 
 # --- USUÁRIOS E CASA ---
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(MoneyModelSerializer):
     first_name = serializers.CharField(required=True) # Nome Real
 
     class Meta:
@@ -27,12 +73,12 @@ class UserSerializer(serializers.ModelSerializer):
         )
         return user
 
-class HouseSerializer(serializers.ModelSerializer):
+class HouseSerializer(MoneyModelSerializer):
     class Meta:
         model = House
         fields = '__all__'
 
-class HouseMemberSerializer(serializers.ModelSerializer):
+class HouseMemberSerializer(MoneyModelSerializer):
     # Campos extras para facilitar o frontend
     user_name = serializers.ReadOnlyField(source='user.username')
     user_email = serializers.ReadOnlyField(source='user.email')
@@ -43,25 +89,51 @@ class HouseMemberSerializer(serializers.ModelSerializer):
 
 # --- FINANCEIRO ---
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(MoneyModelSerializer):
     class Meta:
         model = Category
         fields = '__all__'
         read_only_fields = ['house']
 
-class AccountSerializer(serializers.ModelSerializer):
+class CategoryRuleSerializer(MoneyModelSerializer):
+    class Meta:
+        model = CategoryRule
+        fields = '__all__'
+        read_only_fields = ['house']
+
+    def validate_category(self, category):
+        member = getattr(self.context['request'].user, 'house_member', None)
+        if member is None or category.house_id != member.house_id:
+            raise serializers.ValidationError('Categoria não encontrada.')
+        return category
+
+    def validate(self, attrs):
+        kind = attrs.get('kind', getattr(self.instance, 'kind', 'CONTAINS'))
+        pattern = attrs.get('pattern', getattr(self.instance, 'pattern', ''))
+        low = attrs.get('min_value', getattr(self.instance, 'min_value', None))
+        high = attrs.get('max_value', getattr(self.instance, 'max_value', None))
+        if not pattern and low is None and high is None:
+            raise serializers.ValidationError('Informe um padrão ou uma faixa de valor.')
+        if low is not None and high is not None and low > high:
+            raise serializers.ValidationError('O valor mínimo é maior que o máximo.')
+        error = validate_pattern(kind, pattern) if pattern else None
+        if error:
+            raise serializers.ValidationError({'pattern': error})
+        return attrs
+
+class AccountSerializer(MoneyModelSerializer):
     class Meta:
         model = Account
         # Adicione 'limit' na lista ou use '__all__'
         fields = ['id', 'name', 'balance', 'limit', 'is_shared', 'house', 'owner'] 
         read_only_fields = ['house', 'owner']
 
-class InvoiceSerializer(serializers.ModelSerializer):
+class InvoiceSerializer(MoneyModelSerializer):
     class Meta:
         model = Invoice
         fields = '__all__'
 
-class CreditCardSerializer(serializers.ModelSerializer):
+class CreditCardSerializer(MoneyModelSerializer):
     invoice_info = serializers.SerializerMethodField()
 
     class Meta:
@@ -72,7 +144,12 @@ class CreditCardSerializer(serializers.ModelSerializer):
     def get_invoice_info(self, obj):
         # Pega a primeira fatura ABERTA ou FECHADA (mas não PAGA)
         # Ordena pela data mais antiga para mostrar a próxima a vencer
-        invoice = obj.invoices.exclude(status='PAID').order_by('reference_date').first()
+        pending = self.context.get('pending_invoices')
+        if pending is not None:
+            # Listagem em lote: faturas já buscadas numa query só (card_id -> fatura)
+            invoice = pending.get(obj.id)
+        else:
+            invoice = obj.invoices.exclude(status='PAID').order_by('reference_date').first()
         
         if invoice:
             # Garante que o valor exibido desconte o que já foi pago parcialmente
@@ -95,7 +172,7 @@ class CreditCardSerializer(serializers.ModelSerializer):
             'due_date': None
         }
     
-class RecurringBillSerializer(serializers.ModelSerializer):
+class RecurringBillSerializer(MoneyModelSerializer):
     # Campo extra para informar se está pago
     is_paid_this_month = serializers.SerializerMethodField()
     category_name = serializers.CharField(source='category.name', read_only=True)
@@ -106,21 +183,28 @@ class RecurringBillSerializer(serializers.ModelSerializer):
         read_only_fields = ['house']
 
     def get_is_paid_this_month(self, obj):
-        now = timezone.now()
-        # Procura uma transação nesta casa, vinculada a esta conta fixa, no mês e ano atuais
+        paid_ids = self.context.get('paid_bill_ids')
+        if paid_ids is not None:
+            # Listagem em lote: ids das contas pagas no mês já buscados
+            return obj.id in paid_ids
+        month_start, month_end = current_month_range()
+        # Procura uma transação vinculada a esta conta fixa, no mês e ano atuais.
+        # A conta fixa já pertence à casa: filtrar por house só faria o banco
+        # escolher o índice (house, ...) em vez do índice de recurring_bill.
+        # Intervalo de datas (e não __month/__year): usa índice e, no PostgreSQL
+        # particionado, só a partição do mês.
         return Transaction.objects.filter(
-            house=obj.house,
             recurring_bill=obj,
-            date__month=now.month,
-            date__year=now.year
+            date__gte=month_start,
+            date__lt=month_end
         ).exists()
 
-class TransactionItemSerializer(serializers.ModelSerializer):
+class TransactionItemSerializer(MoneyModelSerializer):
     class Meta:
         model = TransactionItem
         fields = ['id', 'description', 'value', 'quantity']
 
-class TransactionSerializer(serializers.ModelSerializer):
+class TransactionSerializer(SparseFieldsMixin, MoneyModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     
     # Campos calculados
@@ -140,28 +224,22 @@ class TransactionSerializer(serializers.ModelSerializer):
             'source_name',
             'account', 'invoice', 
             'card', 
-            'items', 'recurring_bill'
+            'items', 'recurring_bill',
+            'installment_group'
         ]
         read_only_fields = ['is_shared']
 
     def get_owner_name(self, obj):
-        # Cenário 1: Conta Bancária
-        if obj.account: 
-            return obj.account.owner.first_name
-            
-        # Cenário 2: Cartão de Crédito (Via Fatura)
-        if obj.invoice and obj.invoice.card: 
-            # CORREÇÃO AQUI: Trocamos .user por .owner
-            # Se o seu modelo de cartão usar outro nome, ajuste aqui.
-            return obj.invoice.card.owner.first_name 
-            
+        # Dono desnormalizado na criação (dono da conta ou do cartão)
+        if obj.owner_id:
+            return obj.owner.first_name
         return "Desconhecido"
 
     def get_source_name(self, obj):
-        if obj.account: 
+        if obj.account_id: 
             return obj.account.name
-        if obj.invoice and obj.invoice.card: 
-            return f"Cartão {obj.invoice.card.name}"
+        if obj.credit_card_id: 
+            return f"Cartão {obj.credit_card.name}"
         return "Outros"
 
     # --- LÓGICA DE ROTEAMENTO DE FATURA ---
@@ -234,13 +312,13 @@ class TransactionSerializer(serializers.ModelSerializer):
 
 # --- ESTOQUE E COMPRAS ---
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(MoneyModelSerializer):
     class Meta:
         model = Product
         fields = '__all__'
         read_only_fields = ['house']
 
-class InventoryItemSerializer(serializers.ModelSerializer):
+class InventoryItemSerializer(SparseFieldsMixin, MoneyModelSerializer):
     product_name = serializers.CharField(source='product.name', read_only=True)
     product_unit = serializers.CharField(source='product.measure_unit', read_only=True)
     class Meta:
@@ -248,7 +326,7 @@ class InventoryItemSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ['house']
 
-class ShoppingListSerializer(serializers.ModelSerializer):
+class ShoppingListSerializer(MoneyModelSerializer):
     product_name = serializers.CharField(source='product.name', read_only=True)
     product_unit = serializers.CharField(source='product.measure_unit', read_only=True)
     
@@ -260,7 +338,39 @@ class ShoppingListSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ['house']
 
-class HouseInvitationSerializer(serializers.ModelSerializer):
+# --- ATUALIZAÇÃO EM LOTE (PATCH .../bulk/) ---
+
+class BulkItemSerializer(serializers.Serializer):
+    """
+    Uma linha do lote: id + campos com valor absoluto e/ou deltas
+    (ex.: quantity_delta soma na quantidade atual, com F() no banco).
+    """
+    id = serializers.IntegerField()
+    delta_fields = {}  # nome do delta -> campo do model
+
+    def validate(self, attrs):
+        if len(attrs) < 2:
+            raise serializers.ValidationError('Nenhuma alteração informada.')
+        for delta, field in self.delta_fields.items():
+            if delta in attrs and field in attrs:
+                raise serializers.ValidationError(f'Use {field} ou {delta}, não os dois.')
+        return attrs
+
+class InventoryBulkItemSerializer(BulkItemSerializer):
+    quantity = serializers.DecimalField(max_digits=8, decimal_places=2, min_value=0, required=False)
+    min_quantity = serializers.DecimalField(max_digits=8, decimal_places=2, min_value=0, required=False)
+    quantity_delta = serializers.DecimalField(max_digits=8, decimal_places=2, required=False)
+    delta_fields = {'quantity_delta': 'quantity'}
+
+class ShoppingListBulkItemSerializer(BulkItemSerializer):
+    quantity_to_buy = serializers.DecimalField(max_digits=8, decimal_places=2, min_value=0, required=False)
+    quantity_to_buy_delta = serializers.DecimalField(max_digits=8, decimal_places=2, required=False)
+    is_purchased = serializers.BooleanField(required=False)
+    real_unit_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    discount_unit_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    delta_fields = {'quantity_to_buy_delta': 'quantity_to_buy'}
+
+class HouseInvitationSerializer(MoneyModelSerializer):
     class Meta:
         model = HouseInvitation
         fields = '__all__'
@@ -0,0 +1,138 @@
+"""
+Log de queries lentas.
+
+Um execute wrapper do Django mede cada query executada durante a requisição e,
+se ela passar do limite configurado (SLOW_QUERY_THRESHOLD_MS), grava uma linha
+JSON no arquivo rotativo do logger 'core.slow_queries' com SQL, parâmetros,
+rota e casa do usuário. No PostgreSQL, uma amostra dessas queries também
+recebe o plano via EXPLAIN (ANALYZE, BUFFERS).
+"""
+import json
+import logging
+import random
+import re
+import threading
+import time
+from hashlib import md5
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger('core.slow_queries')
+
+# Evita que o próprio EXPLAIN (ou a busca da casa) passe pelo wrapper de novo
+_state = threading.local()
+
+# --- FINGERPRINT ---
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_RE = re.compile(r'%s|\?')
+_IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*\?\s*,?)+\)', re.IGNORECASE)
+_SPACES_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """
+    Normaliza o SQL trocando literais e placeholders por '?', para que a mesma
+    query com parâmetros diferentes caia no mesmo grupo do relatório.
+    """
+    normalized = _STRING_RE.sub('?', sql)
+    normalized = _NUMBER_RE.sub('?', normalized)
+    normalized = _PLACEHOLDER_RE.sub('?', normalized)
+    normalized = _IN_LIST_RE.sub('IN (...)', normalized)
+    return _SPACES_RE.sub(' ', normalized).strip()
+
+
+def fingerprint_id(normalized_sql):
+    return md5(normalized_sql.encode('utf-8')).hexdigest()[:12]
+
+
+# --- WRAPPER ---
+
+class SlowQueryLogger:
+    """
+    Execute wrapper instalado por requisição (ver SlowQueryLogMiddleware).
+    """
+
+    def __init__(self, request=None):
+        self.request = request
+        self.threshold = settings.SLOW_QUERY_THRESHOLD_MS / 1000
+        self.explain_rate = settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(_state, 'busy', False):
+            return execute(sql, params, many, context)
+
+        failed = False
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            if elapsed >= self.threshold:
+                self._log(sql, params, many, elapsed, context['connection'], failed)
+
+    def _log(self, sql, params, many, elapsed, connection, failed):
+        _state.busy = True
+        try:
+            normalized = fingerprint(sql)
+            entry = {
+                'ts': time.time(),
+                'duration_ms': round(elapsed * 1000, 2),
+                'fingerprint': fingerprint_id(normalized),
+                'normalized': normalized,
+                'sql': sql,
+                'params': None if many else params,
+                'many': many,
+                'failed': failed,
+                'database': connection.alias,
+                'route': self._route(),
+                'house_id': self._house_id(),
+            }
+            if not failed and self._should_explain(sql, many, connection):
+                entry['explain'] = self._explain(sql, params, connection)
+            logger.warning(json.dumps(entry, default=str, ensure_ascii=False))
+        except Exception:
+            # O log nunca pode derrubar a requisição
+            logger.exception('Falha ao registrar query lenta')
+        finally:
+            _state.busy = False
+
+    def _route(self):
+        request = self.request
+        if request is None:
+            return None
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match else request.path
+        return f"{request.method} {route}"
+
+    def _house_id(self):
+        user = getattr(self.request, 'user', None)
+        if user is None or not user.is_authenticated:
+            return None
+        try:
+            return user.house_member.house_id
+        except Exception:
+            return None
+
+    def _should_explain(self, sql, many, connection):
+        # EXPLAIN ANALYZE executa a query de verdade: só para SELECT
+        return (
+            connection.vendor == 'postgresql'
+            and not many
+            and sql.lstrip()[:6].upper() == 'SELECT'
+            and random.random() < self.explain_rate
+        )
+
+    def _explain(self, sql, params, connection):
+        try:
+            # Savepoint: se o EXPLAIN falhar, a transação da view continua válida
+            with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params)
+                return cursor.fetchone()[0]
+        except Exception as e:
+            return {'error': str(e)}
@@ -0,0 +1,162 @@
+"""
+Extrato da fatura (GET /invoices/{id}/statement/).
+
+Fatura, transações (com a parcela "i/n" das compras parceladas) e subtotais
+por categoria em 4 queries, qualquer que seja o número de transações:
+fatura com cartão, transações com as relações que o TransactionSerializer lê,
+itens (prefetch) e a posição de cada parcela na série (window function).
+
+Só entram as transações que o usuário vê (as dele e as compartilhadas, ver
+visible_transactions em core/views.py): o extrato de um membro não mostra as
+compras privadas de outro no mesmo cartão.
+
+Fatura PAGA: o JSON pronto fica no cache, com ETag forte (hash do corpo), e a
+próxima resposta lê só a versão do conteúdo em vez das transações. A chave
+leva o usuário (cada um vê um extrato), o valor e o valor pago da fatura
+(mudam se uma exclusão em lote de core/ledger.py mexer nela) e a versão das
+transações visíveis: quantidade e maior updated_at, que mudam com edição de
+descrição ou categoria e com o manage.py recategorize.
+
+O corpo também mostra nomes que não passam pelo updated_at da transação
+(categoria, cartão, primeiro nome do dono). Salvar um deles troca a
+geração da casa (signals abaixo), que também vai na chave. As entradas
+vencem em STATEMENT_CACHE_SECONDS: as chaves de versões antigas não ficam
+para sempre no cache.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.db.models import Count, F, Max, Prefetch, Window
+from django.db.models.functions import RowNumber
+from rest_framework.renderers import JSONRenderer
+
+from .models import Category, CreditCard, HouseMember, Transaction, TransactionItem
+from .money import from_cents, to_cents
+from .serializers import InvoiceSerializer, TransactionSerializer
+
+
+def content_version(transactions):
+    """(quantidade, maior updated_at em microssegundos) das transações do extrato."""
+    version = transactions.aggregate(count=Count('id'), last=Max('updated_at'))
+    last = version['last']
+    return version['count'], int(last.timestamp() * 1_000_000) if last else 0
+
+
+def _generation_key(house_id):
+    return f'invoice-statement-gen:{house_id}'
+
+
+def generation(house_id):
+    """
+    Geração dos nomes da casa. Sem valor no cache (nunca gravado ou
+    descartado), começa uma nova: nenhuma entrada anterior casa com ela.
+    """
+    key = _generation_key(house_id)
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, time.time_ns(), None)
+        value = cache.get(key)
+    return value
+
+
+def bump_generation(house_id):
+    cache.set(_generation_key(house_id), time.time_ns(), None)
+
+
+def cache_key(invoice, user, transactions):
+    count, last = content_version(transactions)
+    return (
+        f'invoice-statement:{invoice.pk}:{user.pk}:{to_cents(invoice.value)}:{to_cents(invoice.amount_paid)}'
+        f':{count}:{last}:{generation(invoice.card.house_id)}'
+    )
+
+
+def is_frozen(invoice):
+    return invoice.status == 'PAID'
+
+
+def installment_positions(transactions):
+    """{transaction_id: (número, total)} das transações que fazem parte de uma série."""
+    groups = {tx.installment_group for tx in transactions if tx.installment_group}
+    if not groups:
+        return {}
+    wanted = {tx.pk for tx in transactions}
+    series = Transaction.objects.filter(installment_group__in=groups).annotate(
+        number=Window(RowNumber(), partition_by=[F('installment_group')], order_by=[F('date').asc(), F('id').asc()]),
+        total=Window(Count('id'), partition_by=[F('installment_group')]),
+    ).values_list('id', 'number', 'total')
+    return {pk: (number, total) for pk, number, total in series if pk in wanted}
+
+
+def build_statement(invoice, transactions):
+    """transactions: as transações da fatura que o usuário vê."""
+    transactions = list(
+        transactions
+        .select_related('category', 'owner', 'account', 'credit_card')
+        .prefetch_related(Prefetch('items', queryset=TransactionItem.objects.order_by('id')))
+        .order_by('date', 'id')
+    )
+    positions = installment_positions(transactions)
+
+    rows = TransactionSerializer(transactions, many=True).data
+    subtotals = {}
+    for tx, row in zip(transactions, rows):
+        number, total = positions.get(tx.pk, (None, None))
+        row['installment'] = f'{number}/{total}' if number else None
+        name = tx.category.name if tx.category_id else 'Outros'
+        amount = to_cents(tx.value) * (-1 if tx.type == 'INCOME' else 1)
+        cents, count = subtotals.get(name, (0, 0))
+        subtotals[name] = (cents + amount, count + 1)
+
+    data = InvoiceSerializer(invoice).data
+    data['card_name'] = invoice.card.name
+    return {
+        'invoice': data,
+        'transactions': rows,
+        'categories': [
+            {'category': name, 'total': str(from_cents(cents)), 'count': count}
+            for name, (cents, count) in sorted(subtotals.items(), key=lambda item: item[1][0], reverse=True)
+        ],
+        'total': str(from_cents(sum(cents for cents, _count in subtotals.values()))),
+    }
+
+
+def render_statement(invoice, user, transactions):
+    """(corpo JSON, ETag forte). Fatura paga sai do cache quando já estiver lá."""
+    key = None
+    if is_frozen(invoice):
+        key = cache_key(invoice, user, transactions)
+        cached = cache.get(key)
+        if cached:
+            return cached
+
+    body = JSONRenderer().render(build_statement(invoice, transactions))
+    rendered = (body, '"%s"' % hashlib.sha256(body).hexdigest()[:32])
+    if key:
+        cache.set(key, rendered, settings.STATEMENT_CACHE_SECONDS)
+    return rendered
+
+
+# --- INVALIDAÇÃO (nomes no corpo do extrato) ---
+
+def _on_house_object_change(sender, instance, **kwargs):
+    bump_generation(instance.house_id)
+
+
+def _on_user_save(sender, instance, update_fields=None, **kwargs):
+    # Login grava só last_login: não mexe no nome
+    if update_fields is not None and 'first_name' not in update_fields:
+        return
+    for house_id in HouseMember.objects.filter(user=instance).values_list('house_id', flat=True):
+        bump_generation(house_id)
+
+
+def connect_signals():
+    for model in (Category, CreditCard):
+        post_save.connect(_on_house_object_change, sender=model, dispatch_uid=f'statement_{model.__name__}_save')
+        post_delete.connect(_on_house_object_change, sender=model, dispatch_uid=f'statement_{model.__name__}_delete')
+    post_save.connect(_on_user_save, sender=User, dispatch_uid='statement_user_save')
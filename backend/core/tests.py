@@ -1,11 +1,40 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import io
+import json
+import logging
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+from unittest import mock
+
+from dateutil.relativedelta import relativedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+from django.db import connection, connections
+from django.db.models import Count
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, tag
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.contrib.auth.models import User
+from django.core.management import call_command
+from . import benchmark, categorization, idempotency, profiling, slow_queries
 from .models import (
-    House, HouseMember, HouseInvitation, Account, Transaction, 
-    Product, InventoryItem, ShoppingList
+    House, HouseMember, HouseInvitation, Account, Transaction, Category,
+    Product, InventoryItem, ShoppingList, CreditCard, Invoice, TransactionItem, ChangeLogEntry,
+    RecurringBill, MonthlyRollup, TransactionArchive, IdempotencyKey, CategoryRule,
 )
+from .serializers import TransactionSerializer, InventoryItemSerializer
+from .middleware import ConcurrencyLimitMiddleware, ProfilingMiddleware
+from .pagination import EstimatedCountPaginator
+from .throttling import HouseScopedThrottle, Slots, UserScopedThrottle
 
 # ============================================================================
 # 1. TESTES DE FLUXO DE CONVITE (INVITE -> REGISTER -> JOIN)
@@ -261,4 +290,1656 @@ class RegistrationTestCase(TestCase):
         self.assertEqual(member.house.name, "Casa de new_admin")
         
         # O papel DEVE ser ADMIN (Correção crítica que fizemos na View)
-        self.assertEqual(member.role, 'ADMIN')
\ No newline at end of file
+        self.assertEqual(member.role, 'ADMIN')
+
+
+# ============================================================================
+# 7. VISIBILIDADE DAS TRANSAÇÕES (DONO DESNORMALIZADO)
+# ============================================================================
+class TransactionVisibilityTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.house = House.objects.create(name="Casa Visibilidade")
+        self.me = User.objects.create_user(username='me', password='123', first_name='Eu')
+        self.other = User.objects.create_user(username='other', password='123', first_name='Outro')
+        HouseMember.objects.create(user=self.me, house=self.house, role='MASTER')
+        HouseMember.objects.create(user=self.other, house=self.house, role='MEMBER')
+
+        shared_card = CreditCard.objects.create(
+            house=self.house, owner=self.other, name="Compartilhado", limit_total=1000,
+            limit_available=1000, closing_day=5, due_day=10, is_shared=True
+        )
+        private_account = Account.objects.create(house=self.house, owner=self.other, name="Privada", is_shared=False)
+        invoice = Invoice.objects.create(card=shared_card, reference_date='2025-12-01')
+
+        Transaction.objects.create(house=self.house, description="Cartão da casa", value=10, type='EXPENSE', invoice=invoice)
+        Transaction.objects.create(house=self.house, description="Segredo", value=10, type='EXPENSE', account=private_account)
+        self.client.force_authenticate(user=self.me)
+
+    def test_owner_is_denormalized_on_create(self):
+        tx = Transaction.objects.get(description="Cartão da casa")
+        self.assertEqual(tx.owner, self.other)
+        self.assertTrue(tx.is_shared)
+        self.assertIsNotNone(tx.credit_card_id)
+
+    def test_shared_card_transactions_visible_private_hidden(self):
+        response = self.client.get('/api/transactions/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        descriptions = [t['description'] for t in response.data]
+        self.assertEqual(descriptions, ["Cartão da casa"])
+        self.assertEqual(response.data[0]['owner_name'], 'Outro')
+        self.assertEqual(response.data[0]['source_name'], 'Cartão Compartilhado')
+
+
+# ============================================================================
+# 8. BENCHMARK DE ENDPOINTS (OPT-IN: RUN_BENCHMARKS=1 manage.py test core --tag benchmark)
+# ============================================================================
+@tag('benchmark')
+@unittest.skipUnless(os.environ.get('RUN_BENCHMARKS'), 'Benchmark desligado (defina RUN_BENCHMARKS=1)')
+class EndpointBenchmarkTestCase(TestCase):
+    def test_endpoint_queries_within_baseline(self):
+        # Só as queries: latência absoluta depende da máquina (run_benchmarks
+        # compara com o baseline local)
+        context = benchmark.seed()
+        results = benchmark.run(context, iterations=int(os.environ.get('BENCHMARK_ITERATIONS', 5)))
+        regressions = benchmark.compare(results, benchmark.load_baseline())
+        self.assertEqual(regressions, [], '\n'.join(regressions))
+
+
+# ============================================================================
+# 9. BUSCA TEXTUAL (TRANSAÇÕES E ITENS)
+# ============================================================================
+class TransactionSearchTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.house = House.objects.create(name="Casa Busca")
+        self.me = User.objects.create_user(username='me', password='123')
+        self.other = User.objects.create_user(username='other', password='123')
+        HouseMember.objects.create(user=self.me, house=self.house, role='MASTER')
+        HouseMember.objects.create(user=self.other, house=self.house, role='MEMBER')
+
+        mine = Account.objects.create(house=self.house, owner=self.me, name="Minha", is_shared=False)
+        private = Account.objects.create(house=self.house, owner=self.other, name="Privada", is_shared=False)
+
+        market = Transaction.objects.create(house=self.house, description="Supermercado", value=30, type='EXPENSE', account=mine)
+        TransactionItem.objects.create(transaction=market, description="Feijão Carioca", value=10)
+        Transaction.objects.create(house=self.house, description="Feijoada do sábado", value=50, type='EXPENSE', account=mine)
+        Transaction.objects.create(house=self.house, description="Feijão escondido", value=10, type='EXPENSE', account=private)
+        self.client.force_authenticate(user=self.me)
+
+    def test_search_matches_items_ignoring_accents(self):
+        response = self.client.get('/api/transactions/search/', {'q': 'feijao'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['description'], "Supermercado")
+
+    def test_search_respects_visibility_and_pagination(self):
+        response = self.client.get('/api/transactions/search/', {'q': 'feij', 'limit': 1})
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertNotIn("Feijão escondido", [t['description'] for t in response.data['results']])
+
+    def test_search_requires_query(self):
+        response = self.client.get('/api/transactions/search/', {'q': 'a'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'tsvector sem acento do PostgreSQL')
+    def test_postgres_search_ignores_accents_and_matches_prefixes(self):
+        Transaction.objects.create(house=self.house, description="Café da manhã", value=8, type='EXPENSE', is_shared=True)
+        found = lambda q: [t['description'] for t in self.client.get('/api/transactions/search/', {'q': q}).data['results']]
+        self.assertEqual(found('cafe'), ["Café da manhã"])
+        self.assertEqual(found('MANHA'), ["Café da manhã"])
+        self.assertEqual(found('superm'), ["Supermercado"])
+        self.assertEqual(found('feijao carioca'), ["Supermercado"])
+        self.assertEqual(found('feijoad sab'), ["Feijoada do sábado"])
+
+
+# ============================================================================
+# 10. LISTAGEM RÁPIDA (.values()) E CAMPOS ESPARSOS
+# ============================================================================
+class FastListTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.house = House.objects.create(name="Casa Rápida")
+        self.user = User.objects.create_user(username='fast', password='123', first_name='Rápido')
+        HouseMember.objects.create(user=self.user, house=self.house, role='MASTER')
+
+        account = Account.objects.create(house=self.house, owner=self.user, name="Conta", balance=Decimal('100'), is_shared=True)
+        card = CreditCard.objects.create(
+            house=self.house, owner=self.user, name="Roxo", limit_total=1000,
+            limit_available=1000, closing_day=5, due_day=10
+        )
+        invoice = Invoice.objects.create(card=card, reference_date='2025-12-01')
+        market = Transaction.objects.create(house=self.house, description="Mercado", value=Decimal('12.50'), type='EXPENSE', account=account)
+        TransactionItem.objects.create(transaction=market, description="Arroz", value=Decimal('7.25'))
+        TransactionItem.objects.create(transaction=market, description="Feijão", value=Decimal('5.25'))
+        Transaction.objects.create(house=self.house, description="Parcela", value=Decimal('99.90'), type='EXPENSE', invoice=invoice)
+        Transaction.objects.create(house=self.house, description="Sem origem", value=1, type='INCOME', is_shared=True)
+
+        product = Product.objects.create(house=self.house, name="Leite", measure_unit="L")
+        InventoryItem.objects.create(house=self.house, product=product, quantity=Decimal('1.5'))
+        self.client.force_authenticate(user=self.user)
+
+    def _slow_path(self, serializer_class, queryset):
+        return JSONRenderer().render(serializer_class(queryset, many=True).data)
+
+    def test_transactions_fast_path_is_byte_identical(self):
+        response = self.client.get('/api/transactions/')
+        queryset = Transaction.objects.filter(house=self.house).order_by('-date', '-created_at')
+        self.assertEqual(response.content, self._slow_path(TransactionSerializer, queryset))
+
+    def test_inventory_fast_path_is_byte_identical(self):
+        response = self.client.get('/api/inventory/')
+        self.assertEqual(response.content, self._slow_path(InventoryItemSerializer, InventoryItem.objects.filter(house=self.house)))
+
+    def test_sparse_fields(self):
+        response = self.client.get('/api/transactions/', {'fields': 'id,value,source_name'})
+        self.assertEqual(list(response.data[0].keys()), ['id', 'value', 'source_name'])
+        self.assertEqual(sorted(t['source_name'] for t in response.data), ['Cartão Roxo', 'Conta', 'Outros'])
+
+
+# ============================================================================
+# 11. BATCH (VÁRIAS OPERAÇÕES NUMA REQUISIÇÃO)
+# ============================================================================
+class BatchTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.house = House.objects.create(name="Casa Lote")
+        self.user = User.objects.create_user(username='batch', password='123')
+        HouseMember.objects.create(user=self.user, house=self.house, role='MASTER')
+        rice = Product.objects.create(house=self.house, name="Arroz")
+        milk = Product.objects.create(house=self.house, name="Leite")
+        self.rice = InventoryItem.objects.create(house=self.house, product=rice, quantity=1)
+        self.milk = InventoryItem.objects.create(house=self.house, product=milk, quantity=1)
+        self.client.force_authenticate(user=self.user)
+
+    def _patch(self, item, quantity):
+        return {'method': 'PATCH', 'path': f'/api/inventory/{item.id}/', 'body': {'quantity': quantity}}
+
+    def test_atomic_batch_commits_all(self):
+        response = self.client.post('/api/batch/', {
+            'operations': [self._patch(self.rice, 3), self._patch(self.milk, 4)]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['committed'])
+        self.assertEqual([r['status'] for r in response.data['results']], [200, 200])
+        self.milk.refresh_from_db()
+        self.assertEqual(self.milk.quantity, 4)
+
+    def test_atomic_batch_rolls_back_on_error(self):
+        response = self.client.post('/api/batch/', {
+            'operations': [self._patch(self.rice, 3), self._patch(self.milk, 'muito'), self._patch(self.milk, 5)]
+        }, format='json')
+        self.assertFalse(response.data['committed'])
+        self.assertEqual([r['status'] for r in response.data['results']], [200, 400])
+        self.rice.refresh_from_db()
+        self.assertEqual(self.rice.quantity, 1)
+
+    def test_independent_batch_keeps_successes(self):
+        response = self.client.post('/api/batch/', {
+            'atomic': False,
+            'operations': [self._patch(self.rice, 3), {'method': 'GET', 'path': '/api/inventory/999999/'}]
+        }, format='json')
+        self.assertEqual([r['status'] for r in response.data['results']], [200, 404])
+        self.rice.refresh_from_db()
+        self.assertEqual(self.rice.quantity, 3)
+
+    def test_atomic_flag_must_be_boolean(self):
+        # String "false" (ex.: vinda de formulário) desliga a atomicidade
+        response = self.client.post('/api/batch/', {
+            'atomic': 'false',
+            'operations': [self._patch(self.rice, 3), {'method': 'GET', 'path': '/api/inventory/999999/'}]
+        }, format='json')
+        self.assertFalse(response.data['atomic'])
+        self.assertEqual([r['status'] for r in response.data['results']], [200, 404])
+        self.rice.refresh_from_db()
+        self.assertEqual(self.rice.quantity, 3)
+
+        response = self.client.post('/api/batch/', {
+            'atomic': 'talvez', 'operations': [self._patch(self.rice, 4)]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.rice.refresh_from_db()
+        self.assertEqual(self.rice.quantity, 3)
+
+    def test_rejects_nested_and_oversized_batches(self):
+        nested = self.client.post('/api/batch/', {
+            'operations': [{'method': 'POST', 'path': '/api/batch/', 'body': {}}]
+        }, format='json')
+        self.assertEqual(nested.status_code, status.HTTP_400_BAD_REQUEST)
+        with self.settings(BATCH_MAX_OPERATIONS=1):
+            oversized = self.client.post('/api/batch/', {
+                'operations': [self._patch(self.rice, 2), self._patch(self.milk, 2)]
+            }, format='json')
+        self.assertEqual(oversized.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+# ============================================================================
+# 12. ATUALIZAÇÃO EM LOTE (ESTOQUE E LISTA DE COMPRAS)
+# ============================================================================
+class BulkUpdateTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.house = House.objects.create(name="Casa Bulk")
+        self.user = User.objects.create_user(username='bulk', password='123')
+        HouseMember.objects.create(user=self.user, house=self.house, role='MASTER')
+        self.items = [
+            InventoryItem.objects.create(
+                house=self.house, product=Product.objects.create(house=self.house, name=f"Produto {i}"), quantity=5
+            )
+            for i in range(105)
+        ]
+        self.client.force_authenticate(user=self.user)
+
+    def test_constant_number_of_queries(self):
+        small = [{'id': item.id, 'quantity': 1} for item in self.items[-5:]]
+        with CaptureQueriesContext(connection) as few:
+            self.client.patch('/api/inventory/bulk/', small, format='json')
+        rows = [{'id': item.id, 'quantity': 2} if i % 2 else {'id': item.id, 'quantity_delta': '-1.5'}
+                for i, item in enumerate(self.items[:100])]
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.patch('/api/inventory/bulk/', rows, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(many), len(few) + 1)  # + o UPDATE dos deltas
+
+        self.items[0].refresh_from_db()
+        self.items[1].refresh_from_db()
+        self.assertEqual(self.items[0].quantity, Decimal('3.5'))
+        self.assertEqual(self.items[1].quantity, Decimal('2'))
+
+    def test_rejects_items_from_other_house(self):
+        other = House.objects.create(name="Outra")
+        foreign = InventoryItem.objects.create(house=other, product=Product.objects.create(house=other, name="X"))
+        response = self.client.patch('/api/inventory/bulk/', [
+            {'id': self.items[0].id, 'quantity': 9}, {'id': foreign.id, 'quantity': 9}
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data['ids'], [foreign.id])
+        self.items[0].refresh_from_db()
+        self.assertEqual(self.items[0].quantity, 5)
+
+    def test_shopping_list_bulk(self):
+        entry = ShoppingList.objects.create(house=self.house, product=self.items[0].product, quantity_to_buy=1)
+        response = self.client.patch('/api/shopping-list/bulk/', {'items': [
+            {'id': entry.id, 'is_purchased': True, 'real_unit_price': '4.99'}
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        entry.refresh_from_db()
+        self.assertTrue(entry.is_purchased)
+        self.assertEqual(entry.real_unit_price, Decimal('4.99'))
+
+
+# ============================================================================
+# 13. SINCRONIZAÇÃO INCREMENTAL (LOG DE ALTERAÇÕES)
+# ============================================================================
+class SyncTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.house = House.objects.create(name="Casa Sync")
+        self.user = User.objects.create_user(username='sync', password='123')
+        self.other = User.objects.create_user(username='sync2', password='123')
+        HouseMember.objects.create(user=self.user, house=self.house, role='MASTER')
+        HouseMember.objects.create(user=self.other, house=self.house, role='MEMBER')
+        self.client.force_authenticate(user=self.user)
+        self.cursor = self.client.get('/api/sync/').data['cursor']
+
+    def _sync(self):
+        response = self.client.get('/api/sync/', {'since': self.cursor})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.cursor = response.data['cursor']
+        return response.data['changes']
+
+    def test_upserts_and_tombstones_since_cursor(self):
+        product = Product.objects.create(house=self.house, name="Café")
+        changes = self._sync()
+        self.assertEqual([p['name'] for p in changes['product']['upserts']], ["Café"])
+
+        self.assertEqual(self._sync(), {})
+
+        product_id = product.id
+        product.delete()
+        changes = self._sync()
+        self.assertEqual(changes['product'], {'upserts': [], 'deletes': [product_id]})
+
+    def test_invisible_objects_become_tombstones(self):
+        private = Account.objects.create(house=self.house, owner=self.other, name="Privada", is_shared=False)
+        changes = self._sync()
+        self.assertEqual(changes['account'], {'upserts': [], 'deletes': [private.id]})
+
+    def test_seq_is_monotonic_and_compaction_expires_old_cursors(self):
+        Category.objects.create(house=self.house, name="A")
+        Category.objects.create(house=self.house, name="B")
+        seqs = list(ChangeLogEntry.objects.filter(house=self.house).order_by('id').values_list('seq', flat=True))
+        self.assertEqual(seqs, sorted(seqs))
+        self.assertEqual(len(set(seqs)), len(seqs))
+
+        call_command('compact_changelog', days=-1, stdout=io.StringIO())
+        response = self.client.get('/api/sync/', {'since': 0})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+        self.assertEqual(response.data['cursor'], seqs[-1])
+
+
+# ============================================================================
+# 14. EVENTOS EM TEMPO REAL (SSE)
+# ============================================================================
+class HouseEventsTestCase(TestCase):
+    def setUp(self):
+        from . import events
+
+        self.house = House.objects.create(name="Casa Eventos")
+        self.user = User.objects.create_user(username='events', password='123')
+        HouseMember.objects.create(user=self.user, house=self.house, role='MASTER')
+        self.token = Token.objects.create(user=self.user)
+        # Broker do próprio processo também no PostgreSQL: o NOTIFY só sai no
+        # commit real (que o TestCase nunca faz) e o LISTEN prenderia uma
+        # conexão com o banco de testes
+        patcher = mock.patch.object(events, '_broker', events.InMemoryBroker(events.hub))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_stream_receives_house_changes(self):
+        from . import events
+        from .views import house_events
+
+        request = AsyncRequestFactory().get('/api/events/', {'token': self.token.key})
+        response = await house_events(request)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content.__aiter__()
+        self.assertEqual(await stream.__anext__(), b'retry: 5000\n\n')
+
+        # Pede o próximo chunk antes de publicar: assim a conexão já está inscrita
+        pending = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        events.hub.dispatch(self.house.id, {'seq': 7, 'model': 'product', 'op': 'UPSERT', 'ids': ['1']})
+        chunk = await asyncio.wait_for(pending, timeout=2)
+        self.assertIn(b'id: 7', chunk)
+        self.assertIn(b'"model": "product"', chunk)
+
+        # Cliente desconectou: o servidor ASGI cancela a tarefa da resposta
+        pending = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+        self.assertEqual(events.hub.subscriber_count(self.house.id), 0)
+
+    async def test_rejects_missing_token(self):
+        from .views import house_events
+
+        response = await house_events(AsyncRequestFactory().get('/api/events/'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_changes_are_published_after_commit(self):
+        from . import events
+
+        received = []
+        original = events.hub.dispatch
+        events.hub.dispatch = lambda house_id, event: received.append((house_id, event))
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                Product.objects.create(house=self.house, name="Pão")
+        finally:
+            events.hub.dispatch = original
+        self.assertEqual(received[0][0], self.house.id)
+        self.assertEqual(received[0][1]['model'], 'product')
+
+
+# ============================================================================
+# 15. LEITURAS ASSÍNCRONAS (ASGI)
+# ============================================================================
+class AsyncReadEndpointsTestCase(TestCase):
+    def setUp(self):
+        self.house = House.objects.create(name="Casa Async")
+        self.user = User.objects.create_user(username='async', password='123', first_name='Assíncrono')
+        HouseMember.objects.create(user=self.user, house=self.house, role='MASTER')
+        self.token = Token.objects.create(user=self.user)
+
+        food = Category.objects.create(house=self.house, name="Mercado", type='EXPENSE')
+        account = Account.objects.create(house=self.house, owner=self.user, name="Conta", balance=Decimal('100'))
+        card = CreditCard.objects.create(
+            house=self.house, owner=self.user, name="Roxo", limit_total=1000,
+            limit_available=1000, closing_day=5, due_day=10
+        )
+        Invoice.objects.create(card=card, reference_date='2025-11-01', status='PAID', value=Decimal('10'))
+        Invoice.objects.create(card=card, reference_date='2025-12-01', value=Decimal('80'), amount_paid=Decimal('30'))
+        CreditCard.objects.create(
+            house=self.house, owner=self.user, name="Sem fatura", limit_total=500,
+            limit_available=500, closing_day=1, due_day=8
+        )
+        rent = RecurringBill.objects.create(house=self.house, name="Aluguel", base_value=Decimal('900'), due_day=5, category=food)
+        RecurringBill.objects.create(house=self.house, name="Internet", base_value=Decimal('99.90'), due_day=10)
+
+        market = Transaction.objects.create(
+            house=self.house, description="Mercado", value=Decimal('12.50'), type='EXPENSE', account=account, category=food
+        )
+        TransactionItem.objects.create(transaction=market, description="Arroz", value=Decimal('7.25'))
+        Transaction.objects.create(
+            house=self.house, description="Aluguel", value=Decimal('900'), type='EXPENSE', account=account, recurring_bill=rent
+        )
+        Transaction.objects.create(house=self.house, description="Salário", value=Decimal('3000'), type='INCOME', account=account)
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_same_response_as_sync_endpoints(self):
+        pairs = [
+            ('/api/history/', '/api/async/history/'),
+            ('/api/transactions/', '/api/async/transactions/'),
+            ('/api/transactions/?fields=id,description', '/api/async/transactions/?fields=id,description'),
+        ]
+        for sync_path, async_path in pairs:
+            expected = self.client.get(sync_path)
+            response = self.client.get(async_path)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, expected.content, async_path)
+
+    def test_dashboard_matches_the_calls_it_replaces(self):
+        data = self.client.get('/api/async/dashboard/').json()
+        for key, path in [
+            ('accounts', '/api/accounts/'), ('credit_cards', '/api/credit-cards/'),
+            ('recurring_bills', '/api/recurring-bills/'), ('transactions', '/api/transactions/'), ('me', '/api/me/'),
+        ]:
+            self.assertEqual(data[key], self.client.get(path).json(), key)
+        self.assertEqual(data['credit_cards'][0]['invoice_info']['value'], 50.0)
+        self.assertTrue(data['recurring_bills'][0]['is_paid_this_month'])
+
+    async def test_runs_on_async_stack(self):
+        # Middlewares em modo assíncrono: a view roda direto no event loop
+        response = await self.async_client.get('/api/async/dashboard/', headers={'Authorization': f'Token {self.token.key}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['me']['first_name'], 'Assíncrono')
+
+        response = await self.async_client.get('/api/async/history/')
+        self.assertEqual(response.status_code, 401)
+
+
+# ============================================================================
+# 16. RÉPLICA DE LEITURA (ROTEAMENTO E CLIENTE PRESO AO PRIMÁRIO)
+# ============================================================================
+class ReplicaRouterTestCase(SimpleTestCase):
+    def setUp(self):
+        from . import db_router
+        from .middleware import ReplicaRoutingMiddleware
+
+        self.db_router = db_router
+        self.router = db_router.PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+        cache.clear()
+        with mock.patch.object(db_router, 'replica_configured', return_value=True):
+            self.middleware = ReplicaRoutingMiddleware(self._view)
+
+    def _view(self, request):
+        # Anota onde a leitura de uma transação iria parar
+        request.read_from = self.router.db_for_read(Transaction)
+        if request.method == 'POST':
+            self.router.db_for_write(Transaction)
+        return None
+
+    def _call(self, method, view_class, token='Token abc'):
+        request = getattr(self.factory, method)('/api/transactions/', HTTP_AUTHORIZATION=token)
+        view = type('View', (), {'replica_reads': True}) if view_class else object
+        view_func = lambda request: None  # noqa: E731
+        view_func.cls = view
+
+        def get_response(request):
+            self.middleware.process_view(request, view_func, (), {})
+            return self._view(request)
+        self.middleware.get_response = get_response
+        self.middleware(request)
+        return request.read_from
+
+    def test_outside_requests_everything_uses_primary(self):
+        self.assertEqual(self.router.db_for_read(Transaction), 'default')
+        self.assertEqual(self.router.db_for_write(Transaction), 'default')
+
+    def test_safe_reads_of_marked_views_use_replica(self):
+        self.assertEqual(self._call('get', view_class=True), 'replica')
+        self.assertEqual(self._call('get', view_class=False), 'default')
+        self.assertEqual(self._call('post', view_class=True), 'default')
+
+    def test_auth_models_and_reads_after_a_write_use_primary(self):
+        token = self.db_router.begin_request()
+        try:
+            self.db_router.current_state().replica = True
+            self.assertEqual(self.router.db_for_read(Token), 'default')
+            self.assertEqual(self.router.db_for_read(HouseMember), 'default')
+            self.assertEqual(self.router.db_for_read(Transaction), 'replica')
+            self.router.db_for_write(Transaction)
+            self.assertEqual(self.router.db_for_read(Transaction), 'default')
+        finally:
+            self.db_router.end_request(token)
+
+    def test_client_that_wrote_sticks_to_primary(self):
+        self._call('post', view_class=True)
+        self.assertEqual(self._call('get', view_class=True), 'default')
+        # Outro cliente continua na réplica
+        self.assertEqual(self._call('get', view_class=True, token='Token xyz'), 'replica')
+        cache.clear()  # Passou o REPLICA_STICKY_SECONDS
+        self.assertEqual(self._call('get', view_class=True), 'replica')
+
+
+@unittest.skipUnless('replica' in settings.DATABASES, 'Defina DATABASE_REPLICA_URL para testar com duas bases')
+class ReplicaIntegrationTestCase(TransactionTestCase):
+    # TransactionTestCase: a "réplica" é outra conexão e só enxerga dados commitados.
+    # O runner lê 'databases' mesmo de classes puladas.
+    databases = set(settings.DATABASES) & {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.house = House.objects.create(name="Casa Réplica")
+        self.user = User.objects.create_user(username='replica', password='123')
+        HouseMember.objects.create(user=self.user, house=self.house, role='MASTER')
+        self.account = Account.objects.create(house=self.house, owner=self.user, name="Conta", balance=Decimal('100'))
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+
+    def test_list_reads_replica_until_the_client_writes(self):
+        with CaptureQueriesContext(connections['replica']) as replica:
+            self.assertEqual(self.client.get('/api/transactions/').status_code, 200)
+        self.assertTrue(replica.captured_queries)
+
+        response = self.client.post('/api/transactions/', {
+            'description': 'Padaria', 'value': '10.00', 'type': 'EXPENSE',
+            'payment_method': 'ACCOUNT', 'account': self.account.id,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        with CaptureQueriesContext(connections['replica']) as replica:
+            self.assertEqual(self.client.get('/api/transactions/').status_code, 200)
+        self.assertEqual(replica.captured_queries, [])
+
+
+
+# ============================================================================
+# 17. PARTICIONAMENTO POR DATA (TRANSAÇÕES E ITENS)
+# ============================================================================
+class PartitionRangesTestCase(SimpleTestCase):
+    def test_bounds_and_names(self):
+        from . import partitioning
+        day = datetime.date(2025, 12, 17)
+        self.assertEqual(partitioning.partition_bounds(day, 'month'), (datetime.date(2025, 12, 1), datetime.date(2026, 1, 1)))
+        self.assertEqual(partitioning.partition_bounds(day, 'year'), (datetime.date(2025, 1, 1), datetime.date(2026, 1, 1)))
+        self.assertEqual(partitioning.partition_name('core_transaction', datetime.date(2025, 3, 1), 'month'), 'core_transaction_2025_03')
+        self.assertEqual(partitioning.partition_name('core_transaction', datetime.date(2025, 1, 1), 'year'), 'core_transaction_2025')
+        with self.assertRaises(partitioning.PartitioningError):
+            partitioning.partition_bounds(day, 'week')
+
+    def test_ranges_cover_the_period(self):
+        from . import partitioning
+        ranges = partitioning.future_ranges('month', 2, today=datetime.date(2025, 11, 30))
+        self.assertEqual([start for start, _ in ranges], [
+            datetime.date(2025, 11, 1), datetime.date(2025, 12, 1), datetime.date(2026, 1, 1),
+        ])
+        self.assertEqual(
+            partitioning.expected_partitions('core_transaction', 'month', datetime.date(2025, 11, 1), datetime.date(2025, 12, 1)),
+            {'core_transaction_2025_11', 'core_transaction_default'},
+        )
+
+
+class TransactionDateOnItemsTestCase(TestCase):
+    def setUp(self):
+        self.house = House.objects.create(name="Casa Partições")
+        self.transaction = Transaction.objects.create(
+            house=self.house, description="Mercado", value=Decimal('30'), type='EXPENSE',
+            date=datetime.date(2025, 3, 10),
+        )
+        TransactionItem.objects.create(transaction=self.transaction, description="Arroz", value=Decimal('30'))
+
+    def test_items_follow_the_transaction_date(self):
+        self.assertEqual(self.transaction.items.get().transaction_date, datetime.date(2025, 3, 10))
+        self.transaction.date = datetime.date(2025, 5, 2)
+        self.transaction.save()
+        self.assertEqual(self.transaction.items.get().transaction_date, datetime.date(2025, 5, 2))
+
+    @unittest.skipUnless(
+        connection.vendor == 'postgresql' and getattr(connection, 'pg_version', 0) >= 150000,
+        'Particionamento só no PostgreSQL 15+',
+    )
+    def test_conversion_prunes_hot_queries(self):
+        # Conversão completa dentro da transação do teste (DDL transacional)
+        from . import partitioning
+        from .serializers import current_month_range
+
+        interval = settings.TRANSACTION_PARTITIONING or 'month'
+        partitioning.convert(connection, interval, ahead=2, batch_size=1)
+        self.assertTrue(partitioning.is_partitioned(connection))
+        Transaction.objects.create(
+            house=self.house, description="Hoje", value=Decimal('5'), type='EXPENSE', date=current_month_range()[0],
+        )
+        for label, read, ok in partitioning.verify(connection, interval, partitioning.hot_queries(self.house.id)):
+            self.assertTrue(ok, f"{label}: {read}")
+
+        # Mudar a data da transação leva os itens para a partição da nova data
+        self.transaction.date = datetime.date(2024, 4, 1)
+        self.transaction.save()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT tableoid::regclass::text FROM core_transactionitem WHERE transaction_id = %s", [self.transaction.id])
+            self.assertEqual(cursor.fetchone()[0], 'core_transactionitem_default')
+
+
+# ============================================================================
+# 18. ARQUIVO FRIO (TRANSAÇÕES ANTIGAS E TOTAIS MENSAIS)
+# ============================================================================
+class ArchiveTestCase(TestCase):
+    def setUp(self):
+        self.house = House.objects.create(name="Casa Arquivo")
+        self.user = User.objects.create_user(username='arquivo', password='123')
+        self.other = User.objects.create_user(username='arquivo2', password='123')
+        HouseMember.objects.create(user=self.user, house=self.house, role='MASTER')
+        HouseMember.objects.create(user=self.other, house=self.house, role='MEMBER')
+        self.account = Account.objects.create(house=self.house, owner=self.user, name="Conta", balance=Decimal('100'), is_shared=True)
+        self.food = Category.objects.create(house=self.house, name="Mercado")
+        # Mês passado: arquivado com months=0 e ainda dentro da janela do /history/
+        self.month = (datetime.date.today().replace(day=1) - datetime.timedelta(days=1)).replace(day=1)
+
+        self.old = Transaction.objects.create(
+            house=self.house, description="Feira", value=Decimal('40.50'), type='EXPENSE',
+            date=self.month, category=self.food, owner=self.user, is_shared=True,
+        )
+        TransactionItem.objects.create(transaction=self.old, description="Banana", value=Decimal('10'))
+        Transaction.objects.create(
+            house=self.house, description="Salário", value=Decimal('1000'), type='INCOME',
+            date=self.month, owner=self.user, is_shared=True,
+        )
+        Transaction.objects.create(
+            house=self.house, description="Presente", value=Decimal('30'), type='EXPENSE',
+            date=self.month, owner=self.other, is_shared=False,
+        )
+        self.recent = Transaction.objects.create(
+            house=self.house, description="Hoje", value=Decimal('5'), type='EXPENSE', owner=self.user, is_shared=True,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_archive_keeps_history_totals(self):
+        before = self.client.get('/api/history/').data
+        call_command('archive_transactions', months=0, stdout=io.StringIO())
+
+        self.assertEqual(list(Transaction.objects.filter(house=self.house)), [self.recent])
+        self.assertFalse(TransactionItem.objects.filter(transaction_id=self.old.id).exists())
+        self.assertEqual(TransactionArchive.objects.get(house=self.house).row_count, 3)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('100'))
+        self.assertTrue(ChangeLogEntry.objects.filter(house=self.house, op='DELETE', object_id=str(self.old.id)).exists())
+
+        after = self.client.get('/api/history/').data
+        archived = next(month for month in after if month['id'] == f"{self.month:%Y-%m}")
+        original = next(month for month in before if month['id'] == archived['id'])
+        self.assertEqual((archived['income'], archived['expense']), (original['income'], original['expense']))
+        self.assertEqual(archived['chart_data'], original['chart_data'])
+        self.assertEqual(archived['transactions'], [])
+
+    def test_archived_rows_stream_back_with_visibility(self):
+        call_command('archive_transactions', months=0, stdout=io.StringIO())
+        # Uma segunda rodada não duplica nada
+        call_command('archive_transactions', months=0, stdout=io.StringIO())
+        self.assertEqual(MonthlyRollup.objects.filter(house=self.house, type='EXPENSE', category=self.food).get().count, 1)
+
+        response = self.client.get('/api/archive/transactions/', {'year': self.month.year, 'month': self.month.month})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(sorted(row['description'] for row in rows), ['Feira', 'Salário'])
+        feira = next(row for row in rows if row['description'] == 'Feira')
+        self.assertEqual((feira['value'], feira['date']), ('40.50', self.month.isoformat()))
+        self.assertEqual([item['description'] for item in feira['items']], ['Banana'])
+
+        self.assertEqual(self.client.get('/api/archive/transactions/').status_code, 400)
+
+
+# ============================================================================
+# 19. EXCLUSÃO DE CASA EM SEGUNDO PLANO E SAÍDA DE MEMBRO
+# ============================================================================
+class HousePurgeTestCase(TestCase):
+    def setUp(self):
+        self.house = House.objects.create(name="Casa Expurgo")
+        self.master = User.objects.create_user(username='expurgo', password='123')
+        self.member = User.objects.create_user(username='expurgo2', password='123')
+        HouseMember.objects.create(user=self.master, house=self.house, role='MASTER')
+        HouseMember.objects.create(user=self.member, house=self.house, role='MEMBER')
+        Token.objects.create(user=self.master)
+
+        self.account = Account.objects.create(house=self.house, owner=self.member, name="Conta", balance=Decimal('500'))
+        self.card = CreditCard.objects.create(
+            house=self.house, owner=self.member, name="Cartão", limit_total=Decimal('1000'),
+            limit_available=Decimal('1000'), closing_day=5, due_day=10,
+        )
+        self.invoice = Invoice.objects.create(card=self.card, reference_date=datetime.date(2025, 1, 1), value=Decimal('80'))
+        self.from_account = Transaction.objects.create(
+            house=self.house, description="Padaria", value=Decimal('20'), type='EXPENSE', account=self.account,
+        )
+        self.from_card = Transaction.objects.create(
+            house=self.house, description="Loja", value=Decimal('80'), type='EXPENSE', invoice=self.invoice,
+        )
+        for i in range(20):
+            tx = Transaction.objects.create(house=self.house, description=f"Compra {i}", value=Decimal('1'), type='EXPENSE')
+            TransactionItem.objects.create(transaction=tx, description="Item", value=Decimal('1'))
+        product = Product.objects.create(house=self.house, name="Arroz")
+        InventoryItem.objects.create(house=self.house, product=product, quantity=1)
+        self.client = APIClient()
+
+    def test_destroy_hides_house_then_purge_removes_everything(self):
+        self.client.force_authenticate(user=self.master)
+        response = self.client.delete(f'/api/houses/{self.house.id}/')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        self.house.refresh_from_db()
+        self.assertIsNotNone(self.house.deletion_requested_at)
+        self.assertFalse(HouseMember.objects.filter(user=self.member).exists())
+        self.assertFalse(User.objects.get(pk=self.master.pk).is_active)
+        self.assertFalse(Token.objects.filter(user=self.master).exists())
+        self.assertTrue(Transaction.objects.filter(house=self.house).exists())  # ainda não expurgada
+
+        with CaptureQueriesContext(connection) as queries:
+            call_command('purge_houses', stdout=io.StringIO())
+        # Um lote por tabela (com savepoints do TestCase), não uma query por linha
+        self.assertLess(len(queries), 100)
+        self.assertFalse(House.objects.filter(pk=self.house.pk).exists())
+        self.assertFalse(Transaction.objects.exists())
+        self.assertFalse(TransactionItem.objects.exists())
+        self.assertFalse(Invoice.objects.exists())
+        self.assertFalse(Product.objects.exists())
+        self.assertFalse(User.objects.filter(pk=self.master.pk).exists())
+        self.assertTrue(User.objects.filter(pk=self.member.pk).exists())
+
+    def test_delete_in_batches_loops_until_done(self):
+        from . import purge
+        deleted = purge.delete_in_batches(TransactionItem.objects.filter(transaction__house=self.house), batch_size=7)
+        self.assertEqual(deleted, 20)
+        self.assertFalse(TransactionItem.objects.exists())
+
+    def test_leave_removes_member_accounts_and_keeps_transactions(self):
+        self.client.force_authenticate(user=self.member)
+        response = self.client.post(f'/api/houses/{self.house.id}/leave/')
+        self.assertEqual(response.status_code, 200)
+
+        self.from_account.refresh_from_db()
+        self.from_card.refresh_from_db()
+        self.assertEqual((self.from_account.account_id, self.from_account.owner_id), (None, None))
+        self.assertEqual((self.from_card.invoice_id, self.from_card.credit_card_id), (None, None))
+        self.assertFalse(Account.objects.filter(pk=self.account.pk).exists())
+        self.assertFalse(CreditCard.objects.filter(pk=self.card.pk).exists())
+        self.assertFalse(Invoice.objects.filter(pk=self.invoice.pk).exists())
+        self.assertTrue(ChangeLogEntry.objects.filter(
+            house=self.house, model='creditcard', object_id=str(self.card.id), op='DELETE',
+        ).exists())
+
+
+# ============================================================================
+# 20. EXCLUSÃO EM LOTE COM ESTORNO (POST /transactions/bulk-delete/)
+# ============================================================================
+class BulkDeleteTransactionsTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='lote', password='123')
+        self.house = House.objects.create(name="Casa Lote")
+        HouseMember.objects.create(user=self.user, house=self.house, role='MASTER')
+        self.account = Account.objects.create(house=self.house, owner=self.user, name="Conta", balance=Decimal('1000'))
+        self.card = CreditCard.objects.create(
+            house=self.house, owner=self.user, name="Cartão", limit_total=Decimal('1000'),
+            limit_available=Decimal('1000'), closing_day=5, due_day=10,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def buy_in_installments(self, value='300', installments=3):
+        response = self.client.post('/api/transactions/', {
+            'description': 'Geladeira', 'value': value, 'type': 'EXPENSE', 'date': '2025-01-10',
+            'payment_method': 'CREDIT_CARD', 'card': self.card.id, 'installments': installments,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        return response.data
+
+    def test_deletes_whole_series_and_reverses_balances(self):
+        first = self.buy_in_installments()
+        self.assertIsNotNone(first['installment_group'])
+        self.assertEqual(Transaction.objects.filter(installment_group=first['installment_group']).count(), 3)
+        expense = Transaction.objects.create(
+            house=self.house, description="Mercado", value=Decimal('100'), type='EXPENSE', account=self.account,
+        )
+        income = Transaction.objects.create(
+            house=self.house, description="Salário", value=Decimal('40'), type='INCOME', account=self.account,
+        )
+        TransactionItem.objects.create(transaction=expense, description="Arroz", value=Decimal('100'))
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.limit_available, Decimal('700'))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                '/api/transactions/bulk-delete/', {'ids': [first['id'], expense.id, income.id]}, format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'deleted': 5, 'items_deleted': 1})
+        self.assertLess(len(queries), 40)
+
+        self.assertFalse(Transaction.objects.filter(house=self.house).exists())
+        self.account.refresh_from_db()
+        self.card.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('1000'))
+        self.assertEqual(self.card.limit_available, Decimal('1000'))
+        self.assertEqual(set(Invoice.objects.filter(card=self.card).values_list('value', flat=True)), {Decimal('0')})
+        self.assertTrue(ChangeLogEntry.objects.filter(model='account', object_id=str(self.account.id)).exists())
+
+    def test_paid_invoice_does_not_give_limit_back_twice(self):
+        first = self.buy_in_installments('200', 2)
+        paid = Invoice.objects.get(transactions__id=first['id'])
+        Invoice.objects.filter(pk=paid.pk).update(status='PAID', amount_paid=Decimal('100'))
+        CreditCard.objects.filter(pk=self.card.pk).update(limit_available=Decimal('900'))  # o pagamento devolveu 100
+
+        Transaction.objects.filter(pk=first['id']).delete_with_reversal()
+
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.limit_available, Decimal('1000'))
+
+    def test_rejects_transactions_outside_the_house(self):
+        other_house = House.objects.create(name="Outra")
+        other = Transaction.objects.create(house=other_house, description="X", value=Decimal('1'), type='EXPENSE')
+        response = self.client.post('/api/transactions/bulk-delete/', {'ids': [other.id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(Transaction.objects.filter(pk=other.pk).exists())
+
+
+# ============================================================================
+# 21. VALORES EM CENTAVOS (MoneyField)
+# ============================================================================
+class MoneyFieldTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='centavos', password='123')
+        self.house = House.objects.create(name="Casa Centavos")
+        HouseMember.objects.create(user=self.user, house=self.house, role='MASTER')
+        self.card = CreditCard.objects.create(
+            house=self.house, owner=self.user, name="Cartão", limit_total=Decimal('1000'),
+            limit_available=Decimal('1000'), closing_day=5, due_day=10,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_split_installments_is_exact_with_remainder_first(self):
+        from .money import split_installments
+        self.assertEqual(split_installments(Decimal('100'), 3), [Decimal('33.34'), Decimal('33.33'), Decimal('33.33')])
+        self.assertEqual(sum(split_installments(Decimal('0.05'), 4)), Decimal('0.05'))
+        self.assertEqual(split_installments(Decimal('10'), 1), [Decimal('10.00')])
+
+    def test_stored_as_cents_and_serialized_as_decimal_string(self):
+        tx = Transaction.objects.create(house=self.house, description="Café", value=Decimal('12.345'), type='EXPENSE')
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT value FROM {Transaction._meta.db_table} WHERE id = %s", [tx.id])
+            self.assertEqual(cursor.fetchone()[0], 1235)
+        tx.refresh_from_db()
+        self.assertEqual(tx.value, Decimal('12.35'))
+        self.assertEqual(TransactionSerializer(tx).data['value'], '12.35')
+        self.assertEqual(Transaction.objects.filter(value__gt=Decimal('12.34')).count(), 1)
+
+    def test_serializer_field_comes_from_project_base_class(self):
+        from rest_framework import serializers
+        from .money import MoneyField
+        from .serializers import MoneySerializerField
+        self.assertNotIn(MoneyField, serializers.ModelSerializer.serializer_field_mapping)
+        field = TransactionSerializer().fields['value']
+        self.assertIsInstance(field, MoneySerializerField)
+        self.assertEqual((field.max_digits, field.decimal_places), (10, 2))
+        self.assertEqual(MonthlyRollup._meta.get_field('total').formfield().max_digits, 14)
+
+    def test_installment_purchase_sums_to_total(self):
+        response = self.client.post('/api/transactions/', {
+            'description': 'Sofá', 'value': '100.00', 'type': 'EXPENSE', 'date': '2025-01-10',
+            'payment_method': 'CREDIT_CARD', 'card': self.card.id, 'installments': 3,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.data['value'], '33.34')
+        values = list(Transaction.objects.order_by('date').values_list('value', flat=True))
+        self.assertEqual(values, [Decimal('33.34'), Decimal('33.33'), Decimal('33.33')])
+        self.assertEqual(sum(Invoice.objects.values_list('value', flat=True)), Decimal('100.00'))
+
+    def test_history_sums_exactly(self):
+        today = datetime.date.today()
+        for value in ('0.10', '0.20'):
+            Transaction.objects.create(house=self.house, description="Bala", value=Decimal(value), type='EXPENSE', date=today)
+        response = self.client.get('/api/history/')
+        self.assertEqual(response.data[0]['expense'], 0.3)  # em float daria 0.30000000000000004
+
+    def test_load_data_writes_cents(self):
+        # generate_load_data escreve direto nas tabelas, sem passar pelo MoneyField
+        call_command(
+            'generate_load_data', transactions=300, months=3, products=5, prefix='centavos',
+            items_ratio=0.5, installment_ratio=0.5, stdout=io.StringIO(),
+        )
+        house = House.objects.get(name='Casa centavos_42_0')
+        for invoice in Invoice.objects.filter(card__house=house):
+            values = Transaction.objects.filter(invoice=invoice).values_list('value', flat=True)
+            self.assertEqual(sum(values, Decimal('0')), invoice.value)
+        self.assertGreater(Transaction.objects.filter(house=house, value__gte=Decimal('1')).count(), 250)
+        # Parcelas "(i/n)" de uma compra dividem o installment_group
+        series = Transaction.objects.filter(house=house).exclude(installment_group=None)
+        self.assertTrue(series.exists())
+        for group in series.values_list('installment_group', flat=True).distinct()[:10]:
+            descriptions = series.filter(installment_group=group).values_list('description', flat=True)
+            self.assertEqual(len({d.rsplit(' (', 1)[0] for d in descriptions}), 1)
+            self.assertTrue(all(d.endswith(')') for d in descriptions))
+        self.assertFalse(Transaction.objects.filter(house=house, installment_group=None, description__endswith='2)').exists())
+        for tx in Transaction.objects.filter(house=house).exclude(items=None).prefetch_related('items')[:20]:
+            self.assertLessEqual(sum(item.value for item in tx.items.all()), tx.value)
+            self.assertGreater(sum(item.value for item in tx.items.all()), tx.value / 2)
+
+
+# ============================================================================
+# 22. PROJEÇÃO DE CAIXA (/projection/?months=N)
+# ============================================================================
+class ProjectionTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='projecao', password='123')
+        self.house = House.objects.create(name="Casa Projeção")
+        HouseMember.objects.create(user=self.user, house=self.house, role='MASTER')
+        account = Account.objects.create(house=self.house, owner=self.user, name="Conta", balance=Decimal('5000'))
+        self.card = CreditCard.objects.create(
+            house=self.house, owner=self.user, name="Cartão", limit_total=Decimal('1000'),
+            limit_available=Decimal('700'), closing_day=5, due_day=10,
+        )
+        self.month = datetime.date.today().replace(day=1)
+        # Fatura atrasada (entra no mês atual) e as duas próximas parcelas
+        Invoice.objects.create(card=self.card, reference_date=self.month - relativedelta(months=1), value=Decimal('100'))
+        Invoice.objects.create(card=self.card, reference_date=self.month + relativedelta(months=1), value=Decimal('100'))
+        Invoice.objects.create(
+            card=self.card, reference_date=self.month + relativedelta(months=2), value=Decimal('100'), amount_paid=Decimal('40'),
+        )
+        Invoice.objects.create(card=self.card, reference_date=self.month, value=Decimal('999'), status='PAID')
+        rent = RecurringBill.objects.create(house=self.house, name="Aluguel", base_value=Decimal('1000'), due_day=5)
+        RecurringBill.objects.create(house=self.house, name="Internet", base_value=Decimal('100'), due_day=20)
+        Transaction.objects.create(
+            house=self.house, description="Aluguel", value=Decimal('1000'), type='EXPENSE',
+            recurring_bill=rent, account=account, date=datetime.date.today(),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_projects_balances_and_card_limits(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/projection/?months=4')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertLess(len(queries), 10)
+
+        data = response.data
+        self.assertEqual(data['balance'], '4000.00')  # 5000 menos o aluguel já lançado
+        timeline = data['timeline']
+        self.assertEqual([m['month'] for m in timeline][0], self.month.strftime('%Y-%m'))
+        self.assertEqual([m['outflow'] for m in timeline], ['200.00', '1200.00', '1160.00', '1100.00'])
+        self.assertEqual([m['balance'] for m in timeline], ['3800.00', '2600.00', '1440.00', '340.00'])
+        self.assertEqual(
+            [m['cards'][0]['limit_available'] for m in timeline], ['800.00', '900.00', '960.00', '960.00']
+        )
+
+    def test_months_is_validated(self):
+        self.assertEqual(self.client.get('/api/projection/?months=0').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get('/api/projection/?months=abc').status_code, status.HTTP_400_BAD_REQUEST)
+
+
+# ============================================================================
+# 23. EXTRATO DA FATURA (/invoices/{id}/statement/)
+# ============================================================================
+class InvoiceStatementTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='extrato', password='123', first_name='Ana')
+        self.house = House.objects.create(name="Casa Extrato")
+        HouseMember.objects.create(user=self.user, house=self.house, role='MASTER')
+        self.card = CreditCard.objects.create(
+            house=self.house, owner=self.user, name="Visa", limit_total=Decimal('5000'),
+            limit_available=Decimal('5000'), closing_day=5, due_day=10,
+        )
+        self.food = Category.objects.create(house=self.house, name="Mercado", type='EXPENSE')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post('/api/transactions/', {
+            'description': 'Notebook', 'value': '300.00', 'type': 'EXPENSE', 'date': '2025-01-10',
+            'payment_method': 'CREDIT_CARD', 'card': self.card.id, 'installments': 3,
+        }, format='json')
+        self.invoice = Invoice.objects.get(transactions__id=response.data['id'])
+
+    def add_purchases(self, count):
+        for i in range(count):
+            tx = Transaction.objects.create(
+                house=self.house, description=f"Feira {i}", value=Decimal('10'), type='EXPENSE',
+                invoice=self.invoice, category=self.food, date=datetime.date(2025, 1, 20),
+            )
+            TransactionItem.objects.create(transaction=tx, description="Banana", value=Decimal('10'))
+
+    def statement(self, **headers):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/invoices/{self.invoice.id}/statement/', **headers)
+        return response, len(queries)
+
+    def test_statement_has_installments_and_subtotals_in_fixed_queries(self):
+        self.add_purchases(2)
+        response, few = self.statement()
+        self.add_purchases(8)
+        response, many = self.statement()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(few, many)
+
+        data = json.loads(response.content)
+        self.assertEqual(data['invoice']['id'], self.invoice.id)
+        self.assertEqual(data['transactions'][0]['installment'], '1/3')
+        self.assertIsNone(data['transactions'][1]['installment'])
+        self.assertEqual(data['categories'], [
+            {'category': 'Outros', 'total': '100.00', 'count': 1},
+            {'category': 'Mercado', 'total': '100.00', 'count': 10},
+        ])
+        self.assertEqual(data['total'], '200.00')
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+    def test_paid_statement_is_cached_with_strong_etag(self):
+        self.add_purchases(3)
+        Invoice.objects.filter(pk=self.invoice.pk).update(status='PAID', amount_paid=Decimal('130'))
+        first, cold = self.statement()
+        second, warm = self.statement()
+        self.assertEqual(first.content, second.content)
+        self.assertLess(warm, cold)
+        self.assertTrue(first['ETag'].startswith('"'))
+        self.assertEqual(first['Cache-Control'], 'private, no-cache')
+
+        not_modified, _ = self.statement(HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_paid_statement_follows_transaction_edits(self):
+        self.add_purchases(1)
+        Invoice.objects.filter(pk=self.invoice.pk).update(status='PAID', amount_paid=Decimal('110'))
+        first, _ = self.statement()
+
+        tx = Transaction.objects.get(description="Feira 0")
+        tx.description = "Feira do bairro"
+        tx.save()
+        edited, _ = self.statement()
+        self.assertIn("Feira do bairro", json.loads(edited.content)['transactions'][1]['description'])
+        self.assertNotEqual(edited['ETag'], first['ETag'])
+
+        # Em lote (update() sem auto_now): o recategorize também muda a versão
+        tx.category = None
+        tx.save()
+        self.statement()
+        categorization.compiled.clear()  # ids de casa se repetem entre testes no SQLite
+        CategoryRule.objects.create(house=self.house, category=self.food, kind='CONTAINS', pattern='feira')
+        self.house.refresh_from_db()
+        categorization.recategorize_house(self.house)
+        recategorized, _ = self.statement()
+        self.assertEqual(json.loads(recategorized.content)['categories'][1]['category'], 'Mercado')
+
+    def test_paid_statement_follows_category_and_card_renames(self):
+        self.add_purchases(1)
+        Invoice.objects.filter(pk=self.invoice.pk).update(status='PAID', amount_paid=Decimal('110'))
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            first, _ = self.statement()
+        self.assertEqual(cache_set.call_args.args[2], settings.STATEMENT_CACHE_SECONDS)
+
+        self.food.name = "Feira livre"
+        self.food.save()
+        renamed, _ = self.statement()
+        self.assertNotEqual(renamed['ETag'], first['ETag'])
+        self.assertIn("Feira livre", [c['category'] for c in json.loads(renamed.content)['categories']])
+
+        self.card.name = "Master"
+        self.card.save()
+        data = json.loads(self.statement()[0].content)
+        self.assertEqual(data['invoice']['card_name'], "Master")
+
+        self.user.first_name = "Ana Maria"
+        self.user.save()
+        data = json.loads(self.statement()[0].content)
+        self.assertEqual(data['transactions'][0]['owner_name'], "Ana Maria")
+
+    def test_statement_hides_other_members_private_purchases(self):
+        other = User.objects.create_user(username='extrato_b', password='123', first_name='Bia')
+        HouseMember.objects.create(user=other, house=self.house, role='MEMBER')
+        CreditCard.objects.filter(pk=self.card.pk).update(is_shared=False)
+        secret = Transaction.objects.create(
+            house=self.house, description="Segredo", value=Decimal('50'), type='EXPENSE',
+            invoice=Invoice.objects.select_related('card').get(pk=self.invoice.pk), date=datetime.date(2025, 1, 20),
+        )
+        TransactionItem.objects.create(transaction=secret, description="Presente", value=Decimal('50'))
+        Invoice.objects.filter(pk=self.invoice.pk).update(status='PAID', amount_paid=Decimal('150'))
+
+        # O dono vê (e aquece o cache da fatura paga) antes do outro membro pedir
+        owner_view, _ = self.statement()
+        self.assertIn(b'Segredo', owner_view.content)
+
+        self.client.force_authenticate(user=other)
+        response, _ = self.statement()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = json.loads(response.content)
+        # A parcela do notebook foi lançada com o cartão ainda compartilhado
+        self.assertEqual([tx['description'] for tx in data['transactions']], ['Notebook (1/3)'])
+        self.assertEqual(data['total'], '100.00')
+        self.assertNotIn(b'Segredo', response.content)
+        self.assertNotIn(b'Presente', response.content)
+        self.assertNotEqual(response['ETag'], owner_view['ETag'])
+
+
+# ============================================================================
+# 24. LIMITES DAS ROTAS CARAS (core/throttling.py)
+# ============================================================================
+@mock.patch.object(UserScopedThrottle, 'THROTTLE_RATES', {'history': '3/min', 'history_house': '5/min'})
+@mock.patch.object(HouseScopedThrottle, 'THROTTLE_RATES', {'history': '3/min', 'history_house': '5/min'})
+class ThrottlingTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.house = House.objects.create(name="Casa Limites")
+        self.users = []
+        for name in ('um', 'dois'):
+            user = User.objects.create_user(username=f'limite_{name}', password='123')
+            HouseMember.objects.create(user=user, house=self.house, role='MEMBER')
+            self.users.append(user)
+        self.client = APIClient()
+
+    def get_history(self, user):
+        self.client.force_authenticate(user=user)
+        return self.client.get('/api/history/')
+
+    def test_user_rate_per_scope(self):
+        for _ in range(3):
+            self.assertEqual(self.get_history(self.users[0]).status_code, status.HTTP_200_OK)
+        response = self.get_history(self.users[0])
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        # Outras rotas não têm escopo e seguem livres
+        self.assertEqual(self.client.get('/api/accounts/').status_code, status.HTTP_200_OK)
+
+    def test_house_rate_is_shared_by_members(self):
+        for _ in range(3):
+            self.assertEqual(self.get_history(self.users[0]).status_code, status.HTTP_200_OK)
+        for _ in range(2):
+            self.assertEqual(self.get_history(self.users[1]).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_history(self.users[1]).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+class ConcurrencyLimitTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='vagas', password='123')
+        house = House.objects.create(name="Casa Vagas")
+        HouseMember.objects.create(user=self.user, house=house, role='MASTER')
+        Token.objects.create(user=self.user)
+        self.slots = Slots(1)
+        patcher = mock.patch('core.throttling.Slots', return_value=self.slots)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_heavy_request_without_slot_gets_429(self):
+        self.assertTrue(self.slots.acquire())  # outra requisição pesada em andamento
+        response = self.client.get('/api/history/')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], str(settings.HEAVY_REQUESTS_RETRY_AFTER))
+        # Rotas leves não disputam vaga
+        self.assertEqual(self.client.get('/api/accounts/').status_code, status.HTTP_200_OK)
+
+        self.slots.release()
+        self.assertEqual(self.client.get('/api/history/').status_code, status.HTTP_200_OK)
+        self.assertTrue(self.slots.acquire())  # a vaga foi devolvida
+
+    def test_slot_held_until_stream_is_consumed(self):
+        response = self.client.get('/api/archive/transactions/?year=2019')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(self.slots.acquire())
+        b''.join(response.streaming_content)
+        self.assertTrue(self.slots.acquire())
+
+    def test_disabled_with_zero_slots(self):
+        with self.settings(HEAVY_REQUESTS_PER_WORKER=0):
+            with self.assertRaises(MiddlewareNotUsed):
+                ConcurrencyLimitMiddleware(lambda request: None)
+
+
+# ============================================================================
+# 25. IDEMPOTENCY-KEY NOS POSTS DE DINHEIRO (core/idempotency.py)
+# ============================================================================
+class IdempotencyTestCase(TestCase):
+    def setUp(self):
+        idempotency.recent.clear()
+        self.user = User.objects.create_user(username='idem', password='123')
+        self.house = House.objects.create(name="Casa Idem")
+        HouseMember.objects.create(user=self.user, house=self.house, role='MASTER')
+        self.account = Account.objects.create(house=self.house, owner=self.user, name="Conta", balance=Decimal('100'))
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.payload = {
+            'description': 'Padaria', 'value': '30.00', 'type': 'EXPENSE', 'date': '2025-01-10',
+            'payment_method': 'ACCOUNT', 'account': self.account.id,
+        }
+
+    def post(self, path, payload, key='chave-1'):
+        return self.client.post(path, payload, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def balance(self):
+        self.account.refresh_from_db()
+        return self.account.balance
+
+    def test_retry_replays_response_without_touching_ledger(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.post('/api/transactions/', self.payload)
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        balance = self.balance()
+
+        # Da memória do processo, sem nenhuma query
+        with self.assertNumQueries(0):
+            cached = self.post('/api/transactions/', self.payload)
+        # Da tabela (outro processo, ou cache vazio)
+        idempotency.recent.clear()
+        stored = self.post('/api/transactions/', self.payload)
+
+        for response in (cached, stored):
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(response['Idempotent-Replayed'], 'true')
+            self.assertEqual(response.json(), first.json())
+        self.assertEqual(Transaction.objects.filter(house=self.house).count(), 1)
+        self.assertEqual(self.balance(), balance)
+
+    def test_same_key_with_other_body_is_rejected(self):
+        self.post('/api/transactions/', self.payload)
+        response = self.post('/api/transactions/', {**self.payload, 'value': '31.00'})
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Transaction.objects.filter(house=self.house).count(), 1)
+
+    def test_errors_are_not_stored(self):
+        payload = {**self.payload, 'value': '500.00'}
+        self.assertEqual(self.post('/api/transactions/', payload).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        Account.objects.filter(pk=self.account.pk).update(balance=Decimal('1000'))
+        self.assertEqual(self.post('/api/transactions/', payload).status_code, status.HTTP_201_CREATED)
+
+    def test_invoice_pay_is_idempotent(self):
+        card = CreditCard.objects.create(
+            house=self.house, owner=self.user, name="Visa", limit_total=Decimal('1000'),
+            limit_available=Decimal('800'), closing_day=5, due_day=10,
+        )
+        invoice = Invoice.objects.create(card=card, reference_date=datetime.date(2025, 1, 1), value=Decimal('200'))
+        payload = {'account_id': self.account.id, 'value': '50.00', 'date': '2025-01-10'}
+        for _ in range(2):
+            response = self.post(f'/api/invoices/{invoice.id}/pay/', payload)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.amount_paid, Decimal('50.00'))
+
+    def test_batch_operations_do_not_share_the_key(self):
+        response = self.post('/api/batch/', {'operations': [
+            {'method': 'POST', 'path': '/api/transactions/', 'body': self.payload},
+            {'method': 'POST', 'path': '/api/transactions/', 'body': {**self.payload, 'description': 'Feira'}},
+        ]})
+        self.assertTrue(response.data['committed'])
+        self.assertEqual(Transaction.objects.filter(house=self.house).count(), 2)
+
+    def test_expired_keys_are_purged_and_reusable(self):
+        self.post('/api/transactions/', self.payload)
+        IdempotencyKey.objects.update(expires_at=timezone.now() - datetime.timedelta(minutes=1))
+        idempotency.recent.clear()
+        self.assertEqual(self.post('/api/transactions/', self.payload).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Transaction.objects.filter(house=self.house).count(), 2)
+
+        IdempotencyKey.objects.update(expires_at=timezone.now() - datetime.timedelta(minutes=1))
+        call_command('expire_idempotency_keys', stdout=io.StringIO())
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+# ============================================================================
+# 26. CADASTRO COM E SEM CONVITE (RegisterView)
+# ============================================================================
+class InviteAwareRegistrationTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.payload = {'username': 'novata', 'first_name': 'Nina', 'email': 'nina@domo.com', 'password': 'senha-forte-123'}
+
+    def register(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/register/', self.payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return User.objects.get(username='novata'), [q['sql'] for q in queries]
+
+    def test_without_invite_creates_own_house_as_master(self):
+        user, queries = self.register()
+        self.assertEqual(user.house_member.house.name, 'Casa de novata')
+        self.assertEqual(user.house_member.role, 'MASTER')
+        # Sem casa descartável (DELETE) nem a contagem do signal de MASTER
+        self.assertFalse(any(sql.startswith('DELETE') or 'COUNT(' in sql for sql in queries))
+
+    def test_with_invite_joins_house_without_throwaway(self):
+        owner = User.objects.create_user(username='dona', password='123')
+        house = House.objects.create(name="Casa Convite")
+        HouseMember.objects.create(user=owner, house=house, role='MASTER')
+        HouseInvitation.objects.create(house=house, inviter=owner, email='nina@domo.com')
+
+        user, queries = self.register()
+        self.assertEqual(user.house_member.house, house)
+        self.assertEqual(user.house_member.role, 'MEMBER')
+        self.assertEqual(House.objects.count(), 1)
+        self.assertFalse(HouseInvitation.objects.exists())
+        self.assertFalse(any('INSERT INTO "core_house"' in sql for sql in queries))
+
+
+# ============================================================================
+# 27. ADMIN DAS TABELAS GRANDES (core/admin.py, core/pagination.py)
+# ============================================================================
+class LargeTableAdminTestCase(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='root', password='123', email='root@domo.com')
+        self.house = House.objects.create(name="Casa Admin")
+        HouseMember.objects.create(user=self.admin, house=self.house, role='MASTER')
+        self.category = Category.objects.create(house=self.house, name="Mercado", type='EXPENSE')
+        self.client.force_login(self.admin)
+
+    def add_transactions(self, count):
+        for i in range(count):
+            tx = Transaction.objects.create(
+                house=self.house, description=f"Compra {i}", value=Decimal('10'), type='EXPENSE',
+                category=self.category, owner=self.admin,
+            )
+            TransactionItem.objects.create(transaction=tx, description="Arroz", value=Decimal('10'))
+
+    def changelist(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelists_do_not_query_per_row(self):
+        for path in ('/admin/core/transaction/', '/admin/core/transactionitem/', f'/admin/core/transaction/?house={self.house.id}'):
+            self.add_transactions(2)
+            few = self.changelist(path)
+            self.add_transactions(8)
+            self.assertEqual(self.changelist(path), few)
+
+    def test_paginator_uses_estimate_above_threshold(self):
+        self.add_transactions(3)
+        queryset = Transaction.objects.order_by('-id')
+        with mock.patch('core.pagination.estimated_rows', return_value=250000), \
+                mock.patch.object(connection, 'vendor', 'postgresql'), \
+                self.assertNumQueries(0):
+            self.assertEqual(EstimatedCountPaginator(queryset, 100).count, 250000)
+        # Estimativa pequena (ou outro banco): COUNT exato
+        with mock.patch('core.pagination.estimated_rows', return_value=10), \
+                mock.patch.object(connection, 'vendor', 'postgresql'):
+            self.assertEqual(EstimatedCountPaginator(queryset, 100).count, 3)
+        self.assertEqual(EstimatedCountPaginator(queryset, 100).count, 3)
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'estatísticas do PostgreSQL')
+    def test_postgres_estimates(self):
+        from .pagination import estimated_rows
+        self.add_transactions(3)
+        self.assertGreaterEqual(estimated_rows(Transaction.objects.all()), 0)
+        self.assertGreaterEqual(estimated_rows(Transaction.objects.filter(house=self.house)), 1)
+
+
+# ============================================================================
+# 28. REGRAS DE CATEGORIZAÇÃO (core/categorization.py)
+# ============================================================================
+class CategorizationRulesTestCase(TestCase):
+    def setUp(self):
+        categorization.compiled.clear()
+        self.user = User.objects.create_user(username='regras', password='123')
+        self.house = House.objects.create(name="Casa Regras")
+        HouseMember.objects.create(user=self.user, house=self.house, role='MASTER')
+        self.account = Account.objects.create(house=self.house, owner=self.user, name="Conta", balance=Decimal('5000'))
+        self.food = Category.objects.create(house=self.house, name="Mercado", type='EXPENSE')
+        self.transport = Category.objects.create(house=self.house, name="Transporte", type='EXPENSE')
+        self.big = Category.objects.create(house=self.house, name="Grandes", type='EXPENSE')
+        self.salary = Category.objects.create(house=self.house, name="Salário", type='INCOME')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def rule(self, category, kind, pattern='', priority=100, **extra):
+        response = self.client.post('/api/category-rules/', {
+            'category': category.id, 'kind': kind, 'pattern': pattern, 'priority': priority, **extra,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+
+    def fresh_house(self):
+        return House.objects.get(pk=self.house.pk)
+
+    def test_matcher_priority_kinds_amount_and_type(self):
+        self.rule(self.big, 'CONTAINS', '', priority=1, min_value='1000.00')
+        self.rule(self.food, 'CONTAINS', 'mercado', priority=5)
+        self.rule(self.transport, 'PREFIX', 'uber', priority=5)
+        self.rule(self.transport, 'REGEX', r'\b(99|taxi)\b', priority=6, max_value='200.00')
+        self.rule(self.salary, 'PREFIX', 'uber', priority=7)
+
+        house = self.fresh_house()
+        cases = [
+            ('Compra no MERCADO Azul', '50.00', 'EXPENSE', self.food.id),
+            ('Uber *viagem', '30.00', 'EXPENSE', self.transport.id),
+            ('Pagamento uber', '30.00', 'EXPENSE', None),          # prefixo não casa no meio
+            ('corrida 99 pop', '45.00', 'EXPENSE', self.transport.id),
+            ('taxi aeroporto', '250.00', 'EXPENSE', None),         # acima da faixa
+            ('Notebook mercado', '3000.00', 'EXPENSE', self.big.id),  # prioridade 1 vence
+            ('Uber repasse', '30.00', 'INCOME', self.salary.id),   # tipo da categoria
+        ]
+        for description, value, transaction_type, expected in cases:
+            with self.subTest(description):
+                self.assertEqual(categorization.categorize(house, description, Decimal(value), transaction_type), expected)
+
+    def test_invalid_patterns_are_rejected(self):
+        for kind, pattern in (('REGEX', '(abc'), ('REGEX', '*abc'), ('CONTAINS', '')):
+            response = self.client.post('/api/category-rules/', {
+                'category': self.food.id, 'kind': kind, 'pattern': pattern,
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        other = Category.objects.create(house=House.objects.create(name="Outra"), name="X", type='EXPENSE')
+        response = self.client.post('/api/category-rules/', {'category': other.id, 'pattern': 'x'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_regex_with_catastrophic_backtracking_is_refused(self):
+        for pattern in ('(a+)+$', '(a|aa)*$', r'(\w)\1', '(?=a)b', 'a*a*a*b'):
+            with self.subTest(pattern):
+                response = self.client.post('/api/category-rules/', {
+                    'category': self.food.id, 'kind': 'REGEX', 'pattern': pattern,
+                }, format='json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.rule(self.food, 'REGEX', r'^posto (shell|ipiranga)\b.*\d+$')
+
+        # Gravada direto no banco: o matcher ignora a regra em vez de travar o processo
+        CategoryRule.objects.create(house=self.house, category=self.food, kind='REGEX', pattern='(a+)+$', priority=1)
+        matcher = categorization.matcher_for(self.fresh_house())
+        self.assertEqual(len(matcher.rules), 1)
+        self.assertIsNone(matcher.match('a' * 40 + '!', 100, 'EXPENSE'))
+        self.assertEqual(matcher.match('Posto Shell 123', 100, 'EXPENSE'), self.food.id)
+
+    def test_compiled_rules_are_cached_per_version(self):
+        self.assertEqual(self.fresh_house().rules_version, 0)
+        with self.assertNumQueries(0):
+            self.assertIsNone(categorization.categorize(self.house, 'mercado', Decimal('1'), 'EXPENSE'))
+
+        self.rule(self.food, 'CONTAINS', 'feira')
+        house = self.fresh_house()
+        categorization.categorize(house, 'feira', Decimal('1'), 'EXPENSE')
+        with self.assertNumQueries(0):
+            self.assertEqual(categorization.categorize(house, 'feira', Decimal('1'), 'EXPENSE'), self.food.id)
+
+        # Mudar a categoria sobe a versão: a regra passa a exigir receita
+        self.food.type = 'INCOME'
+        self.food.save()
+        house = self.fresh_house()
+        self.assertIsNone(categorization.categorize(house, 'feira', Decimal('1'), 'EXPENSE'))
+        self.food.delete()
+        self.assertIsNone(categorization.categorize(self.fresh_house(), 'feira', Decimal('1'), 'INCOME'))
+
+    def test_rules_apply_on_create_unless_category_given(self):
+        self.rule(self.food, 'CONTAINS', 'mercado')
+        self.client.force_authenticate(user=User.objects.get(pk=self.user.pk))  # casa com a versão nova
+        payload = {
+            'description': 'Mercado do bairro', 'value': '80.00', 'type': 'EXPENSE', 'date': '2025-01-10',
+            'payment_method': 'ACCOUNT', 'account': self.account.id,
+        }
+        response = self.client.post('/api/transactions/', payload, format='json')
+        self.assertEqual(response.data['category'], self.food.id)
+        response = self.client.post('/api/transactions/', {**payload, 'category': self.big.id}, format='json')
+        self.assertEqual(response.data['category'], self.big.id)
+
+    def test_recategorize_command_updates_in_batches(self):
+        for i in range(7):
+            Transaction.objects.create(
+                house=self.house, description=f"Uber {i}" if i % 2 else f"Mercado {i}",
+                value=Decimal('10'), type='EXPENSE',
+            )
+        Transaction.objects.create(house=self.house, description="Aluguel", value=Decimal('900'), type='EXPENSE')
+        kept = Transaction.objects.create(
+            house=self.house, description="Mercado fixo", value=Decimal('10'), type='EXPENSE', category=self.big,
+        )
+        self.rule(self.food, 'PREFIX', 'mercado')
+        self.rule(self.transport, 'PREFIX', 'uber')
+
+        out = io.StringIO()
+        call_command('recategorize', '--batch-size', '3', stdout=out)
+        self.assertIn('7 transações categorizadas', out.getvalue())
+        counts = dict(
+            Transaction.objects.filter(house=self.house).values_list('category__name').annotate(n=Count('id'))
+        )
+        self.assertEqual(counts, {'Mercado': 4, 'Transporte': 3, None: 1, 'Grandes': 1})
+        kept.refresh_from_db()
+        self.assertEqual(kept.category, self.big)
+
+
+# ============================================================================
+# 29. LOG DE QUERIES LENTAS (core/slow_queries.py, slow_query_report)
+# ============================================================================
+class SlowQueryLogTestCase(TestCase):
+    def setUp(self):
+        self.house = House.objects.create(name="Casa Lenta")
+        self.user = User.objects.create_user(username='lento', password='123')
+        HouseMember.objects.create(user=self.user, house=self.house, role='MASTER')
+        Transaction.objects.create(house=self.house, description="Padaria", value=Decimal('12'), type='EXPENSE')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        # O handler rotativo do settings aponta para o arquivo real: troca por um temporário
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'slow_queries.jsonl')
+        handler = logging.FileHandler(self.path, encoding='utf-8', delay=True)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        self.addCleanup(handler.close)
+        patcher = mock.patch.object(logging.getLogger('core.slow_queries'), 'handlers', [handler])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def entries(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, encoding='utf-8') as fh:
+            return [json.loads(line) for line in fh]
+
+    def test_threshold_filters_what_gets_logged(self):
+        with self.settings(SLOW_QUERY_THRESHOLD_MS=60000):
+            self.client.get('/api/transactions/')
+        self.assertEqual(self.entries(), [])
+
+        with self.settings(SLOW_QUERY_THRESHOLD_MS=0):
+            self.client.get('/api/transactions/')
+        self.assertTrue(self.entries())
+
+    def test_entry_has_params_route_and_house(self):
+        with self.settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_EXPLAIN_SAMPLE_RATE=1):
+            self.client.get('/api/transactions/')
+
+        listing = [
+            entry for entry in self.entries()
+            if 'core_transaction' in entry['sql'] and entry['sql'].lstrip().upper().startswith('SELECT')
+        ]
+        self.assertTrue(listing)
+        entry = listing[0]
+        self.assertIn(self.house.id, entry['params'])
+        self.assertTrue(entry['route'].startswith('GET api/transactions/'), entry['route'])
+        self.assertEqual(entry['house_id'], self.house.id)
+        self.assertEqual(entry['fingerprint'], slow_queries.fingerprint_id(entry['normalized']))
+        # EXPLAIN só no PostgreSQL, mesmo com amostragem total
+        self.assertEqual('explain' in entry, connection.vendor == 'postgresql')
+
+    def test_explain_sampling_switch(self):
+        postgres = mock.Mock(vendor='postgresql')
+        with self.settings(SLOW_QUERY_EXPLAIN_SAMPLE_RATE=1):
+            wrapper = slow_queries.SlowQueryLogger()
+        self.assertTrue(wrapper._should_explain('SELECT 1', False, postgres))
+        self.assertFalse(wrapper._should_explain('UPDATE t SET a = 1', False, postgres))
+        self.assertFalse(wrapper._should_explain('SELECT 1', True, postgres))
+        self.assertFalse(wrapper._should_explain('SELECT 1', False, mock.Mock(vendor='sqlite')))
+
+        with self.settings(SLOW_QUERY_EXPLAIN_SAMPLE_RATE=0):
+            wrapper = slow_queries.SlowQueryLogger()
+        self.assertFalse(wrapper._should_explain('SELECT 1', False, postgres))
+
+    def test_fingerprint_groups_queries_with_different_literals(self):
+        fp = slow_queries.fingerprint
+        self.assertEqual(
+            fp("SELECT * FROM t WHERE id = 1 AND name = 'ana'"),
+            fp("SELECT *  FROM t\nWHERE id = 22 AND name = 'o''brien'"),
+        )
+        self.assertEqual(fp("SELECT * FROM t WHERE id IN (%s, %s, %s)"), "SELECT * FROM t WHERE id IN (...)")
+        self.assertNotEqual(fp("SELECT * FROM t WHERE id = 1"), fp("SELECT * FROM u WHERE id = 1"))
+
+    def test_report_groups_by_fingerprint(self):
+        with self.settings(SLOW_QUERY_THRESHOLD_MS=0):
+            self.client.get('/api/transactions/')
+            self.client.get('/api/transactions/')
+        entries = self.entries()
+        counts = {}
+        for entry in entries:
+            counts[entry['fingerprint']] = counts.get(entry['fingerprint'], 0) + 1
+        worst = max(counts, key=counts.get)
+
+        out = io.StringIO()
+        call_command('slow_query_report', '--file', self.path, '--order', 'count', '--limit', '1', stdout=out)
+        report = out.getvalue()
+        self.assertIn(f"[{worst}] {counts[worst]}x", report)
+        self.assertIn('GET api/transactions/', report)
+        self.assertEqual(report.count('rotas:'), 1)
+
+        out = io.StringIO()
+        call_command('slow_query_report', '--file', self.path, '--route', 'nada', stdout=out)
+        self.assertIn('Nenhuma query lenta no período.', out.getvalue())
+
+
+# ============================================================================
+# 30. PERFIS SOB DEMANDA (ProfilingMiddleware, core/profiling.py)
+# ============================================================================
+class ProfilingTestCase(TestCase):
+    def setUp(self):
+        self.house = House.objects.create(name="Casa Perfil")
+        self.user = User.objects.create_user(username='perfil', password='123')
+        HouseMember.objects.create(user=self.user, house=self.house, role='MASTER')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = directory.name
+
+    def get(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}")
+        with self.settings(PROFILING_DIR=self.dir):
+            return client.get('/api/transactions/', HTTP_X_PROFILE='1')
+
+    def test_non_staff_is_not_profiled(self):
+        response = self.get(self.user)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(os.listdir(self.dir), [])
+
+    def test_staff_gets_prof_and_folded_files(self):
+        self.user.is_staff = True
+        self.user.save()
+        response = self.get(self.user)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        name = response['X-Profile-Id']
+        self.assertEqual(sorted(os.listdir(self.dir)), [f"{name}.folded", f"{name}.prof"])
+        with open(os.path.join(self.dir, f"{name}.folded"), encoding='utf-8') as fh:
+            self.assertRegex(fh.readline(), r'.+ \d+$')
+
+    def test_disabled_middleware_is_not_loaded(self):
+        with self.settings(PROFILING_ENABLED=False):
+            with self.assertRaises(MiddlewareNotUsed):
+                ProfilingMiddleware(lambda request: None)
+
+    def test_eviction_keeps_directory_under_limit(self):
+        for i, name in enumerate(['a.prof', 'a.folded', 'b.prof', 'b.folded', 'notas.txt']):
+            path = os.path.join(self.dir, name)
+            with open(path, 'w') as fh:
+                fh.write('x' * 100)
+            os.utime(path, (1000 + i, 1000 + i))  # a* mais antigos
+
+        profiling.evict(self.dir, 250)
+        # Só os perfis contam para o limite; os mais antigos saem primeiro
+        self.assertEqual(sorted(os.listdir(self.dir)), ['b.folded', 'b.prof', 'notas.txt'])
+        profiling.evict(self.dir, 0)
+        self.assertEqual(os.listdir(self.dir), ['notas.txt'])
@@ -0,0 +1,70 @@
+"""
+Limites para as rotas caras.
+
+1. Taxa (throttles do DRF, contadores no cache do Django): a view declara
+   throttle_scope e REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] define
+   '<escopo>' (por usuário) e '<escopo>_house' (somando todos os membros da
+   casa). Escopo sem taxa configurada não é limitado.
+
+2. Concorrência (ConcurrencyLimitMiddleware): views marcadas com
+   heavy_request = True (ou @heavy_request) disputam HEAVY_REQUESTS_PER_WORKER
+   vagas por processo. Sem vaga, a resposta é 429 com Retry-After na hora, em
+   vez de a requisição esperar na fila ocupando a thread.
+"""
+import threading
+
+from rest_framework.throttling import ScopedRateThrottle
+
+
+class UserScopedThrottle(ScopedRateThrottle):
+    """ScopedRateThrottle que ignora escopos sem taxa em vez de falhar."""
+    rate_suffix = ''
+
+    def allow_request(self, request, view):
+        scope = getattr(view, self.scope_attr, None)
+        if not scope or scope + self.rate_suffix not in self.THROTTLE_RATES:
+            return True
+        self.scope = scope
+        self.rate = self.THROTTLE_RATES[scope + self.rate_suffix]
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        # Pula o allow_request do ScopedRateThrottle (que exige a taxa)
+        return super(ScopedRateThrottle, self).allow_request(request, view)
+
+
+class HouseScopedThrottle(UserScopedThrottle):
+    """Mesmo escopo, mas o contador é da casa: vários membros dividem a taxa."""
+    rate_suffix = '_house'
+
+    def get_cache_key(self, request, view):
+        member = getattr(request.user, 'house_member', None) if request.user.is_authenticated else None
+        if member is None:
+            return None
+        return self.cache_format % {'scope': self.scope + self.rate_suffix, 'ident': member.house_id}
+
+
+# --- CONCORRÊNCIA POR PROCESSO ---
+
+def heavy_request(view):
+    """Marca uma view (função ou ação de ViewSet) como pesada."""
+    view.heavy_request = True
+    return view
+
+
+def is_heavy(view_func, method):
+    view = getattr(view_func, 'cls', view_func)  # ViewSets do DRF guardam a classe em .cls
+    actions = getattr(view_func, 'actions', None) or {}
+    handler = getattr(view, actions.get(method.lower(), ''), None)
+    return getattr(handler, 'heavy_request', False) or getattr(view, 'heavy_request', False)
+
+
+class Slots:
+    """Vagas sem fila: acquire() devolve False na hora quando acabaram."""
+
+    def __init__(self, size):
+        self._semaphore = threading.BoundedSemaphore(size)
+
+    def acquire(self):
+        return self._semaphore.acquire(blocking=False)
+
+    def release(self):
+        self._semaphore.release()
@@ -1,12 +1,14 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from . import async_views
 from .views import (
     # ViewSets do Router
-    HouseViewSet, HouseMemberViewSet, CategoryViewSet, 
+    HouseViewSet, HouseMemberViewSet, CategoryViewSet, CategoryRuleViewSet,
     TransactionViewSet, AccountViewSet, RecurringBillViewSet, 
     CreditCardViewSet, InvoiceViewSet, InvitationViewSet,
     AuthViewSet, HistoryViewSet, ProductViewSet, InventoryViewSet, 
-    ShoppingListViewSet, CurrentUserView,
+    ShoppingListViewSet, CurrentUserView, BatchView, SyncView,
+    ArchivedTransactionsView, ProjectionViewSet, house_events,
     
     # Views soltas (Login/Registro)
     CustomAuthToken, RegisterView
@@ -17,6 +19,7 @@ router = DefaultRouter()
 router.register(r'houses', HouseViewSet)
 router.register(r'members', HouseMemberViewSet)
 router.register(r'categories', CategoryViewSet)
+router.register(r'category-rules', CategoryRuleViewSet)
 router.register(r'transactions', TransactionViewSet)
 router.register(r'accounts', AccountViewSet)
 router.register(r'recurring-bills', RecurringBillViewSet)
@@ -24,6 +27,7 @@ router.register(r'credit-cards', CreditCardViewSet)
 router.register(r'invoices', InvoiceViewSet)
 # router.register(r'invitations', InvitationViewSet) # Removido pois usamos rotas manuais abaixo
 router.register(r'history', HistoryViewSet, basename='history')
+router.register(r'projection', ProjectionViewSet, basename='projection')
 router.register(r'products', ProductViewSet)
 router.register(r'inventory', InventoryViewSet)
 router.register(r'shopping-list', ShoppingListViewSet)
@@ -45,4 +49,13 @@ urlpatterns = [
     # 3. Inclui as rotas do Router
     path('', include(router.urls)),
     path('me/', CurrentUserView.as_view(), name='current-user'),
+    path('batch/', BatchView.as_view(), name='batch'),
+    path('sync/', SyncView.as_view(), name='sync'),
+    path('archive/transactions/', ArchivedTransactionsView.as_view(), name='archived-transactions'),
+    path('events/', house_events, name='house-events'),
+
+    # Leituras assíncronas (ASGI), ver core/async_views.py
+    path('async/history/', async_views.history, name='async-history'),
+    path('async/transactions/', async_views.transactions, name='async-transactions'),
+    path('async/dashboard/', async_views.dashboard, name='async-dashboard'),
 ]
\ No newline at end of file
@@ -1,12 +1,22 @@
+import asyncio
+import io
+import json
 import sys
+import uuid
+from urllib.parse import urlsplit
 from django.shortcuts import get_object_or_404
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from django.urls import resolve, Resolver404
+from django.core.handlers.wsgi import WSGIRequest
 from django.db import models, transaction as db_transaction, IntegrityError
-from django.db.models import Q, F, Sum
+from django.db.models import Q, F, Sum, Prefetch, Case, When, Value
+from django.db.models.functions import Greatest
 from django.db.models.functions import TruncMonth
 from django.conf import settings
 from django.core.mail import send_mail
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
-from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
+from django.utils.http import parse_etags, urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
@@ -18,6 +28,8 @@ from dateutil.relativedelta import relativedelta
 from rest_framework import viewsets, permissions, status, generics
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError as DRFValidationError
+from rest_framework.fields import BooleanField
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.authtoken.views import ObtainAuthToken
@@ -27,15 +39,23 @@ from rest_framework.authtoken.models import Token
 from .models import (
     House, HouseMember, Account, CreditCard, Invoice, 
     Transaction, Product, InventoryItem, ShoppingList, 
-    RecurringBill, Category, TransactionItem, HouseInvitation
+    RecurringBill, Category, CategoryRule, TransactionItem, HouseInvitation, ChangeLogEntry, MonthlyRollup
 )
+from . import archive, categorization, events, projection, purge, statements
+from .changelog import DELETE, record_changes
+from .fastpath import FastListMixin
+from .idempotency import idempotent
+from .money import cents, cents_to_float, split_installments
+from .search import search_transactions
+from .throttling import heavy_request
 from .serializers import (
     HouseSerializer, HouseMemberSerializer, AccountSerializer, 
     CreditCardSerializer, InvoiceSerializer, TransactionSerializer, 
     ProductSerializer, InventoryItemSerializer, ShoppingListSerializer, 
-    RecurringBillSerializer, CategorySerializer, TransactionItemSerializer, 
+    RecurringBillSerializer, CategorySerializer, CategoryRuleSerializer, TransactionItemSerializer, 
     HouseInvitationSerializer, PasswordResetRequestSerializer, PasswordResetConfirmSerializer,
-    ChangePasswordSerializer, ChangeEmailSerializer, UserSerializer
+    ChangePasswordSerializer, ChangeEmailSerializer, UserSerializer,
+    InventoryBulkItemSerializer, ShoppingListBulkItemSerializer
 )
 
 User = get_user_model()
@@ -75,6 +95,87 @@ class BaseHouseViewSet(viewsets.ModelViewSet):
             else:
                 serializer.save(house=house)
 
+class BulkUpdateMixin:
+    """
+    PATCH .../bulk/ com [{id, campo: valor, campo_delta: +n}, ...].
+    Custo constante: 1 SELECT para validar os ids na casa, 1 bulk_update para
+    os valores absolutos, 1 UPDATE com F() para os deltas e 1 SELECT de retorno.
+    """
+    bulk_serializer_class = None
+    bulk_select_related = ()
+
+    @action(detail=False, methods=['patch'], url_path='bulk')
+    def bulk(self, request):
+        user = request.user
+        if not hasattr(user, 'house_member'):
+            return Response({'error': 'Usuário sem casa.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = request.data if isinstance(request.data, list) else request.data.get('items')
+        if not isinstance(rows, list) or not rows:
+            return Response({'error': 'Envie uma lista de itens.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > settings.BULK_UPDATE_MAX_ITEMS:
+            return Response(
+                {'error': f'Máximo de {settings.BULK_UPDATE_MAX_ITEMS} itens por lote.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = self.bulk_serializer_class(data=rows, many=True)
+        serializer.is_valid(raise_exception=True)
+        changes = serializer.validated_data
+
+        ids = [change['id'] for change in changes]
+        if len(set(ids)) != len(ids):
+            return Response({'error': 'IDs repetidos no lote.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        model = self.queryset.model
+        delta_fields = self.bulk_serializer_class.delta_fields
+
+        with db_transaction.atomic():
+            objects = model.objects.select_for_update().filter(
+                house_id=user.house_member.house_id, id__in=ids
+            ).in_bulk()
+            missing = [pk for pk in ids if pk not in objects]
+            if missing:
+                return Response({'error': 'Itens não encontrados.', 'ids': missing}, status=status.HTTP_404_NOT_FOUND)
+
+            changed = []
+            fields = set()
+            deltas = {}  # campo -> {id: delta}
+            for change in changes:
+                obj = objects[change['id']]
+                touched = False
+                for name, value in change.items():
+                    if name == 'id':
+                        continue
+                    if name in delta_fields:
+                        deltas.setdefault(delta_fields[name], {})[obj.id] = value
+                    else:
+                        setattr(obj, name, value)
+                        fields.add(name)
+                        touched = True
+                if touched:
+                    changed.append(obj)
+
+            if changed:
+                model.objects.bulk_update(changed, sorted(fields))
+
+            for field, per_id in deltas.items():
+                model_field = model._meta.get_field(field)
+                increment = Case(
+                    *[When(pk=pk, then=Value(delta, output_field=model_field)) for pk, delta in per_id.items()],
+                    output_field=model_field,
+                )
+                # Quantidade nunca fica negativa
+                model.objects.filter(pk__in=per_id).update(
+                    **{field: Greatest(F(field) + increment, Value(0, output_field=model_field))}
+                )
+
+            # bulk_update/update não disparam signals
+            record_changes(model, user.house_member.house_id, ids)
+
+        updated = model.objects.filter(pk__in=ids).select_related(*self.bulk_select_related).order_by('pk')
+        return Response(self.get_serializer(updated, many=True).data)
+
 # ======================================================================
 # CASA E MEMBROS
 # ======================================================================
@@ -87,7 +188,7 @@ class HouseViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         if self.request.user.is_anonymous:
             return House.objects.none()
-        return House.objects.filter(members__user=self.request.user)
+        return House.objects.filter(members__user=self.request.user, deletion_requested_at__isnull=True)
 
     def perform_create(self, serializer):
         # 1. Salva a casa
@@ -112,10 +213,11 @@ class HouseViewSet(viewsets.ModelViewSet):
         except HouseMember.DoesNotExist:
             return Response({'error': 'Membro não encontrado.'}, status=status.HTTP_403_FORBIDDEN)
 
-        house.delete() # Cascade deleta tudo da casa
-        user.delete()  # Deleta o usuário Master
+        # A casa some na hora para todos; os dados (e o usuário Master) são
+        # apagados em segundo plano, em lotes (core/purge.py)
+        purge.request_deletion(house, user)
 
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response(status=status.HTTP_202_ACCEPTED)
 
     @action(detail=True, methods=['post'])
     def leave(self, request, pk=None):
@@ -133,13 +235,24 @@ class HouseViewSet(viewsets.ModelViewSet):
         # Preservar transações (Anônimas)
         user_accounts = Account.objects.filter(owner=user, house=house)
         user_cards = CreditCard.objects.filter(owner=user, house=house)
-        Transaction.objects.filter(account__in=user_accounts).update(account=None)
+        from_accounts = list(Transaction.objects.filter(account__in=user_accounts).values_list('id', flat=True))
+        Transaction.objects.filter(id__in=from_accounts).update(account=None, owner=None)
         
         user_invoices = Invoice.objects.filter(card__in=user_cards)
-        Transaction.objects.filter(invoice__in=user_invoices).update(invoice=None)
-
-        user_accounts.delete()
-        user_cards.delete()
+        from_cards = list(Transaction.objects.filter(
+            Q(invoice__in=user_invoices) | Q(credit_card__in=user_cards)
+        ).values_list('id', flat=True))
+        Transaction.objects.filter(id__in=from_cards).update(invoice=None, credit_card=None, owner=None)
+        record_changes(Transaction, house.id, from_accounts + from_cards)
+
+        # Faturas, cartões e contas do membro: DELETE por conjunto, sem o
+        # coletor do Django carregar cada linha (as transações já foram soltas)
+        for model, queryset in (
+            (Invoice, user_invoices), (CreditCard, user_cards), (Account, user_accounts),
+        ):
+            ids = list(queryset.values_list('id', flat=True))
+            purge.delete_in_batches(model.objects.filter(id__in=ids))
+            record_changes(model, house.id, ids, DELETE)
         member.delete()
 
         return Response({'status': 'Você saiu da casa com sucesso.'})
@@ -167,13 +280,117 @@ class HouseMemberViewSet(BaseHouseViewSet):
 class CategoryViewSet(BaseHouseViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    replica_reads = True
+
+class CategoryRuleViewSet(BaseHouseViewSet):
+    """Regras de categorização automática da casa (ver core/categorization.py)."""
+    queryset = CategoryRule.objects.all()
+    serializer_class = CategoryRuleSerializer
+
+    def get_queryset(self):
+        return super().get_queryset().order_by('priority', 'id')
 
 # ======================================================================
 # HISTÓRICO E ANÁLISE
 # ======================================================================
 
+def history_start_date():
+    """Primeiro dia do mês de 11 meses atrás: o /history/ cobre 12 meses."""
+    return (datetime.date.today() - relativedelta(months=11)).replace(day=1)
+
+
+def history_transactions(house_id):
+    """Transações dos últimos 12 meses (como dicts, valor em centavos), base do /history/."""
+    return Transaction.objects.filter(
+        house_id=house_id,
+        date__gte=history_start_date()
+    ).annotate(month=TruncMonth('date'), value_cents=cents('value')).values(
+        'month', 'type', 'value_cents', 'category__name', 'description', 'date', 'id'
+    ).order_by('-month')
+
+
+def history_rollups(house_id):
+    """
+    Totais dos meses arquivados dentro da janela do /history/ (core/archive.py).
+    É a 3ª query do /history/ (com as transações e a soma das contas fixas),
+    já contada em core/benchmark_baseline.json.
+    """
+    return MonthlyRollup.objects.filter(
+        house_id=house_id,
+        month__gte=history_start_date()
+    ).annotate(total_cents=cents('total')).values('month', 'type', 'category__name', 'category_name', 'total_cents')
+
+
+def build_history(transactions, estimated_fixed, rollups=()):
+    # Somas em centavos inteiros; vira float (formato da resposta) só no fim
+    history = {}
+
+    def month_entry(month):
+        month_str = month.strftime('%Y-%m')
+        if month_str not in history:
+            history[month_str] = {
+                'month_label': month,
+                'income': 0, 'expense': 0,
+                'estimated_expense': estimated_fixed,
+                'categories': {}, 'transactions': []
+            }
+        return history[month_str]
+
+    for t in transactions:
+        month_str = t['month'].strftime('%Y-%m')
+        month_entry(t['month'])
+        
+        val = t['value_cents']
+        
+        history[month_str]['transactions'].append({
+            'id': t['id'],
+            'description': t['description'],
+            'value': cents_to_float(val),
+            'type': t['type'],
+            'date': t['date'],
+            'category': t['category__name'] or 'Outros'
+        })
+
+        if t['type'] == 'INCOME':
+            history[month_str]['income'] += val
+        else:
+            history[month_str]['expense'] += val
+            cat_name = t['category__name'] or 'Geral'
+            history[month_str]['categories'][cat_name] = history[month_str]['categories'].get(cat_name, 0) + val
+
+    # Meses arquivados: só os totais (as transações estão em /archive/transactions/)
+    for r in rollups:
+        entry = month_entry(r['month'])
+        val = r['total_cents']
+        if r['type'] == 'INCOME':
+            entry['income'] += val
+        else:
+            entry['expense'] += val
+            cat_name = r['category__name'] or r['category_name'] or 'Geral'
+            entry['categories'][cat_name] = entry['categories'].get(cat_name, 0) + val
+
+    result = []
+    for key, data in sorted(history.items(), reverse=True):
+        chart_data = sorted(data['categories'].items(), key=lambda x: x[1], reverse=True)
+
+        result.append({
+            'id': key,
+            'date': data['month_label'],
+            'income': cents_to_float(data['income']),
+            'expense': cents_to_float(data['expense']),
+            'estimated': float(data['estimated_expense']),
+            'balance': cents_to_float(data['income'] - data['expense']),
+            'chart_data': [{'name': k, 'value': cents_to_float(v)} for k, v in chart_data],
+            'transactions': data['transactions']
+        })
+    return result
+
+
 class HistoryViewSet(viewsets.ViewSet):
     permission_classes = [permissions.IsAuthenticated]
+    replica_reads = True
+    throttle_scope = 'history'  # taxas em REST_FRAMEWORK (core/throttling.py)
+    heavy_request = True
 
     def list(self, request):
         user = self.request.user
@@ -181,68 +398,65 @@ class HistoryViewSet(viewsets.ViewSet):
             return Response([])
         
         house = user.house_member.house
-        today = datetime.date.today()
-        start_date = (today - relativedelta(months=11)).replace(day=1)
-
-        transactions = Transaction.objects.filter(
-            house=house, 
-            date__gte=start_date
-        ).annotate(month=TruncMonth('date')).values(
-            'month', 'type', 'value', 'category__name', 'description', 'date', 'id'
-        ).order_by('-month')
+        transactions = history_transactions(house.id)
 
         estimated_fixed = RecurringBill.objects.filter(
             house=house, is_active=True
         ).aggregate(total=Sum('base_value'))['total'] or 0
 
-        history = {}
-        
-        for t in transactions:
-            month_str = t['month'].strftime('%Y-%m')
-            
-            if month_str not in history:
-                history[month_str] = {
-                    'month_label': t['month'],
-                    'income': 0, 'expense': 0,
-                    'estimated_expense': estimated_fixed,
-                    'categories': {}, 'transactions': []
-                }
-            
-            val = float(t['value'])
-            
-            history[month_str]['transactions'].append({
-                'id': t['id'],
-                'description': t['description'],
-                'value': val,
-                'type': t['type'],
-                'date': t['date'],
-                'category': t['category__name'] or 'Outros'
-            })
-
-            if t['type'] == 'INCOME':
-                history[month_str]['income'] += val
-            else:
-                history[month_str]['expense'] += val
-                cat_name = t['category__name'] or 'Geral'
-                history[month_str]['categories'][cat_name] = history[month_str]['categories'].get(cat_name, 0) + val
-
-        result = []
-        for key, data in history.items():
-            chart_data = [{'name': k, 'value': v} for k, v in data['categories'].items()]
-            chart_data.sort(key=lambda x: x['value'], reverse=True)
-
-            result.append({
-                'id': key,
-                'date': data['month_label'],
-                'income': data['income'],
-                'expense': data['expense'],
-                'estimated': float(data['estimated_expense']),
-                'balance': data['income'] - data['expense'],
-                'chart_data': chart_data,
-                'transactions': data['transactions']
-            })
-
-        return Response(result)
+        return Response(build_history(transactions, estimated_fixed, history_rollups(house.id)))
+
+
+class ProjectionViewSet(viewsets.ViewSet):
+    """
+    GET /projection/?months=12
+    Saldo projetado das contas e uso dos cartões mês a mês (ver core/projection.py).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    replica_reads = True
+    throttle_scope = 'history'
+    heavy_request = True
+
+    def list(self, request):
+        user = request.user
+        if not hasattr(user, 'house_member'):
+            return Response({'error': 'Usuário sem casa.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            months = int(request.query_params.get('months', 12))
+        except ValueError:
+            months = 0
+        if not 1 <= months <= settings.PROJECTION_MAX_MONTHS:
+            return Response(
+                {'error': f'months deve ir de 1 a {settings.PROJECTION_MAX_MONTHS}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(projection.project(user, user.house_member.house_id, months))
+
+
+class ArchivedTransactionsView(APIView):
+    """
+    GET /archive/transactions/?year=2019[&month=3]
+    Transações arquivadas (core/archive.py) visíveis ao usuário, uma por
+    linha (JSON-lines), em stream: o bloco de cada mês é descompactado só
+    quando chega a vez dele.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'export'
+    heavy_request = True  # a vaga só é devolvida quando o stream termina
+
+    def get(self, request):
+        if not hasattr(request.user, 'house_member'):
+            return Response([])
+        try:
+            year = int(request.query_params['year'])
+            month = int(request.query_params.get('month', 0))
+            start = datetime.date(year, month or 1, 1)
+        except (KeyError, ValueError):
+            return Response({'error': 'Informe year (e opcionalmente month).'}, status=status.HTTP_400_BAD_REQUEST)
+        end = start + (relativedelta(months=1) if month else relativedelta(years=1))
+
+        lines = archive.iter_archived(request.user, request.user.house_member.house_id, start, end)
+        return StreamingHttpResponse(lines, content_type='application/x-ndjson')
 
 # ======================================================================
 # FINANCEIRO (Contas, Cartões, Faturas, Recorrências)
@@ -280,7 +494,28 @@ class InvoiceViewSet(BaseHouseViewSet):
         if not hasattr(user, 'house_member'): return Invoice.objects.none()
         return Invoice.objects.filter(card__house=user.house_member.house)
 
+    @action(detail=True, methods=['get'])
+    def statement(self, request, pk=None):
+        """
+        GET /invoices/{id}/statement/
+        Fatura, transações (com parcela i/n) e subtotais por categoria (ver
+        core/statements.py). Só as transações que o usuário vê. Fatura paga
+        vem do cache; o cliente revalida sempre pelo ETag forte (304).
+        """
+        invoice = get_object_or_404(self.get_queryset().select_related('card'), pk=pk)
+        transactions = visible_transactions(request.user, request.user.house_member.house_id).filter(invoice=invoice)
+        body, etag = statements.render_statement(invoice, request.user, transactions)
+
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
     @action(detail=True, methods=['post'])
+    @idempotent
     def pay(self, request, pk=None):
         try:
             invoice = self.get_object()
@@ -337,37 +572,66 @@ class RecurringBillViewSet(BaseHouseViewSet):
 # TRANSAÇÕES (O Coração Financeiro)
 # ======================================================================
 
-class TransactionViewSet(viewsets.ModelViewSet):
+def visible_transactions(user, house_id):
+    # Dono desnormalizado na própria transação (ver Transaction.owner):
+    # vejo tudo que é MEU e o que foi marcado como COMPARTILHADO na minha casa.
+    # Vale para conta e cartão, sem JOIN com Account e sem DISTINCT.
+    return Transaction.objects.filter(
+        house_id=house_id
+    ).filter(
+        Q(owner=user) | Q(is_shared=True)
+    ).order_by('-date', '-created_at')
+
+
+def _owner_name(row):
+    # Mesmo resultado de TransactionSerializer.get_owner_name
+    return row['owner__first_name'] if row['owner_id'] else "Desconhecido"
+
+
+def _source_name(row):
+    # Mesmo resultado de TransactionSerializer.get_source_name
+    if row['account_id']:
+        return row['account__name']
+    if row['credit_card_id']:
+        return f"Cartão {row['credit_card__name']}"
+    return "Outros"
+
+
+def _item_ids(view, transaction_ids):
+    items = {}
+    rows = TransactionItem.objects.filter(
+        transaction_id__in=transaction_ids
+    ).order_by('id').values_list('transaction_id', 'id')
+    for transaction_id, item_id in rows:
+        items.setdefault(transaction_id, []).append(item_id)
+    return items
+
+
+class TransactionViewSet(FastListMixin, viewsets.ModelViewSet):
     queryset = Transaction.objects.all()
     serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    replica_reads = True
+
+    # Listagem via .values() (ver core/fastpath.py)
+    fast_list_computed = {
+        'owner_name': (('owner_id', 'owner__first_name'), _owner_name),
+        'source_name': (('account_id', 'account__name', 'credit_card_id', 'credit_card__name'), _source_name),
+    }
+    fast_list_many = {'items': _item_ids}
 
     def get_queryset(self):
         user = self.request.user
-        
-        # 1. Descubro quais casas EU participo
-        my_house_ids = HouseMember.objects.filter(user=user).values_list('house_id', flat=True)
-
-        # 2. Crio uma lista de "Pessoas Permitidas" (Meus vizinhos de casa)
-        # Se eu moro na casa X, posso ver transações COMPARTILHADAS de quem também mora na casa X.
-        allowed_users_ids = HouseMember.objects.filter(
-            house_id__in=my_house_ids
-        ).values_list('user_id', flat=True)
-
-        # 3. O Filtro Definitivo
-        return Transaction.objects.filter(
-            # SITUAÇÃO A: A transação é MINHA
-            # Se eu sou o dono, vejo tudo (privado, público, secreto...)
-            Q(account__owner=user) | 
-            
-            # SITUAÇÃO B: A transação é DE OUTRO MEMBRO
-            # Aqui aplicamos a sua regra estrita:
-            Q(
-                is_shared=True,  # <--- O CADEADO: Só passa se foi marcada como pública na hora da compra
-                account__owner__id__in=allowed_users_ids # <--- E o dono da conta mora comigo
-            )
-        ).distinct().order_by('-date', '-created_at')
+        if not hasattr(user, 'house_member'):
+            return Transaction.objects.none()
 
+        return visible_transactions(user, user.house_member.house_id).select_related(
+            'category', 'owner', 'account', 'credit_card'
+        ).prefetch_related(
+            Prefetch('items', queryset=TransactionItem.objects.order_by('id'))
+        )
+
+    @idempotent
     def create(self, request, *args, **kwargs):
         data = request.data
         user = request.user
@@ -431,8 +695,7 @@ class TransactionViewSet(viewsets.ModelViewSet):
                     )
                     
                     installments = int(data.get('installments', 1))
-                    first_installment_value = total_value / installments
-                    invoice.value += first_installment_value
+                    invoice.value += split_installments(total_value, installments)[0]
                     invoice.save()
 
                 # --- Lógica: RECEITA (INCOME) ---
@@ -447,9 +710,19 @@ class TransactionViewSet(viewsets.ModelViewSet):
                 final_desc = data.get('description')
                 final_val = total_value
 
+                # Parcelas exatas em centavos: o resto da divisão fica na primeira
+                installment_values = split_installments(total_value, installments)
                 if installments > 1:
                     final_desc = f"{data.get('description')} (1/{installments})"
-                    final_val = total_value / installments
+                    final_val = installment_values[0]
+
+                # Parcelas no cartão: a série inteira compartilha o grupo
+                installment_group = uuid.uuid4() if installments > 1 and card and transaction_type == 'EXPENSE' else None
+
+                # Sem categoria informada: regras da casa (core/categorization.py)
+                category_id = data.get('category') or categorization.categorize(
+                    house, data.get('description'), total_value, transaction_type
+                )
 
                 transaction_instance = Transaction.objects.create(
                     house=house,
@@ -457,10 +730,11 @@ class TransactionViewSet(viewsets.ModelViewSet):
                     value=final_val,
                     type=transaction_type,
                     date=data.get('date', datetime.date.today()),
-                    category_id=data.get('category'),
+                    category_id=category_id,
                     account=account,
                     invoice=invoice,
-                    recurring_bill_id=data.get('recurring_bill')
+                    recurring_bill_id=data.get('recurring_bill'),
+                    installment_group=installment_group
                 )
 
                 # 4. Salva os Itens
@@ -469,15 +743,16 @@ class TransactionViewSet(viewsets.ModelViewSet):
                     for item in items_data:
                         items_objects.append(TransactionItem(
                             transaction=transaction_instance,
+                            transaction_date=transaction_instance.date,
                             description=item.get('description', 'Item'),
                             value=Decimal(str(item.get('value', 0))),
                             quantity=float(item.get('quantity', 1))
                         ))
                     TransactionItem.objects.bulk_create(items_objects)
+                    record_changes(TransactionItem, house.id, [item.pk for item in items_objects])
                 
                 # 5. Gera Parcelas Futuras (Cartão)
                 if installments > 1 and card and transaction_type == 'EXPENSE':
-                    installment_val = total_value / installments
                     new_transactions = []
                     base_date = transaction_instance.date
                     if isinstance(base_date, str):
@@ -491,18 +766,22 @@ class TransactionViewSet(viewsets.ModelViewSet):
                             card=card, reference_date=fut_ref,
                             defaults={'value': 0, 'status': 'OPEN'}
                         )
-                        fut_invoice.value += installment_val
+                        fut_invoice.value += installment_values[i]
                         fut_invoice.save()
 
+                        # bulk_create não passa pelo save(): dono/origem vão explícitos
                         new_transactions.append(Transaction(
                             house=house,
                             description=f"{data.get('description')} ({i+1}/{installments})",
-                            value=installment_val, type='EXPENSE',
+                            value=installment_values[i], type='EXPENSE',
                             invoice=fut_invoice, date=future_date,
-                            category_id=data.get('category')
+                            category_id=category_id,
+                            owner_id=card.owner_id, credit_card=card, is_shared=card.is_shared,
+                            installment_group=installment_group
                         ))
                     
                     Transaction.objects.bulk_create(new_transactions)
+                    record_changes(Transaction, house.id, [t.pk for t in new_transactions])
 
                 serializer = self.get_serializer(transaction_instance)
                 headers = self.get_success_headers(serializer.data)
@@ -515,6 +794,74 @@ class TransactionViewSet(viewsets.ModelViewSet):
         except Exception as e:
             return Response({'error': f"Erro interno: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'], url_path='bulk-delete')
+    @heavy_request
+    def bulk_delete(self, request):
+        """
+        POST /transactions/bulk-delete/ {"ids": [...]}
+        Apaga as transações (e as demais parcelas das séries) estornando
+        contas, faturas e limites de cartão (ver core/ledger.py).
+        """
+        user = request.user
+        if not hasattr(user, 'house_member'):
+            return Response({'error': 'Usuário sem casa.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        ids = request.data.get('ids')
+        if not isinstance(ids, list) or not ids:
+            return Response({'error': 'Envie uma lista de ids.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > settings.BULK_DELETE_MAX_ITEMS:
+            return Response(
+                {'error': f'Máximo de {settings.BULK_DELETE_MAX_ITEMS} transações por lote.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            ids = {int(pk) for pk in ids}
+        except (TypeError, ValueError):
+            return Response({'error': 'IDs inválidos.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        with db_transaction.atomic():
+            selected = visible_transactions(user, user.house_member.house_id).filter(pk__in=ids)
+            missing = sorted(ids - set(selected.values_list('pk', flat=True)))
+            if missing:
+                return Response({'error': 'Transações não encontradas.', 'ids': missing}, status=status.HTTP_404_NOT_FOUND)
+            _total, per_model = selected.delete_with_reversal()
+
+        return Response({
+            'deleted': per_model.get(Transaction._meta.label, 0),
+            'items_deleted': per_model.get(TransactionItem._meta.label, 0),
+        })
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Busca textual em descrições de transações e itens (ver core/search.py).
+        GET /transactions/search/?q=arroz&limit=20&offset=0
+        """
+        user = request.user
+        if not hasattr(user, 'house_member'):
+            return Response({'count': 0, 'results': []})
+
+        query = request.query_params.get('q', '').strip()
+        if len(query) < 2:
+            return Response({'error': 'Digite ao menos 2 caracteres.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+            offset = max(int(request.query_params.get('offset', 0)), 0)
+        except ValueError:
+            return Response({'error': 'limit/offset inválidos.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        total, ranked = search_transactions(user, user.house_member.house_id, query, limit, offset)
+
+        # Carrega só a página, mantendo a ordem por relevância
+        found = self.get_queryset().in_bulk([pk for pk, _rank in ranked])
+        results = []
+        for pk, rank in ranked:
+            if pk in found:
+                data = self.get_serializer(found[pk]).data
+                data['rank'] = round(rank, 4)
+                results.append(data)
+        return Response({'count': total, 'results': results})
+
 # ======================================================================
 # ESTOQUE E COMPRAS
 # ======================================================================
@@ -522,10 +869,17 @@ class TransactionViewSet(viewsets.ModelViewSet):
 class ProductViewSet(BaseHouseViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
+    replica_reads = True
 
-class InventoryViewSet(BaseHouseViewSet):
+class InventoryViewSet(FastListMixin, BulkUpdateMixin, BaseHouseViewSet):
     queryset = InventoryItem.objects.all()
     serializer_class = InventoryItemSerializer
+    replica_reads = True
+    bulk_serializer_class = InventoryBulkItemSerializer
+    bulk_select_related = ('product',)
+
+    def get_queryset(self):
+        return super().get_queryset().select_related('product')
     
     def perform_create(self, serializer):
         user = self.request.user
@@ -535,9 +889,12 @@ class InventoryViewSet(BaseHouseViewSet):
         if not min_qty: min_qty = product.min_quantity
         serializer.save(house=user.house_member.house, min_quantity=min_qty)
 
-class ShoppingListViewSet(BaseHouseViewSet):
+class ShoppingListViewSet(BulkUpdateMixin, BaseHouseViewSet):
     queryset = ShoppingList.objects.all()
     serializer_class = ShoppingListSerializer
+    bulk_serializer_class = ShoppingListBulkItemSerializer
+    bulk_select_related = ('product',)
+    throttle_scope = 'shopping-list'
 
     def get_queryset(self):
         user = self.request.user
@@ -564,6 +921,8 @@ class ShoppingListViewSet(BaseHouseViewSet):
         return ShoppingList.objects.filter(house=house).order_by('is_purchased', 'product__name')
 
     @action(detail=False, methods=['post'])
+    @heavy_request
+    @idempotent
     def finish(self, request):
         user = self.request.user
         house = user.house_member.house
@@ -625,7 +984,8 @@ class ShoppingListViewSet(BaseHouseViewSet):
                          unit_price = shop_item.discount_unit_price if shop_item.discount_unit_price > 0 else shop_item.product.estimated_price
 
                     transaction_items.append(TransactionItem(
-                        transaction=transaction, description=shop_item.product.name, 
+                        transaction=transaction, transaction_date=transaction.date,
+                        description=shop_item.product.name, 
                         quantity=qty, value=unit_price * qty 
                     ))
 
@@ -643,6 +1003,7 @@ class ShoppingListViewSet(BaseHouseViewSet):
                     count += 1
 
                 TransactionItem.objects.bulk_create(transaction_items)
+                record_changes(TransactionItem, house.id, [item.pk for item in transaction_items])
                 purchased_items.delete()
 
                 return Response({'message': f'Compra finalizada! {count} itens processados.'}, status=status.HTTP_200_OK)
@@ -768,44 +1129,23 @@ class RegisterView(generics.CreateAPIView):
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        
-        # 1. Cria o Usuário (O Signal vai rodar aqui e criar a Casa Padrão)
-        user = serializer.save()
-        
-        # 2. Verifica se existe convite para o e-mail cadastrado
-        email = user.email
-        pending_invite = HouseInvitation.objects.filter(email=email).first()
 
-        if pending_invite:
-            # --- CENÁRIO: USUÁRIO COM CONVITE ---
-            # O usuário já tem um HouseMember criado pelo Signal apontando para uma casa nova.
-            # Vamos atualizar esse registro para apontar para a casa do convite.
-
-            # Opcional: Se quiser limpar a casa "vazia" que o signal criou:
-            default_member_record = HouseMember.objects.filter(user=user).first()
-            if default_member_record:
-                orphaned_house = default_member_record.house
-                # Se for uma casa recém criada e vazia, deletamos para não sujar o banco
-                if orphaned_house.members.count() <= 1: 
-                    orphaned_house.delete() # Isso geralmente deleta o member junto via CASCADE
-
-            # Cria ou Atualiza o vínculo para a Casa do Convite
-            # O update_or_create resolve o erro de "Duplicate Key"
-            HouseMember.objects.update_or_create(
-                user=user,
-                defaults={
-                    'house': pending_invite.house, # A casa que convidou
-                    'role': 'MEMBER' # Ou o papel definido no convite
-                }
-            )
+        # 1. O convite pendente decide a casa ANTES de criar qualquer coisa:
+        # quem foi convidado não ganha uma casa padrão só para ela ser apagada
+        email = serializer.validated_data.get('email')
+        pending_invite = HouseInvitation.objects.filter(email=email, accepted=False).first() if email else None
 
-            # Deleta o convite pois já foi usado
-            pending_invite.delete()
+        # 2. Cria o Usuário
+        user = serializer.save()
 
-        # else:
-            # --- CENÁRIO: USUÁRIO SEM CONVITE ---
-            # O Signal já criou a Casa Nova e vinculou o usuário como MASTER.
-            # Não precisamos fazer nada.
+        if pending_invite:
+            # --- CENÁRIO: USUÁRIO COM CONVITE --- entra direto na casa do convite
+            HouseMember.objects.create(user=user, house_id=pending_invite.house_id, role='MEMBER')
+            HouseInvitation.objects.filter(pk=pending_invite.pk).delete()
+        else:
+            # --- CENÁRIO: USUÁRIO SEM CONVITE --- casa própria, já como MASTER
+            house = House.objects.create(name=f"Casa de {user.username}")
+            HouseMember.objects.create(user=user, house=house, role='MASTER')
 
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
@@ -945,18 +1285,318 @@ class AuthViewSet(viewsets.ViewSet):
             return Response({'status': 'E-mail atualizado.'})
         return Response(serializer.errors, status=400)
     
+def current_user_data(user):
+    return {
+        'id': user.id,
+        'username': user.username,
+        'first_name': user.first_name,
+        'email': user.email,
+        'full_name': user.get_full_name()
+    }
+
+
 class CurrentUserView(APIView):
     """
     Retorna os dados do usuário logado diretamente do banco de dados.
     """
     permission_classes = [permissions.IsAuthenticated]
 
+    def get(self, request):
+        return Response(current_user_data(request.user))
+
+
+# ======================================================================
+# BATCH (VÁRIAS OPERAÇÕES NUMA SÓ REQUISIÇÃO)
+# ======================================================================
+
+class _BatchAborted(Exception):
+    """Desfaz a transação do lote atômico na primeira operação com erro."""
+
+
+class BatchView(APIView):
+    """
+    POST /batch/
+    {
+        "atomic": true,
+        "operations": [
+            {"method": "PATCH", "path": "/api/inventory/3/", "body": {"quantity": 2}},
+            {"method": "DELETE", "path": "/api/shopping-list/9/"}
+        ]
+    }
+
+    Executa as operações em ordem, no mesmo processo, reaproveitando o usuário
+    já autenticado. Com "atomic" (padrão) tudo roda numa transação e a
+    primeira resposta >= 400 desfaz o lote inteiro (as seguintes não rodam).
+    Com "atomic": false cada operação é independente.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    METHODS = {'GET', 'POST', 'PUT', 'PATCH', 'DELETE'}
+    # Não repassados às sub-requisições
+    # (a Idempotency-Key do lote não pode valer para cada operação)
+    SKIPPED_META = {
+        'wsgi.input', 'CONTENT_LENGTH', 'CONTENT_TYPE', 'QUERY_STRING', 'PATH_INFO', 'REQUEST_METHOD',
+        'HTTP_IDEMPOTENCY_KEY',
+    }
+
+    def post(self, request):
+        operations = request.data.get('operations')
+        try:
+            # "false"/"0" de formulário também: qualquer string não vazia seria verdadeira
+            atomic = BooleanField().to_internal_value(request.data.get('atomic', True))
+        except DRFValidationError:
+            return Response({'error': '"atomic" deve ser true ou false.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not isinstance(operations, list) or not operations:
+            return Response({'error': 'Envie uma lista de operações.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(operations) > settings.BATCH_MAX_OPERATIONS:
+            return Response(
+                {'error': f'Máximo de {settings.BATCH_MAX_OPERATIONS} operações por lote.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        resolved = []
+        for index, operation in enumerate(operations):
+            error = self._validate(operation)
+            if error is None:
+                try:
+                    match = resolve(urlsplit(operation['path']).path)
+                    if getattr(match.func, 'view_class', None) is BatchView:
+                        error = 'Lotes aninhados não são permitidos.'
+                except Resolver404:
+                    error = 'Rota não encontrada.'
+            if error:
+                return Response({'error': f'Operação {index}: {error}'}, status=status.HTTP_400_BAD_REQUEST)
+            resolved.append((operation, match))
+
+        results = []
+        if atomic:
+            try:
+                with db_transaction.atomic():
+                    for operation, match in resolved:
+                        result = self._run(request, operation, match)
+                        results.append(result)
+                        if result['status'] >= 400:
+                            raise _BatchAborted()
+            except _BatchAborted:
+                return Response({'atomic': True, 'committed': False, 'results': results})
+            return Response({'atomic': True, 'committed': True, 'results': results})
+
+        for operation, match in resolved:
+            # Cada operação no seu savepoint: erro não deixa escrita pela metade
+            with db_transaction.atomic():
+                result = self._run(request, operation, match)
+                if result['status'] >= 400:
+                    db_transaction.set_rollback(True)
+            results.append(result)
+        return Response({'atomic': False, 'results': results})
+
+    def _validate(self, operation):
+        if not isinstance(operation, dict):
+            return 'Formato inválido.'
+        if str(operation.get('method', '')).upper() not in self.METHODS:
+            return 'Método inválido.'
+        path = operation.get('path')
+        if not isinstance(path, str) or not path.startswith('/api/'):
+            return 'O caminho deve começar com /api/.'
+        return None
+
+    def _run(self, request, operation, match):
+        url = urlsplit(operation['path'])
+        body = operation.get('body')
+        payload = json.dumps(body).encode('utf-8') if body is not None else b''
+
+        environ = {key: value for key, value in request.META.items() if key not in self.SKIPPED_META}
+        environ.update({
+            'REQUEST_METHOD': operation['method'].upper(),
+            'PATH_INFO': url.path,
+            'QUERY_STRING': url.query,
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(payload)),
+            'wsgi.input': io.BytesIO(payload),
+        })
+        sub_request = WSGIRequest(environ)
+        # O DRF usa este usuário direto, sem consultar o token de novo
+        sub_request._force_auth_user = request.user
+        sub_request._force_auth_token = request.auth
+
+        try:
+            response = match.func(sub_request, *match.args, **match.kwargs)
+        except Exception as e:
+            return {'status': 500, 'body': {'error': f"Erro interno: {str(e)}"}}
+
+        if hasattr(response, 'data'):
+            data = response.data
+        elif response.content:
+            try:
+                data = json.loads(response.content)
+            except ValueError:
+                data = response.content.decode('utf-8', errors='replace')
+        else:
+            data = None
+        return {'status': response.status_code, 'body': data}
+
+
+# ======================================================================
+# SINCRONIZAÇÃO INCREMENTAL (LOG DE ALTERAÇÕES)
+# ======================================================================
+
+def _sync_sources(user, house_id):
+    """Queryset visível ao usuário + serializer de cada model do log."""
+    visible_transactions = Transaction.objects.filter(house_id=house_id).filter(Q(owner=user) | Q(is_shared=True))
+    return {
+        'housemember': (HouseMember.objects.filter(house_id=house_id).select_related('user'), HouseMemberSerializer),
+        'category': (Category.objects.filter(house_id=house_id), CategorySerializer),
+        'account': (Account.objects.filter(house_id=house_id).filter(Q(is_shared=True) | Q(owner=user)), AccountSerializer),
+        'creditcard': (CreditCard.objects.filter(house_id=house_id).filter(Q(is_shared=True) | Q(owner=user)), CreditCardSerializer),
+        'invoice': (Invoice.objects.filter(card__house_id=house_id), InvoiceSerializer),
+        'recurringbill': (RecurringBill.objects.filter(house_id=house_id).select_related('category'), RecurringBillSerializer),
+        'transaction': (
+            visible_transactions.select_related('category', 'owner', 'account', 'credit_card').prefetch_related(
+                Prefetch('items', queryset=TransactionItem.objects.order_by('id'))
+            ),
+            TransactionSerializer,
+        ),
+        'transactionitem': (TransactionItem.objects.filter(transaction__in=visible_transactions), TransactionItemSerializer),
+        'product': (Product.objects.filter(house_id=house_id), ProductSerializer),
+        'inventoryitem': (InventoryItem.objects.filter(house_id=house_id).select_related('product'), InventoryItemSerializer),
+        'shoppinglist': (ShoppingList.objects.filter(house_id=house_id).select_related('product'), ShoppingListSerializer),
+        'houseinvitation': (HouseInvitation.objects.filter(house_id=house_id), HouseInvitationSerializer),
+    }
+
+
+class SyncView(APIView):
+    """
+    GET /sync/?since=<seq>&limit=<n>
+
+    Devolve só o que mudou na casa depois do cursor 'since':
+    {
+        "cursor": 42,            # guarde e mande no próximo since
+        "has_more": false,       # true: chame de novo com o novo cursor
+        "changes": {"transaction": {"upserts": [...], "deletes": [7, 9]}, ...}
+    }
+    Se o cursor for mais antigo que o log compactado (House.change_seq_floor),
+    responde 410: o cliente recarrega as listas e recomeça do 'cursor' enviado.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
     def get(self, request):
         user = request.user
+        if not hasattr(user, 'house_member'):
+            return Response({'error': 'Usuário sem casa.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            since = int(request.query_params.get('since', 0))
+            limit = int(request.query_params.get('limit', settings.SYNC_MAX_ENTRIES))
+        except ValueError:
+            return Response({'error': 'since/limit inválidos.'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = min(max(limit, 1), settings.SYNC_MAX_ENTRIES)
+
+        house = House.objects.only('change_seq', 'change_seq_floor').get(pk=user.house_member.house_id)
+        if since < house.change_seq_floor:
+            return Response(
+                {'error': 'Cursor expirado: recarregue os dados.', 'cursor': house.change_seq},
+                status=status.HTTP_410_GONE
+            )
+
+        entries = list(
+            ChangeLogEntry.objects.filter(house_id=house.id, seq__gt=since)
+            .order_by('seq').values_list('seq', 'model', 'object_id', 'op')[:limit + 1]
+        )
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+
+        # Só a última operação de cada objeto importa
+        latest = {}
+        for _seq, name, object_id, op in entries:
+            latest[(name, object_id)] = op
+
+        pending = {}
+        for (name, object_id), op in latest.items():
+            pending.setdefault(name, {'UPSERT': [], 'DELETE': []})[op].append(object_id)
+
+        sources = _sync_sources(user, house.id)
+        changes = {}
+        for name, ops in pending.items():
+            if name not in sources:
+                continue
+            queryset, serializer_class = sources[name]
+            pk_field = queryset.model._meta.pk
+            upserts = []
+            if ops['UPSERT']:
+                found = queryset.filter(pk__in=[pk_field.to_python(pk) for pk in ops['UPSERT']])
+                upserts = serializer_class(found, many=True, context={'request': request}).data
+            # Apagado depois ou deixou de ser visível (ex.: conta virou privada): vira tombstone
+            visible = {str(obj['id']) for obj in upserts}
+            gone = ops['DELETE'] + [pk for pk in ops['UPSERT'] if pk not in visible]
+            changes[name] = {
+                'upserts': upserts,
+                'deletes': [pk_field.to_python(pk) for pk in gone],
+            }
+
         return Response({
-            'id': user.id,
-            'username': user.username,
-            'first_name': user.first_name,
-            'email': user.email,
-            'full_name': user.get_full_name()
-        })
\ No newline at end of file
+            'cursor': entries[-1][0] if entries else since,
+            'has_more': has_more,
+            'changes': changes,
+        })
+
+
+# ======================================================================
+# EVENTOS EM TEMPO REAL (SSE)
+# ======================================================================
+
+async def token_user(request):
+    # EventSource não envia headers: aceita também ?token=
+    header = request.headers.get('Authorization', '')
+    key = header[6:].strip() if header.startswith('Token ') else request.GET.get('token')
+    if not key:
+        return None
+    try:
+        # house_member junto: views assíncronas não podem carregar relações sob demanda
+        token = await Token.objects.select_related('user', 'user__house_member').aget(key=key)
+    except Token.DoesNotExist:
+        return None
+    return token.user if token.user.is_active else None
+
+
+async def _event_stream(house_id):
+    queue = events.hub.subscribe(house_id)
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Mantém proxies e o navegador com a conexão aberta
+                yield ': ping\n\n'
+                continue
+            yield f"id: {event['seq']}\nevent: change\ndata: {json.dumps(event)}\n\n"
+    finally:
+        events.hub.unsubscribe(house_id, queue)
+
+
+@require_GET
+async def house_events(request):
+    """
+    GET /events/ (text/event-stream)
+
+    Avisa em tempo real as alterações da casa do usuário:
+        event: change
+        data: {"seq": 42, "model": "shoppinglist", "op": "UPSERT", "ids": ["7"]}
+    O cliente chama /sync/?since=<último seq> para buscar os dados.
+    Precisa rodar sob ASGI (ex.: uvicorn config.asgi:application): cada conexão
+    ociosa é só uma corrotina esperando na fila.
+    """
+    user = await token_user(request)
+    if user is None:
+        return JsonResponse({'detail': 'Token inválido ou ausente.'}, status=401)
+    house_id = await HouseMember.objects.filter(user_id=user.id).values_list('house_id', flat=True).afirst()
+    if house_id is None:
+        return JsonResponse({'detail': 'Usuário sem casa.'}, status=403)
+
+    events.get_broker().start()
+    return StreamingHttpResponse(
+        _event_stream(house_id),
+        content_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+